@@ -9,6 +9,8 @@ load_dotenv()
 # Environment Configuration
 USE_TESTNET = os.getenv("USE_TESTNET", "true").lower() == "true"
 BASE_URL = "https://testnet.binance.vision" if USE_TESTNET else "https://api.binance.com"
+# "mainnet", "testnet" or "paper" (in-process simulator replaying stored klines, see src/utils/simulator.py)
+EXCHANGE_MODE = os.getenv("EXCHANGE_MODE", "testnet" if USE_TESTNET else "mainnet")
 
 # API Configuration
 if USE_TESTNET:
@@ -18,10 +20,17 @@ else:
     API_KEY = os.getenv("BINANCE_API_KEY")
     API_SECRET = os.getenv("BINANCE_API_SECRET")
 
+# Additional accounts (e.g. sub-accounts): name -> env vars holding its key pair.
+# The "main" account always uses API_KEY / API_SECRET above.
+ACCOUNTS = {
+    # "sub1": ("BINANCE_SUB1_API_KEY", "BINANCE_SUB1_API_SECRET"),
+}
+
 # Trading Configuration
 TRADING_PAIR = "BTCUSDT" if USE_TESTNET else "BTCEUR"
 BASE_CURRENCY = "USDT" if USE_TESTNET else "EUR"
 TARGET_CURRENCY = "BTC"
+QUOTE_ASSETS = ("USDT", "USDC", "FDUSD", "EUR", "BTC")  # used to split symbols into target/base
 
 # Simple DCA Settings
 SIMPLE_DCA_AMOUNT = 62.0  # USDT for testnet, EUR for mainnet
@@ -32,3 +41,93 @@ BASELINE_AMOUNT = 0.0  # USDT for testnet, EUR for mainnet
 MIN_DIP_PERCENT = 0.02  # minimum -2% dip level
 MAX_DIP_PERCENT = 0.15  # maximum -15% dip level
 DIP_INCREMENT = 0.01    # 1% increment between dip levels
+# What counts as a dip: "change_24h" (24h ticker change vs MIN_DIP_PERCENT) or an
+# indicator from src/utils/indicators.py: drawdown, sma, ema, rsi, atr, zscore
+DIP_SIGNAL = os.getenv("DIP_SIGNAL", "change_24h")
+SIGNAL_INTERVAL = "1h"  # klines the indicators are fed
+SIGNAL_PERIODS = {"drawdown": 30 * 24, "sma": 200, "ema": 50, "rsi": 14, "atr": 14, "zscore": 7 * 24}  # in candles
+DIP_SIGNAL_THRESHOLDS = {  # a dip when the signal is at or below
+    "drawdown": -10.0,  # % below the 30-day high
+    "sma": -5.0,        # % below the 200-candle SMA
+    "ema": -5.0,        # % below the 50-candle EMA
+    "rsi": 30.0,        # oversold
+    "atr": -3.0,        # three ATRs below the 30-day high
+    "zscore": -2.0,     # two standard deviations below the weekly mean
+}
+# Dip sizing (src/utils/dip_sizing.py): amount added to the baseline, by dip depth
+DIP_SIZING_CURVE = "linear"  # "flat", "linear", "exponential" or "tiered" (steps of DIP_INCREMENT)
+DIP_MIN_AMOUNT = 10.0        # at MIN_DIP_PERCENT
+DIP_MAX_AMOUNT = 62.0        # at MAX_DIP_PERCENT and deeper
+DIP_CURVE_STEEPNESS = 3.0    # exponential curve only
+DIP_MONTHLY_BUDGET = None    # cap on buy-the-dip spending per calendar month per symbol; None = no cap
+DIP_BUDGET_MAX_CARRY = 3     # unspent budget carries forward, up to this many months' worth
+
+# Strategy settings file (src/utils/strategy_config.py): overrides the simple DCA and
+# buy-the-dip values above per strategy, validated and reloaded when it changes
+STRATEGY_CONFIG_FILE = os.getenv("STRATEGY_CONFIG_FILE", os.path.join(os.path.dirname(__file__), "strategies.toml"))
+
+# Dip Ladder Settings (resting limit buys at every dip level)
+LADDER_LEVEL_AMOUNT = 10.0        # USDT for testnet, EUR for mainnet, per level
+LADDER_REPRICE_TOLERANCE = 0.005  # keep a resting level if within 0.5% of its target price
+
+# Portfolio Runner: (account, symbol, strategy, amount in the symbol's quote currency)
+PORTFOLIO = [
+    ("main", TRADING_PAIR, "simple_dca", SIMPLE_DCA_AMOUNT),
+    # ("main", "ETHEUR", "simple_dca", 20.0),
+    # ("sub1", "SOLEUR", "buy_the_dip", 10.0),
+]
+PORTFOLIO_MAX_WORKERS = 4  # allocations executed concurrently
+
+# Account Cache Settings
+ACCOUNT_CACHE_TTL = 60  # seconds before balances are refetched from the API
+
+# Daemon Schedule (cron: minute hour day month weekday, UTC; None disables a job)
+DAEMON_SCHEDULE = {
+    "simple_dca": "0 * * * *",       # every hour, like the systemd timer
+    "buy_the_dip": None,
+    "dip_ladder": None,
+    "portfolio": None,
+    "check_orders": "0 */6 * * *",   # every 6 hours
+}
+
+# Paper Trading Settings (EXCHANGE_MODE=paper)
+PAPER_BALANCES = {"USDT": 10000.0, "EUR": 10000.0}  # starting free balances per account
+PAPER_FEE_RATE = 0.001         # 0.1% per fill, charged like Binance without BNB
+PAPER_KLINE_INTERVAL = "1m"    # stored klines the simulator replays
+
+# Request Rate Limits (shared by every process on this host, see src/utils/rate_limit.py)
+REQUEST_WEIGHT_LIMIT = 6000  # Binance REQUEST_WEIGHT per minute per IP
+ORDER_LIMIT_10S = 100        # orders per 10 seconds per account
+RATE_LIMIT_SAFETY = 0.8      # only use this fraction of the limits
+MAX_REQUEST_RETRIES = 5      # retries after a 429/418 before giving up
+
+# Order Submission (every order is journaled first, see src/utils/order_journal.py)
+REQUEST_TIMEOUT = 5          # seconds; short is safe, an order with unknown status is looked up before any resend
+ORDER_SLOT_SECONDS = 3600    # schedule slot in the client order id: one order per strategy, symbol and slot
+ORDER_SUBMIT_RETRIES = 3     # resends after a timeout/5xx once the order was not found on the exchange
+
+# Execution (how a purchase is placed, see src/utils/execution.py)
+EXECUTION_MODE = os.getenv("EXECUTION_MODE", "market")  # "market", "twap" or "maker"
+TWAP_SLICES = 4              # market orders a twap purchase is split into
+TWAP_WINDOW_SECONDS = 600    # spread over this long
+MAKER_TIMEOUT_SECONDS = 120  # maker buy at the best bid; the rest goes at market after this
+MAKER_POLL_SECONDS = 5
+MAKER_REPRICES = 3           # re-posts when the bid moved and the maker order would take
+MAX_SLIPPAGE_BPS = 30        # with a local order book: market buys expected to slip more are sliced as TWAP
+
+# Market Data Stream
+STREAM_URL = "wss://stream.testnet.binance.vision" if USE_TESTNET else "wss://stream.binance.com:9443"
+LISTEN_KEY_KEEPALIVE_SECONDS = 30 * 60  # listenKeys expire after 60 minutes without a keepalive
+ORDER_BOOK_DEPTH_LIMIT = 1000  # levels in the REST snapshot a local order book starts from
+
+# Local Data Storage
+DATA_DIR = os.getenv("DATA_DIR", "data")
+KLINE_SYNC_WORKERS = 4  # concurrent kline page downloads
+# Latency/counter metrics written at exit: *.prom for the Prometheus textfile collector, else JSON
+METRICS_FILE = os.getenv("METRICS_FILE")
+# SQLite trade ledger (paper trades are kept apart from real ones)
+LEDGER_FILE = os.path.join(DATA_DIR, "paper_ledger.db" if EXCHANGE_MODE == "paper" else "ledger.db")
+EXCHANGE_INFO_FILE = os.path.join(DATA_DIR, "exchange_info.json")  # cached symbol filters
+# Simulator clock, balances and orders per account; empty keeps them in memory and the clock on advance() only
+PAPER_STATE_FILE = os.getenv("PAPER_STATE_FILE", os.path.join(DATA_DIR, "paper_{account}.json"))
+EXCHANGE_INFO_TTL = 24 * 3600  # seconds before a symbol's filters are refetched
@@ -0,0 +1,222 @@
+"""
+Vectorized backtester for the simple DCA and buy-the-dip rules.
+
+Klines are loaded once into a pandas frame; each configuration is evaluated
+with array operations over its schedule slots (no per-candle Python loop), and
+parameter grids are spread across CPU cores with a process pool. Dip amounts
+come from the same DipSizer lookup table and MonthlyBudget the live strategy
+uses (src/utils/dip_sizing.py), on the 24h-change signal, with every sizing
+parameter taken from the buy_the_dip strategy settings.
+
+Usage:
+    python -m src.backtest.engine --symbol BTCEUR --interval 1h   # local kline store
+    python -m src.backtest.engine BTCEUR-1h-2023.csv BTCEUR-1h-2024.csv
+    python -m src.backtest.engine BTCEUR-1h-*.csv --sweep --out results.csv
+"""
+import os
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from src.strategies.base import get_strategy
+from src.strategies.buy_the_dip import get_sizer
+from src.utils.dip_sizing import CURVES, MonthlyBudget
+from src.utils.kline_store import load_frame
+from src.utils.strategy_config import get_config
+from config.settings import TRADING_PAIR, SIMPLE_DCA_AMOUNT
+
+KLINE_COLUMNS = [
+    "open_time", "open", "high", "low", "close", "volume", "close_time",
+    "quote_volume", "trades", "taker_base_volume", "taker_quote_volume", "ignore",
+]
+DEFAULT_FEE_RATE = 0.001  # 0.1% spot taker fee, charged in BTC
+# (min_amount, max_amount) of the dip curve when sweeping: with min == max every curve is flat
+DIP_AMOUNT_RANGES = [(5.0, 25.0), (10.0, SIMPLE_DCA_AMOUNT), (25.0, 100.0), (50.0, 200.0)]
+
+# Frame shared with the pool workers (inherited on fork, set by the initializer otherwise)
+_klines = None
+
+
+def load_klines(paths: list) -> pd.DataFrame:
+    """Load Binance kline CSV dumps (data.binance.vision format) into one close-price frame"""
+    frames = []
+    for path in paths:
+        df = pd.read_csv(path, header=None, names=KLINE_COLUMNS, usecols=["open_time", "close"])
+        df = df[pd.to_numeric(df["open_time"], errors="coerce").notna()]  # drop header rows
+        frames.append(df.astype({"open_time": "int64", "close": "float64"}))
+    df = pd.concat(frames, ignore_index=True)
+
+    # Spot dumps switched from millisecond to microsecond timestamps in 2025
+    unit = np.where(df["open_time"] > 10**14, 1000, 1)
+    df.index = pd.to_datetime(df["open_time"] // unit, unit="ms", utc=True)
+    return df[~df.index.duplicated()].sort_index()[["close"]]
+
+
+@lru_cache(maxsize=None)
+def _slots(schedule: str):
+    """Slot prices for a schedule and the 24h change at each slot, as NumPy arrays"""
+    close = _klines["close"]
+    prices = close.resample(schedule).first().dropna()
+    prev = close.reindex(prices.index - pd.Timedelta(hours=24), method="ffill").to_numpy()
+    change = prices.to_numpy() / prev - 1.0
+    return prices.index, prices.to_numpy(), np.nan_to_num(change, nan=0.0)
+
+
+def slot_amounts(params: dict, change: np.ndarray, index=None) -> np.ndarray:
+    """Quote amount bought at every slot for one configuration"""
+    if params["strategy"] == "simple_dca":
+        return np.full(change.shape, params["amount"], dtype="float64")
+
+    # Buy the dip: baseline every slot, plus the sized dip amount once the 24h change reaches -min_dip
+    # (the same lookup table BuyTheDip builds from the same parameters)
+    sizer = get_sizer(params["curve"], params["min_dip"] * 100, params["max_dip"] * 100,
+                      params["dip_min_amount"], params["dip_amount"],
+                      params["dip_increment"] * 100, params["steepness"])
+    amounts = params["baseline"] + sizer.amounts(-change * 100)
+
+    if params.get("budget") is not None and index is not None:
+        # Sequential by nature: what's left carries into the next month
+        budget = MonthlyBudget(monthly=params["budget"], max_carry=params["max_carry"])
+        months = index.strftime("%Y-%m")
+        for i, month in enumerate(months):
+            if amounts[i] > 0:
+                amounts[i] = budget.cap("backtest", month, amounts[i])
+                budget.spend("backtest", month, amounts[i])
+    return amounts
+
+
+def evaluate(params: dict) -> dict:
+    """Replay one configuration and return its summary metrics"""
+    index, prices, change = _slots(params["schedule"])
+    amounts = slot_amounts(params, change, index)
+    fee_rate = params.get("fee_rate", DEFAULT_FEE_RATE)
+
+    btc = amounts / prices * (1.0 - fee_rate)
+    cum_btc = np.cumsum(btc)
+    cum_invested = np.cumsum(amounts)
+    value = cum_btc * prices
+
+    invested = cum_invested[-1] if len(amounts) else 0.0
+    total_btc = cum_btc[-1] if len(amounts) else 0.0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Worst unrealized loss relative to the capital invested so far
+        underwater = np.where(cum_invested > 0, value / cum_invested - 1.0, 0.0)
+
+    return {
+        **params,
+        "start": index[0] if len(index) else None,
+        "end": index[-1] if len(index) else None,
+        "buys": int(np.count_nonzero(amounts)),
+        "invested": invested,
+        "btc": total_btc,
+        "fees_quote": float((amounts * fee_rate).sum()),
+        "cost_basis": invested / total_btc if total_btc else float("nan"),
+        "final_value": value[-1] if len(value) else 0.0,
+        "return_pct": (value[-1] / invested - 1.0) * 100 if invested else 0.0,
+        "max_drawdown_pct": float(underwater.min()) * 100 if len(underwater) else 0.0,
+    }
+
+
+def _init_worker(klines):
+    global _klines
+    _klines = klines
+
+
+def expand_grid(grid: dict) -> list:
+    """Cartesian product of {param: [values]} into a list of configurations"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+
+
+def run_grid(klines: pd.DataFrame, configs: list, workers: int = None) -> pd.DataFrame:
+    """Evaluate configurations in parallel across cores"""
+    workers = workers or os.cpu_count()
+    chunksize = max(1, len(configs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(klines,)) as pool:
+        results = list(pool.map(evaluate, configs, chunksize=chunksize))
+    return pd.DataFrame(results)
+
+
+def dip_params() -> dict:
+    """Buy-the-dip parameters of the current strategy settings (strategies.toml or config/settings.py)"""
+    get_strategy("buy_the_dip")  # registers the settings
+    settings = get_config().get("buy_the_dip")
+    return {
+        "baseline": settings["baseline"], "curve": settings["curve"],
+        "dip_min_amount": settings["min_amount"], "dip_amount": settings["max_amount"],
+        "min_dip": settings["min_dip_percent"], "max_dip": settings["max_dip_percent"],
+        "dip_increment": settings["dip_increment"], "steepness": settings["steepness"],
+        "budget": settings["monthly_budget"], "max_carry": settings["max_carry"],
+    }
+
+
+def default_configs(sweep: bool) -> list:
+    """Current settings, or a grid around them when sweeping"""
+    current = dip_params()
+    if not sweep:
+        return [
+            {"strategy": "simple_dca", "schedule": "1h", "amount": SIMPLE_DCA_AMOUNT},
+            {"strategy": "buy_the_dip", "schedule": "1h", **current},
+        ]
+
+    schedules = ["1h", "4h", "1D", "W-MON"]
+    configs = expand_grid({
+        "strategy": ["simple_dca"],
+        "schedule": schedules,
+        "amount": [10.0, 25.0, SIMPLE_DCA_AMOUNT, 100.0],
+    })
+    for config in expand_grid({
+        "strategy": ["buy_the_dip"],
+        "schedule": schedules,
+        "baseline": [0.0, 10.0, 25.0],
+        "curve": list(CURVES),
+        "amounts": DIP_AMOUNT_RANGES,
+        "min_dip": [round(0.01 * i, 2) for i in range(1, 11)],
+    }):
+        # Everything not swept (max dip, tier width, steepness, budget) as currently configured
+        config = {**current, **config}
+        config["dip_min_amount"], config["dip_amount"] = config.pop("amounts")
+        config["max_dip"] = max(config["max_dip"], config["min_dip"])
+        configs.append(config)
+    return configs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest simple DCA and buy-the-dip over historical klines")
+    parser.add_argument("klines", nargs="*", help="Binance kline CSV files (default: read the local kline store)")
+    parser.add_argument("--symbol", default=TRADING_PAIR, help="symbol to read from the kline store")
+    parser.add_argument("--interval", default="1h", help="interval to read from the kline store")
+    parser.add_argument("--sweep", action="store_true", help="evaluate a parameter grid instead of the current settings")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--out", help="write every result row to this CSV file")
+    args = parser.parse_args()
+
+    if args.klines:
+        klines = load_klines(args.klines)
+    else:
+        klines = load_frame(args.symbol, args.interval)[["close"]]
+        if klines.empty:
+            print(f"No stored klines for {args.symbol} {args.interval}, run python -m tools.sync_klines first.")
+            return
+    configs = default_configs(args.sweep)
+    print(f"Loaded {len(klines)} candles ({klines.index[0]} -> {klines.index[-1]})")
+    print(f"Evaluating {len(configs)} configurations...")
+
+    results = run_grid(klines, configs, workers=args.workers)
+    results = results.sort_values("cost_basis")
+
+    if args.out:
+        results.to_csv(args.out, index=False)
+        print(f"Results written to {args.out}")
+
+    columns = ["strategy", "schedule", "amount", "baseline", "curve", "dip_min_amount", "dip_amount", "min_dip", "budget",
+               "invested", "btc", "cost_basis", "fees_quote", "max_drawdown_pct"]
+    print(results[[c for c in columns if c in results]].head(20).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
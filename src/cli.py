@@ -0,0 +1,117 @@
+"""
+autoinvest: single command line entry point for the bot.
+
+    autoinvest dca                 # simple DCA market buy
+    autoinvest dip [--watch]       # buy the dip now, or watch the price stream
+    autoinvest ladder              # sync the resting dip ladder
+    autoinvest portfolio           # every PORTFOLIO allocation
+    autoinvest check               # notify new limit-order fills
+    autoinvest listen              # user data stream listener
+    autoinvest history [...]       # trade ledger and summaries
+    autoinvest orders | cancel     # list / cancel open orders (filters, --json, --dry-run)
+    autoinvest daemon              # resident scheduler
+
+Also runnable without installing, as `python -m src.cli ...` from the repo.
+Each command imports its module only when it runs, so e.g. `history` never
+loads the Binance connector and nothing connects at import time.
+"""
+import argparse
+import sys
+
+
+def _dca(args):
+    from src.strategies.simple_dca import execute_simple_dca
+    execute_simple_dca()
+
+
+def _dip(args):
+    if args.watch:
+        from src.strategies.dip_watcher import watch
+        watch()
+    else:
+        from src.strategies.buy_the_dip import execute_buy_the_dip
+        execute_buy_the_dip()
+
+
+def _ladder(args):
+    from src.strategies.dip_ladder import execute_dip_ladder
+    execute_dip_ladder()
+
+
+def _portfolio(args):
+    from src.strategies.portfolio import execute_portfolio
+    execute_portfolio()
+
+
+def _check(args):
+    from src.monitoring.check_orders import check_and_notify_executions
+    check_and_notify_executions()
+
+
+def _listen(args):
+    from src.monitoring.user_stream import listen
+    listen()
+
+
+def _history(args):
+    from src.monitoring.show_history import add_arguments, run
+    parser = argparse.ArgumentParser(prog="autoinvest history", description="Show trade history and summaries")
+    add_arguments(parser)
+    run(parser.parse_args(args.args))
+
+
+def _orders(args):
+    from src.utils.open_orders import add_arguments, run_list
+    parser = argparse.ArgumentParser(prog="autoinvest orders", description="List open orders")
+    add_arguments(parser)
+    run_list(parser.parse_args(args.args))
+
+
+def _cancel(args):
+    from src.utils.open_orders import add_arguments, run_cancel
+    parser = argparse.ArgumentParser(prog="autoinvest cancel", description="Cancel open orders")
+    add_arguments(parser, cancel=True)
+    run_cancel(parser.parse_args(args.args))
+
+
+def _daemon(args):
+    from src.daemon import run_forever
+    run_forever()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="autoinvest", description="Binance DCA / buy-the-dip bot")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    commands.add_parser("dca", help="run the simple DCA buy").set_defaults(func=_dca)
+
+    dip = commands.add_parser("dip", help="run buy the dip")
+    dip.add_argument("--watch", action="store_true", help="stay connected and buy as dip levels are crossed")
+    dip.set_defaults(func=_dip)
+
+    commands.add_parser("ladder", help="sync the dip ladder limit orders").set_defaults(func=_ladder)
+    commands.add_parser("portfolio", help="run every PORTFOLIO allocation").set_defaults(func=_portfolio)
+    commands.add_parser("check", help="notify new limit-order executions").set_defaults(func=_check)
+    commands.add_parser("listen", help="listen to the user data stream for fills").set_defaults(func=_listen)
+
+    # Their options are defined (and their modules imported) only when they run
+    for name, func, text in (("history", _history, "show trade history and summaries"),
+                             ("orders", _orders, "list open orders"), ("cancel", _cancel, "cancel open orders")):
+        commands.add_parser(name, help=text, add_help=False).set_defaults(func=func, pass_through=True)
+
+    commands.add_parser("daemon", help="run the resident scheduler").set_defaults(func=_daemon)
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args, rest = parser.parse_known_args(argv)
+    if rest and not getattr(args, "pass_through", False):
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+    args.args = rest
+    args.func(args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""
+Resident scheduler for the strategy and monitoring jobs.
+
+Runs execute_simple_dca, execute_buy_the_dip and check_and_notify_executions
+from one long-lived process on a cron-like schedule (DAEMON_SCHEDULE, UTC).
+Imports, the Spot client and its HTTP session are set up once and reused on
+every tick, so cached state such as account balances survives between runs.
+"""
+import signal
+import time
+from datetime import datetime, timedelta, timezone
+from config.settings import DAEMON_SCHEDULE
+
+# Cron field ranges: minute, hour, day of month, month, day of week (0 = Sunday)
+CRON_FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+
+def parse_cron_field(field: str, low: int, high: int) -> set:
+    """Expand one cron field (*, */n, a-b, a-b/n, a,b) into the set of values"""
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step = part.split("/")
+            step = int(step)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(v) for v in part.split("-"))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or step < 1:
+            raise ValueError(f"Cron field '{field}' out of range {low}-{high}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSchedule:
+    """Five-field cron expression evaluated against UTC minutes"""
+
+    def __init__(self, expr: str):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: '{expr}'")
+        self.expr = expr
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            parse_cron_field(f, low, high) for f, (low, high) in zip(fields, CRON_FIELDS)
+        )
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def matches(self, dt: datetime) -> bool:
+        if dt.minute not in self.minutes or dt.hour not in self.hours or dt.month not in self.months:
+            return False
+        day_ok = dt.day in self.days
+        weekday_ok = (dt.weekday() + 1) % 7 in self.weekdays
+        # Standard cron: when both day fields are restricted, either one matches
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+
+def load_jobs() -> list:
+    """Import the job functions once and pair them with their schedules"""
+    from src.strategies.simple_dca import execute_simple_dca
+    from src.strategies.buy_the_dip import execute_buy_the_dip
+    from src.strategies.dip_ladder import execute_dip_ladder
+    from src.strategies.portfolio import execute_portfolio
+    from src.monitoring.check_orders import check_and_notify_executions
+
+    available = {
+        "simple_dca": execute_simple_dca,
+        "buy_the_dip": execute_buy_the_dip,
+        "dip_ladder": execute_dip_ladder,
+        "portfolio": execute_portfolio,
+        "check_orders": check_and_notify_executions,
+    }
+
+    jobs = []
+    for name, expr in DAEMON_SCHEDULE.items():
+        if not expr:
+            continue
+        if name not in available:
+            raise ValueError(f"Unknown job in DAEMON_SCHEDULE: {name}")
+        jobs.append((name, CronSchedule(expr), available[name]))
+    return jobs
+
+
+def run_job(name: str, func):
+    print(f"\n>>> Running job '{name}' at {datetime.now(timezone.utc).isoformat()}")
+    try:
+        func()
+    except Exception as e:
+        # A failing job must not take the daemon down with it
+        print(f"Job '{name}' failed: {e}")
+
+
+def run_forever():
+    """Wake up every minute and run the jobs whose schedule matches"""
+    jobs = load_jobs()
+    if not jobs:
+        print("No jobs scheduled in DAEMON_SCHEDULE, exiting.")
+        return
+
+    print("========== AUTOINVEST DAEMON ==========")
+    for name, schedule, _ in jobs:
+        print(f"{name:<14}: {schedule.expr}")
+    print("=======================================")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        print(f"Received signal {signum}, stopping after the current job.")
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    last_minute = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    while not stopping:
+        now = datetime.now(timezone.utc)
+        time.sleep(max(0.0, 60 - now.second - now.microsecond / 1e6))
+        if stopping:
+            break
+
+        # Walk every minute since the last check, so a long job never makes
+        # the loop skip a scheduled minute; each job still runs once per wake.
+        current = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+        due = []
+        minute = last_minute + timedelta(minutes=1)
+        while minute <= current:
+            for job in jobs:
+                if job not in due and job[1].matches(minute):
+                    due.append(job)
+            minute += timedelta(minutes=1)
+        last_minute = current
+
+        for name, _, func in due:
+            if stopping:
+                break
+            run_job(name, func)
+
+
+if __name__ == "__main__":
+    run_forever()
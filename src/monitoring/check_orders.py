@@ -1,98 +1,140 @@
-import sys
 import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-
+import json
+from pathlib import Path
 from decimal import getcontext, Decimal
-from binance.spot import Spot
 from datetime import datetime, timezone
-from src.utils.logger import log_trade
-from src.utils.telegram import send_telegram
+from src.utils.client import get_client
+from src.utils.exchange_filters import split_symbol
+from src.utils.metrics import PhaseTimer
+from src.utils.telegram import notify
 from config.settings import (
-    USE_TESTNET, BASE_URL, API_KEY, API_SECRET,
-    TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID,
-    TRADING_PAIR, BASE_CURRENCY, TARGET_CURRENCY
+    USE_TESTNET, BASE_URL, DATA_DIR, TRADING_PAIR
 )
 
 getcontext().prec = 28
 
-# Print clear environment indicator
-print(f"ENVIRONMENT: {'TESTNET (Safe Mode)' if USE_TESTNET else 'MAINNET (Real Money)'}")
-print(f"API URL: {BASE_URL if USE_TESTNET else 'https://api.binance.com'}")
-print(f"Trading Pair: {TRADING_PAIR}")
-print(f"Strategy: Check Orders")
-print("-" * 50)
-
-client = Spot(api_key=API_KEY, api_secret=API_SECRET, base_url=BASE_URL)
-
 # Config
 SYMBOL = TRADING_PAIR
+PAGE_LIMIT = 1000  # maximum trades per my_trades request
+FIRST_RUN_LOOKBACK_MS = 60 * 60 * 1000  # without a cursor, start from the last hour
+CURSOR_FILE = Path(DATA_DIR) / "check_orders_cursor.json"
+
+
+def load_cursor(symbol: str):
+    """Last notified trade id for a symbol, or None before the first run"""
+    if not CURSOR_FILE.exists():
+        return None
+    return json.loads(CURSOR_FILE.read_text()).get(symbol)
+
+
+def save_cursor(symbol: str, trade_id: int):
+    """Persist the cursor atomically (write a temp file, then rename over the old one)"""
+    cursors = json.loads(CURSOR_FILE.read_text()) if CURSOR_FILE.exists() else {}
+    if cursors.get(symbol) is not None and cursors[symbol] >= trade_id:
+        return
+    cursors[symbol] = trade_id
+    CURSOR_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = CURSOR_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(cursors))
+    os.replace(tmp, CURSOR_FILE)
+
+
+def notify_trade(trade: dict):
+    """Print and queue a Telegram notification for one fill"""
+    target_currency, base_currency = split_symbol(trade['symbol'])
+    qty = Decimal(trade['qty'])
+    price = Decimal(trade['price'])
+    fee = Decimal(trade['commission'])
+    total_cost = qty * price
+    trade_time = datetime.fromtimestamp(trade['time'] / 1000, timezone.utc)
+
+    print(f"New execution: {qty} {target_currency} @ {price} {base_currency} (trade {trade['id']})")
+
+    # Queue Telegram notification (a burst of fills is sent as one digest)
+    message = (
+        f"DIP ORDER EXECUTED! {'(TESTNET)' if USE_TESTNET else '(MAINNET)'}\n\n"
+        f"Trading Pair: {trade['symbol']}\n"
+        f"Order Type: Limit Order Fill\n"
+        f"Quantity: {qty} {target_currency}\n"
+        f"Execution Price: {price} {base_currency}\n"
+        f"Total Cost: {total_cost:.2f} {base_currency}\n"
+        f"Trading Fee: {fee} {trade['commissionAsset']}\n"
+        f"Order ID: {trade['orderId']}\n"
+        f"Trade ID: {trade['id']}\n"
+        f"Execution Time: {trade_time.strftime('%d/%m/%Y %H:%M:%S')} UTC\n\n"
+        f"Your buy-the-dip limit order was filled successfully!\n"
+        f"Market dipped to your target price and triggered the purchase."
+    )
+
+    try:
+        queued = notify(message)
+        print(f"Telegram notification queued: {queued}")
+    except Exception as e:
+        print(f"Telegram error: {e}")
+
+
+def poll_new_trades(symbol: str = SYMBOL, handle=notify_trade, client=None) -> int:
+    """Page forward from the stored cursor with fromId until caught up; returns trades handled"""
+    client = client or get_client()
+    cursor = load_cursor(symbol)
+    if cursor is None:
+        # First run: nothing stored yet, pick up the last hour like the old time window did
+        start = int(datetime.now(timezone.utc).timestamp() * 1000) - FIRST_RUN_LOOKBACK_MS
+        page = client.my_trades(symbol=symbol, startTime=start, limit=PAGE_LIMIT)
+        if not page:
+            # Anchor the cursor at the latest trade so later runs page forward from it
+            latest = client.my_trades(symbol=symbol, limit=1)
+            if latest:
+                save_cursor(symbol, latest[-1]['id'])
+            return 0
+    else:
+        page = client.my_trades(symbol=symbol, fromId=cursor + 1, limit=PAGE_LIMIT)
+
+    handled = 0
+    while page:
+        for trade in page:
+            handle(trade)
+            handled += 1
+            # The notification is already persisted in the outbox, so advancing after
+            # each trade means a crash can't resend a fill nor skip one
+            save_cursor(symbol, trade['id'])
+        if len(page) < PAGE_LIMIT:
+            break
+        page = client.my_trades(symbol=symbol, fromId=page[-1]['id'] + 1, limit=PAGE_LIMIT)
+    return handled
+
 
 def check_and_notify_executions():
-    """Check for recently executed orders and send Telegram notifications"""
+    """Check for newly executed orders and send Telegram notifications"""
+    phases = PhaseTimer("check_orders")
+    # Print clear environment indicator
+    print(f"ENVIRONMENT: {'TESTNET (Safe Mode)' if USE_TESTNET else 'MAINNET (Real Money)'}")
+    print(f"API URL: {BASE_URL if USE_TESTNET else 'https://api.binance.com'}")
+    print(f"Trading Pair: {TRADING_PAIR}")
+    print("Strategy: Check Orders")
+    print("-" * 50)
     
-    print(f"\n========== CHECKING ORDER EXECUTIONS ==========")
+    print("\n========== CHECKING ORDER EXECUTIONS ==========")
     print("Datetime (UTC):", datetime.now(timezone.utc).isoformat())
     print("===============================================")
     
     try:
-        # Get recent trades (last 24 hours)
-        trades = client.my_trades(symbol=SYMBOL, limit=10)
-        
-        if not trades:
-            print("No recent trades found")
-            return
-        
-        # Check for trades from the last hour (3600000 ms)
-        current_time = int(datetime.now(timezone.utc).timestamp() * 1000)
-        recent_threshold = current_time - (60 * 60 * 1000)  # 1 hour ago
-        
-        recent_executions = [t for t in trades if t['time'] > recent_threshold]
-        
-        if not recent_executions:
-            print("No executions in the last hour")
-            return
-        
-        for trade in recent_executions:
-            qty = Decimal(trade['qty'])
-            price = Decimal(trade['price'])
-            fee = Decimal(trade['commission'])
-            total_cost = qty * price
-            trade_time = datetime.fromtimestamp(trade['time'] / 1000, timezone.utc)
-            
-            print(f"Recent execution: {qty} BTC @ {price} {BASE_CURRENCY}")
-            
-            # Send Telegram notification
-            from src.utils.telegram import send_telegram
-            
-            message = (
-                f"DIP ORDER EXECUTED! {'(TESTNET)' if USE_TESTNET else '(MAINNET)'}\n\n"
-                f"Trading Pair: {SYMBOL}\n"
-                f"Order Type: Limit Order Fill\n"
-                f"Quantity: {qty} BTC\n"
-                f"Execution Price: {price} {BASE_CURRENCY}\n"
-                f"Total Cost: {total_cost:.2f} {BASE_CURRENCY}\n"
-                f"Trading Fee: {fee} BTC\n"
-                f"Order ID: {trade['orderId']}\n"
-                f"Trade ID: {trade['id']}\n"
-                f"Execution Time: {trade_time.strftime('%d/%m/%Y %H:%M:%S')} UTC\n\n"
-                f"Your buy-the-dip limit order was filled successfully!\n"
-                f"Market dipped to your target price and triggered the purchase."
-            )
-            
-            try:
-                sent = send_telegram(message, parse_mode=None)
-                print(f"Telegram notification sent: {sent}")
-            except Exception as e:
-                print(f"Telegram error: {e}")
+        handled = poll_new_trades(SYMBOL)
+        phases.lap("poll")
+        if not handled:
+            print("No new executions since the last check")
+        else:
+            print(f"{handled} new executions notified")
     
     except Exception as e:
         print(f"Error checking executions: {e}")
         # Send error notification
         try:
             error_msg = f"Error checking order executions: {str(e)}"
-            send_telegram(error_msg, parse_mode=None)
+            notify(error_msg)
         except:
             pass
+    phases.done()
 
 if __name__ == "__main__":
     check_and_notify_executions()
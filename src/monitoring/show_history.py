@@ -1,52 +1,107 @@
-import csv
+import argparse
 from pathlib import Path
 from decimal import Decimal
+from src.utils.exchange_filters import split_symbol
+from src.utils.ledger import connect, query_trades, get_aggregates
+from config.settings import LEDGER_FILE
 
-CSV_FILE = Path("history.csv")
 
-if not CSV_FILE.exists():
-    print("No history.csv found. Run buy_the_dip.py at least once first.")
-    exit()
+def print_trade(row):
+    base = row['base_currency'] or ""
+    print("-----------------------------------")
+    print(f"Datetime   : {row['datetime_utc']}")
+    print(f"Action     : {row['action']}")
+    print(f"Symbol     : {row['symbol']}")
+    print(f"Base Amt   : {row['base_amount']} {base}")
+    print(f"{asset(row['symbol']) + ' Bought':<11}: {row['btc_qty']} (avg price {row['avg_price']} {base})")
+    print(f"Fee        : {row['fee']}")
+    print(f"Dip Order  : {row['dip_qty']} @ {row['dip_price']}")
+    print(f"{base:<4} Bal   : {row['base_before']} -> {row['base_after']}")
+    print(f"{asset(row['symbol']) + ' Bal':<11}: {row['btc_before']} -> {row['btc_after']}")
 
-print("========== TRADE HISTORY ==========")
 
-total_usdt = Decimal("0")
-total_btc = Decimal("0")
-total_fee_btc = Decimal("0")
+def asset(symbol: str) -> str:
+    """Bought asset of a symbol ('ETHEUR' -> 'ETH'), the symbol itself if its quote is unknown"""
+    try:
+        return split_symbol(symbol)[0]
+    except ValueError:
+        return symbol
 
-with open(CSV_FILE, mode="r", newline="") as f:
-    reader = csv.DictReader(f)
-    rows = list(reader)
 
-    if not rows:
+def print_rollup(label, rows):
+    for row in rows:
+        qty = Decimal(row['qty'])
+        avg = f"{Decimal(row['invested']) / qty:.2f}" if qty > 0 else "-"
+        print(f"{label(row):<14} {row['trades']:>6} trades | {row['invested']:>12} {row['base_currency']} "
+              f"| {row['qty']:>12} {asset(row['symbol']):<5} | avg {avg}")
+
+
+def show_history(limit=20, offset=0, since=None, until=None, action=None, months=12, summary_only=False):
+    if not Path(LEDGER_FILE).exists():
+        print(f"No ledger found at {LEDGER_FILE}. Run a strategy at least once first.")
+        return
+
+    conn = connect()
+    try:
+        if not summary_only:
+            rows = query_trades(conn, since=since, until=until, action=action,
+                                limit=limit, offset=offset, newest_first=True)
+            print("========== TRADE HISTORY ==========")
+            if not rows:
+                print("No trades recorded for this page/filter.")
+            for row in rows:
+                print_trade(row)
+            print("===================================")
+            print(f"Showing {len(rows)} trades (newest first, offset {offset})")
+
+        # Summaries come from the running aggregates, not from a scan of every trade
+        totals = get_aggregates(conn, "total")
+        strategies = get_aggregates(conn, "strategy")
+        month_rows = get_aggregates(conn, "month")
+    finally:
+        conn.close()
+
+    print("========== TOTAL SUMMARY ==========")
+    if not totals:
         print("No trades recorded yet.")
-    else:
-        for row in rows:
-            print("-----------------------------------")
-            print(f"Datetime   : {row['datetime_utc']}")
-            print(f"Action     : {row['action']}")
-            print(f"Symbol     : {row['symbol']}")
-            print(f"Base Amt   : {row['base_amount_usdt']} USDT")
-            print(f"BTC Bought : {row['btc_qty']} (avg price {row['avg_price']} USDT)")
-            print(f"Fee        : {row['fee']}")
-            print(f"Dip Order  : {row['dip_qty']} BTC @ {row['dip_price']}")
-            print(f"USDT Bal   : {row['usdt_before']} -> {row['usdt_after']}")
-            print(f"BTC Bal    : {row['btc_before']} -> {row['btc_after']}")
-
-            # accumulate totals
-            try:
-                total_usdt += Decimal(row['base_amount_usdt'])
-                total_btc += Decimal(row['btc_qty'])
-                total_fee_btc += Decimal(row['fee'])
-            except Exception:
-                pass
-
-print("===================================")
-print("========== TOTAL SUMMARY ==========")
-print(f"Total USDT invested : {total_usdt}")
-print(f"Total BTC bought    : {total_btc}")
-print(f"Total fees (BTC)    : {total_fee_btc}")
-if total_btc > 0:
-    avg_price_all = total_usdt / total_btc
-    print(f"Average buy price   : {avg_price_all:.2f} USDT")
-print("===================================")
+    for row in totals:
+        invested, qty = Decimal(row['invested']), Decimal(row['qty'])
+        bought = asset(row['symbol'])
+        print(f"--- {row['symbol']} ---")
+        print(f"Total trades        : {row['trades']}")
+        print(f"Total {row['base_currency']} invested  : {invested}")
+        print(f"Total {bought} bought    : {qty}")
+        print(f"Total fees ({bought})    : {row['fees']}")
+        if qty > 0:
+            print(f"Average buy price   : {invested / qty:.2f} {row['base_currency']}")
+    print("========== BY STRATEGY ============")
+    print_rollup(lambda r: r['key'], strategies)
+    print("========== BY MONTH ===============")
+    recent = sorted({r['key'] for r in month_rows})[-months:] if months else None
+    print_rollup(lambda r: r['key'], [r for r in month_rows if recent is None or r['key'] in recent])
+    print("===================================")
+
+
+def add_arguments(parser):
+    parser.add_argument("--limit", type=int, default=20, help="trades per page (default 20)")
+    parser.add_argument("--page", type=int, default=1, help="page number, newest trades first")
+    parser.add_argument("--since", help="only trades at or after this UTC date/time (e.g. 2025-01-01)")
+    parser.add_argument("--until", help="only trades before this UTC date/time")
+    parser.add_argument("--action", help="only trades of one strategy (e.g. simple_dca)")
+    parser.add_argument("--months", type=int, default=12, help="monthly rollups to show (0 = all)")
+    parser.add_argument("--summary", action="store_true", help="only print the summary")
+
+
+def run(args):
+    show_history(limit=args.limit, offset=(max(args.page, 1) - 1) * args.limit, since=args.since,
+                 until=args.until, action=args.action, months=args.months, summary_only=args.summary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show trade history and portfolio summary")
+    add_arguments(parser)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+User data stream listener: order fills are pushed instead of polled.
+
+Creates a listenKey and keeps it alive, consumes executionReport and
+outboundAccountPosition events, and for every fill updates the cached balances,
+the trade ledger and the Telegram queue within the same second. REST is only
+used after a (re)connect, to reconcile anything missed while the socket was
+down, through the same fromId cursor as check_orders.
+"""
+import json
+import signal
+import threading
+from decimal import Decimal
+from binance.websocket.spot.websocket_stream import SpotWebsocketStreamClient
+from src.utils.account import get_account_state
+from src.utils.client import account_name, get_client
+from src.utils.exchange_filters import split_symbol
+from src.utils.logger import log_trade
+from src.utils.order_journal import is_journaled
+from src.monitoring.check_orders import notify_trade, poll_new_trades, save_cursor
+from config.settings import (
+    USE_TESTNET, STREAM_URL, TRADING_PAIR, LISTEN_KEY_KEEPALIVE_SECONDS
+)
+
+SYMBOL = TRADING_PAIR
+
+
+def fill_from_event(event: dict) -> dict:
+    """executionReport trade event in the shape my_trades returns"""
+    return {
+        "id": event["t"],
+        "symbol": event["s"],
+        "orderId": event["i"],
+        "qty": event["l"],
+        "price": event["L"],
+        "commission": event["n"] or "0",
+        "commissionAsset": event["N"] or "",
+        "time": event["T"],
+    }
+
+
+class UserDataStream:
+    """listenKey lifecycle, event handling and reconnect/reconcile loop"""
+
+    def __init__(self, client, stream_url: str = STREAM_URL, max_backoff: float = 60.0):
+        self.client = client
+        self.stream_url = stream_url
+        self.max_backoff = max_backoff
+        self.account = get_account_state(client)
+        self.listen_key = None
+
+        self._ws = None
+        self._lock = threading.Lock()
+        self._seen = set()        # (symbol, trade id) already handled, so stream and reconcile never double-notify
+        self._reconciling = False
+        self._stream_last = None  # newest SYMBOL trade id the stream delivered during a reconcile
+        self._orders = {}         # orderId -> order, for the trades of one reconcile
+        self._disconnected = threading.Event()
+        self._stopping = threading.Event()
+
+    # ----- lifecycle -----
+
+    def run(self):
+        """Connect, reconcile, and keep reconnecting until stop() is called"""
+        backoff = 1.0
+        self._disconnected.set()
+        while not self._stopping.is_set():
+            self._disconnected.wait()
+            if self._stopping.is_set():
+                break
+            try:
+                self._connect()
+                self.reconcile()
+                backoff = 1.0
+            except Exception as e:
+                print(f"User stream connect failed: {e}, retrying in {backoff:.0f}s")
+                self._disconnected.set()
+                if self._stopping.wait(backoff):
+                    break
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+            # Keep the listenKey alive while connected
+            while not self._disconnected.wait(LISTEN_KEY_KEEPALIVE_SECONDS):
+                try:
+                    self.client.renew_listen_key(self.listen_key)
+                except Exception as e:
+                    print(f"listenKey keepalive failed: {e}")
+                    self._disconnected.set()
+        self._close()
+
+    def stop(self):
+        self._stopping.set()
+        self._disconnected.set()
+
+    def _connect(self):
+        self._close()
+        self._disconnected.clear()
+        self.listen_key = self.client.new_listen_key()["listenKey"]
+        self._ws = SpotWebsocketStreamClient(
+            stream_url=self.stream_url,
+            on_message=self._handle_message,
+            on_close=self._handle_close,
+            on_error=self._handle_error,
+        )
+        self._ws.user_data(listen_key=self.listen_key)
+        print("User data stream connected")
+
+    def _close(self):
+        if self._ws is not None:
+            self._ws.stop()
+            self._ws = None
+        if self.listen_key is not None:
+            try:
+                self.client.close_listen_key(self.listen_key)
+            except Exception:
+                pass
+            self.listen_key = None
+
+    def reconcile(self):
+        """Catch up over REST on anything missed while disconnected"""
+        self.account.invalidate()
+        self._orders = {}
+        with self._lock:
+            self._reconciling = True
+            self._stream_last = None
+        try:
+            handled = poll_new_trades(SYMBOL, handle=self._handle_rest_trade, client=self.client)
+        finally:
+            with self._lock:
+                self._reconciling = False
+                # REST is caught up: stream fills that arrived meanwhile can move the cursor now
+                if self._stream_last is not None:
+                    save_cursor(SYMBOL, self._stream_last)
+        if handled:
+            print(f"Reconciled {handled} fills missed while disconnected")
+
+    # ----- events -----
+
+    def _handle_message(self, manager, message):
+        event = json.loads(message)
+        event_type = event.get("e")
+        if event_type == "outboundAccountPosition":
+            self.account.update_balances({b["a"]: b["f"] for b in event["B"]})
+        elif event_type == "executionReport" and event["x"] == "TRADE":
+            self._handle_fill(event)
+        elif event_type == "listenKeyExpired":
+            self._handle_close(manager)
+
+    def _handle_fill(self, event: dict):
+        fill = fill_from_event(event)
+        with self._lock:
+            if not self._claim(fill):
+                return
+            self._record(fill, event["o"], event["c"])
+            if fill["symbol"] != SYMBOL:
+                return
+            if self._reconciling:
+                # Older trades may still be on the REST pages: don't move the cursor past them yet
+                self._stream_last = max(self._stream_last or 0, fill["id"])
+            else:
+                save_cursor(SYMBOL, fill["id"])
+
+    def _handle_rest_trade(self, trade: dict):
+        """A my_trades row from reconcile(): its order gives the type and client id the event would have"""
+        with self._lock:
+            if not self._claim(trade):
+                return
+            order = self._orders.get(trade["orderId"])
+            if order is None:
+                order = self.client.get_order(symbol=trade["symbol"], orderId=trade["orderId"])
+                self._orders[trade["orderId"]] = order
+            self._record(trade, order["type"], order["clientOrderId"])
+
+    def _claim(self, fill: dict) -> bool:
+        """True the first time a trade is seen, from either the stream or REST"""
+        key = (fill["symbol"], fill["id"])
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+
+    def _record(self, fill: dict, order_type: str, client_order_id: str):
+        """Log and notify a fill, unless its strategy does (market buys, maker/TWAP children)"""
+        if order_type == "MARKET" or is_journaled(account_name(self.client), client_order_id):
+            return
+        qty, price = Decimal(fill["qty"]), Decimal(fill["price"])
+        action = "dip_ladder" if client_order_id.startswith("ladder-") else "limit_fill"
+        log_trade(
+            action=action,
+            symbol=fill["symbol"],
+            base_amount=qty * price,
+            btc_qty=qty,
+            price=price,
+            fee=Decimal(fill["commission"]),
+            base_currency=split_symbol(fill["symbol"])[1],
+            order_id=fill["orderId"],
+            trade_id=fill["id"],
+        )
+        notify_trade(fill)
+
+    def _handle_close(self, manager):
+        if self._ws is None or manager is not self._ws.socket_manager:
+            return  # a socket we already replaced
+        if not self._stopping.is_set():
+            print("User data stream disconnected")
+            self._disconnected.set()
+
+    def _handle_error(self, manager, error):
+        print(f"User data stream error: {error}")
+        self._handle_close(manager)
+
+
+def listen():
+    stream = UserDataStream(get_client())
+
+    def stop(signum, frame):
+        stream.stop()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print("========== USER DATA STREAM ==========")
+    print(f"Environment: {'TESTNET' if USE_TESTNET else 'MAINNET'}")
+    print(f"Trading Pair: {SYMBOL}")
+    print("======================================")
+    stream.run()
+
+
+if __name__ == "__main__":
+    listen()
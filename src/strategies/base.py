@@ -0,0 +1,271 @@
+"""
+Strategy base class and registry.
+
+A strategy only decides how much to buy. Strategy.execute runs the shared
+pipeline around that decision once for every strategy: journal check,
+decide, validate against the symbol's filters, balances, execute
+(EXECUTION_MODE), aggregate the fills, log to the ledger and notify.
+
+    @register
+    class MyStrategy(Strategy):
+        name = "my_strategy"       # registry key, ledger action, [my_strategy] in strategies.toml
+        title = "My Strategy"
+        params = {"amount": Param(float, 20.0, minimum=0)}
+
+        def decide(self, run):
+            return run.settings["amount"]  # or None/0 to skip this run
+
+get_strategy(name) imports src/strategies/<name>.py on first use, so a new
+strategy is one module. Settings come from src/utils/strategy_config.py
+and are read again (if the file changed) on every run.
+"""
+import importlib
+from datetime import datetime, timezone
+from src.utils.account import get_account_state
+from src.utils.accounting import Fills
+from src.utils.client import get_client
+from src.utils.exchange_filters import InvalidOrder, get_filters
+from src.utils.execution import MODES, execute_buy
+from src.utils.logger import log_trade
+from src.utils.metrics import PhaseTimer
+from src.utils.order_journal import OrderIntent, reconcile_pending
+from src.utils.strategy_config import Param, get_config
+from config.settings import (
+    USE_TESTNET, BASE_URL, EXECUTION_MODE,
+    TRADING_PAIR, BASE_CURRENCY, TARGET_CURRENCY
+)
+
+# Settings every strategy has
+COMMON_PARAMS = {
+    "execution_mode": Param(str, EXECUTION_MODE, choices=MODES),
+}
+
+STRATEGIES = {}
+
+
+def register(cls):
+    """Class decorator: add a strategy to the registry and its params to the settings schema"""
+    STRATEGIES[cls.name] = cls()
+    get_config().register(cls.name, {**COMMON_PARAMS, **cls.params}, cls.check)
+    return cls
+
+
+def get_strategy(name: str) -> "Strategy":
+    if name not in STRATEGIES:
+        module = f"src.strategies.{name}"
+        try:
+            importlib.import_module(module)
+        except ModuleNotFoundError as e:
+            if e.name != module:
+                raise
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown strategy '{name}', no registered strategy in src/strategies/{name}.py")
+    return STRATEGIES[name]
+
+
+class Run:
+    """State of one execution, passed to the strategy's hooks"""
+
+    def __init__(self, settings: dict, client, symbol: str, amount, base_currency: str,
+                 target_currency: str, phases: PhaseTimer, inputs: dict):
+        self.settings = settings
+        self.client = client
+        self.symbol = symbol
+        self.amount = amount          # amount passed by the caller, None = from settings
+        self.base_currency = base_currency
+        self.target_currency = target_currency
+        self.phases = phases
+        self.inputs = inputs          # strategy-specific arguments (e.g. ticker)
+        self.price = None             # current price, if the strategy fetched one (validates the order)
+        self.capped = False           # amount was reduced (e.g. budget): too small to order = skip, not fail
+        self.dip_price = None         # ledger columns
+        self.dip_qty = None
+
+
+class Strategy:
+    """Shared purchase pipeline; subclasses implement decide()"""
+
+    name = None
+    title = None
+    params = {}
+
+    @staticmethod
+    def check(settings: dict):
+        """Checks across settings (ValueError), run when the settings are loaded"""
+
+    def banner(self, run: Run) -> list:
+        """Extra lines for the run header"""
+        return []
+
+    def decide(self, run: Run):
+        """Amount to buy this run (quote currency), or None/0 to skip"""
+        raise NotImplementedError
+
+    def order_placed(self, run: Run, order: dict):
+        """Called once the order is executed, before it is logged"""
+
+    def order_skipped(self, run: Run):
+        """Called when the amount decide() returned is not ordered after all"""
+
+    def notification(self, run: Run) -> tuple:
+        """(headline, extra lines, strategy line) of the Telegram summary"""
+        return f"{self.title} Purchase Executed", [], f"Strategy: {self.title}"
+
+    def execute(self, symbol: str = TRADING_PAIR, amount: float = None,
+                base_currency: str = BASE_CURRENCY, target_currency: str = TARGET_CURRENCY, client=None,
+                order_tag: str = None, book=None, **inputs):
+        """
+        Run the strategy once.
+
+        amount: overrides the strategy's configured amount.
+        order_tag: added to the client order id, for more than one buy per slot.
+        book: optional LocalOrderBook of the symbol, used to price the execution
+        and check the expected slippage without REST calls.
+        """
+        phases = PhaseTimer(self.name)
+        client = client or get_client()
+        account = get_account_state(client)
+        run = Run(get_config().get(self.name), client, symbol, amount, base_currency, target_currency,
+                  phases, inputs)
+
+        # Print clear environment indicator
+        print(f"ENVIRONMENT: {'TESTNET (Safe Mode)' if USE_TESTNET else 'MAINNET (Real Money)'}")
+        print(f"API URL: {BASE_URL if USE_TESTNET else 'https://api.binance.com'}")
+        print(f"Trading Pair: {symbol}")
+        print(f"Strategy: {self.title}")
+        print("-" * 50)
+
+        header = f"========== {self.title.upper()} TEST =========="
+        print(header)
+        print("Datetime (UTC):", datetime.now(timezone.utc).isoformat())
+        print(f"Environment: {'TESTNET' if USE_TESTNET else 'MAINNET'}")
+        for line in self.banner(run):
+            print(line)
+        print("=" * len(header))
+
+        # Orders of crashed earlier runs are logged before anything new is sent
+        reconcile_pending(client)
+        intent = OrderIntent(client, self.name, symbol, tag=order_tag)
+        if intent.done:
+            print(f"Order {intent.client_order_id} already executed for this slot, skipping")
+            return
+        phases.lap("journal")
+
+        amount = self.decide(run)
+        if not amount or amount <= 0:
+            print("Nothing to buy this run")
+            phases.done()
+            return
+
+        # Fails locally (InvalidOrder) if the amount breaks the symbol's filters
+        try:
+            quote_qty = get_filters(client, symbol).market_quote_order(amount, price=run.price)
+        except InvalidOrder as e:
+            self.order_skipped(run)
+            if not run.capped:
+                raise
+            print(f"Amount left is below the minimum order ({e}), skipping")
+            phases.done()
+            return
+        phases.lap("filters")
+
+        base_before = account.get_balance(base_currency)
+        btc_before = account.get_balance(target_currency)
+        phases.lap("balances")
+        print(f"{base_currency} available: {base_before}")
+        print(f"{target_currency} available: {btc_before}")
+
+        # Safety check for real money
+        if not USE_TESTNET:
+            if base_before < amount * 2:
+                self.order_skipped(run)
+                raise Exception(f"Insufficient {base_currency} balance. Need at least {amount * 2} for safety")
+
+        print(f"\nExecuting buy: {quote_qty} {base_currency} -> {target_currency}")
+
+        # Execute order (journaled first, a rerun of this slot resumes it instead of buying twice)
+        order = execute_buy(client, intent, quote_qty, mode=run.settings["execution_mode"], book=book)
+        execution = order["execution"]
+        self.order_placed(run, order)
+        phases.lap("order")
+
+        # Process order fills (exact scaled-integer sums, see src/utils/accounting.py)
+        fills = Fills(order.get("fills", []))
+        btc_bought = fills.qty_total()
+        cost_total = fills.quote_total()
+        commission = fills.fee_total()
+        avg_price = fills.vwap()
+
+        for fill in order.get("fills", []):
+            print(f"Fill: {fill['qty']} {target_currency} @ {fill['price']} {base_currency} "
+                  f"(fee: {fill['commission']} {fill['commissionAsset']})")
+
+        print("========== ORDER EXECUTED ==========")
+        print(f"Order ID: {order['orderId']}")
+        print(f"Symbol: {order['symbol']}")
+        print(f"Status: {order['status']}")
+        print(f"{target_currency} Purchased: {btc_bought}")
+        print(f"Total Cost: {cost_total:.2f} {base_currency}")
+        print(f"Average Price: {avg_price:.2f} {base_currency}")
+        print(f"Commission: {commission} {target_currency}")
+        print(f"Slippage: {execution['slippage_bps']:+} bps vs arrival {execution['arrival_price']} ({execution['execution_mode']})")
+        print("===================================")
+
+        # Final balances (applied from the order response, no refetch)
+        account.apply_order(order, target_currency, base_currency)
+        base_after = account.get_balance(base_currency)
+        btc_after = account.get_balance(target_currency)
+
+        print("========== FINAL BALANCES ==========")
+        print(f"{base_currency}: {base_before} -> {base_after} ({base_after - base_before:+.2f})")
+        print(f"{target_currency}: {btc_before} -> {btc_after} ({btc_after - btc_before:+.8f})")
+        print("===================================")
+
+        # Log to ledger
+        log_trade(
+            action=self.name,
+            symbol=symbol,
+            base_amount=cost_total,  # what was executed, not what was asked for
+            btc_qty=btc_bought,
+            price=avg_price,
+            fee=commission,
+            dip_price=run.dip_price,
+            dip_qty=run.dip_qty,
+            base_before=base_before,
+            base_after=base_after,
+            btc_before=btc_before,
+            btc_after=btc_after,
+            base_currency=base_currency,
+            order_id=order['orderId'],
+            execution=execution
+        )
+        intent.complete()
+        print("Trade logged to ledger")
+        phases.lap("ledger")
+
+        # Telegram notification
+        from src.utils.telegram import notify
+
+        headline, lines, strategy_line = self.notification(run)
+        summary = "\n".join([
+            f"{headline} {'(TESTNET)' if USE_TESTNET else '(MAINNET)'}\n",
+            f"Trading Pair: {symbol}",
+            *lines,
+            f"Purchase Amount: {cost_total:.2f} {base_currency}",
+            f"{target_currency} Purchased: {btc_bought}",
+            f"Average Price: {avg_price:.2f} {base_currency}",
+            f"Trading Fee: {commission} {target_currency}\n",
+            f"{base_currency} Balance: {base_before} -> {base_after} ({base_after - base_before:+.2f})",
+            f"{target_currency} Balance: {btc_before} -> {btc_after} ({btc_after - btc_before:+.8f})\n",
+            strategy_line,
+            f"Executed: {datetime.now(timezone.utc).strftime('%d/%m/%Y %H:%M:%S')} UTC",
+        ])
+
+        # Queued: delivery happens in the background and never delays the order path
+        try:
+            queued = notify(summary)
+            print(f"Telegram notification queued: {queued}")
+        except Exception as e:
+            print(f"Telegram error (ignored): {e}")
+        phases.lap("notify")
+        phases.done()
@@ -1,14 +1,16 @@
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-
 from decimal import getcontext, Decimal
-from binance.spot import Spot
 from datetime import datetime, timezone
-from src.utils.logger import log_trade
+from functools import lru_cache
+from src.strategies.base import Strategy, get_strategy, register
+from src.utils.client import account_name, exchange_time
+from src.utils.dip_sizing import CURVES, DipSizer, get_budget
+from src.utils.strategy_config import Param
 from config.settings import (
-    USE_TESTNET, BASE_URL, API_KEY, API_SECRET,
-    TRADING_PAIR, BASE_CURRENCY, BASELINE_AMOUNT, MIN_DIP_PERCENT
+    TRADING_PAIR, BASE_CURRENCY, TARGET_CURRENCY, BASELINE_AMOUNT,
+    MIN_DIP_PERCENT, MAX_DIP_PERCENT, DIP_INCREMENT,
+    DIP_SIGNAL, SIGNAL_INTERVAL, DIP_SIGNAL_THRESHOLDS,
+    DIP_SIZING_CURVE, DIP_MIN_AMOUNT, DIP_MAX_AMOUNT, DIP_CURVE_STEEPNESS,
+    DIP_MONTHLY_BUDGET, DIP_BUDGET_MAX_CARRY
 )
 
 getcontext().prec = 28
@@ -16,155 +18,183 @@ getcontext().prec = 28
 # Trading configuration
 SYMBOL = TRADING_PAIR
 DIP_THRESHOLD = MIN_DIP_PERCENT * 100  # Convert to percentage
-DIP_AMOUNT = BASELINE_AMOUNT
-
-client = Spot(api_key=API_KEY, api_secret=API_SECRET, base_url=BASE_URL)
-
-def get_balance(asset: str) -> Decimal:
-    """Get balance for a specific asset"""
-    acc = client.account()
-    bal = next((b for b in acc["balances"] if b["asset"] == asset), None)
-    return Decimal(bal["free"]) if bal else Decimal("0")
-
-def execute_buy_the_dip():
-    """Execute Buy The Dip strategy"""
-    # Print clear environment indicator
-    print(f"ENVIRONMENT: {'TESTNET (Safe Mode)' if USE_TESTNET else 'MAINNET (Real Money)'}")
-    print(f"API URL: {BASE_URL if USE_TESTNET else 'https://api.binance.com'}")
-    print(f"Trading Pair: {TRADING_PAIR}")
-    print(f"Strategy: Buy The Dip")
-    print("-" * 50)
-    
-    print("========== BUY THE DIP TEST ==========")
-    print("Datetime (UTC):", datetime.now(timezone.utc).isoformat())
-    print(f"Environment: {'TESTNET' if USE_TESTNET else 'MAINNET'}")
-    print(f"Dip threshold: {DIP_THRESHOLD}%")
-    print("=====================================")
-    
-    # Get current price
-    ticker = client.ticker_24hr(symbol=SYMBOL)
-    current_price = Decimal(ticker["lastPrice"])
-    price_change_percent = Decimal(ticker["priceChangePercent"])
-    
-    print(f"Current BTC price: {current_price} {BASE_CURRENCY}")
-    print(f"24h change: {price_change_percent:+.2f}%")
-    
-    base_before = get_balance(BASE_CURRENCY)
-    btc_before = get_balance("BTC")
-    print(f"{BASE_CURRENCY} available: {base_before}")
-    print(f"BTC available: {btc_before}")
-    
-    # Safety check for real money
-    if not USE_TESTNET:
-        if base_before < DIP_AMOUNT * 2:
-            raise Exception(f"Insufficient {BASE_CURRENCY} balance. Need at least {DIP_AMOUNT * 2} for safety")
-    
-    print(f"\nExecuting market buy: {DIP_AMOUNT} {BASE_CURRENCY} -> BTC")
-    
-    # Execute order
-    order = client.new_order(
-        symbol=SYMBOL,
-        side="BUY",
-        type="MARKET",
-        quoteOrderQty=str(DIP_AMOUNT)
-    )
-    
-    # Process order fills
-    btc_bought = Decimal("0")
-    cost_total = Decimal("0")
-    commission = Decimal("0")
-    avg_price = Decimal("0")
-    
-    for fill in order.get("fills", []):
-        qty = Decimal(fill['qty'])
-        price = Decimal(fill['price'])
-        fee = Decimal(fill['commission'])
-        btc_bought += qty
-        cost_total += qty * price
-        commission += fee
-        print(f"Fill: {qty} BTC @ {price} {BASE_CURRENCY} (fee: {fee} {fill['commissionAsset']})")
-    
-    if btc_bought > 0:
-        avg_price = cost_total / btc_bought
-    
-    print("========== ORDER EXECUTED ==========")
-    print(f"Order ID: {order['orderId']}")
-    print(f"Symbol: {order['symbol']}")
-    print(f"Status: {order['status']}")
-    print(f"BTC Purchased: {btc_bought}")
-    print(f"Total Cost: {cost_total:.2f} {BASE_CURRENCY}")
-    print(f"Average Price: {avg_price:.2f} {BASE_CURRENCY}")
-    print(f"Commission: {commission} BTC")
-    print("===================================")
-    
-    # Final balances
-    base_after = get_balance(BASE_CURRENCY)
-    btc_after = get_balance("BTC")
-    
-    print("========== FINAL BALANCES ==========")
-    print(f"{BASE_CURRENCY}: {base_before} -> {base_after} ({base_after - base_before:+.2f})")
-    print(f"BTC: {btc_before} -> {btc_after} ({btc_after - btc_before:+.8f})")
-    print("===================================")
-    
-    # Log to CSV
-    log_trade(
-        action="buy_the_dip",
-        symbol=SYMBOL,
-        base_amount=DIP_AMOUNT,
-        btc_qty=btc_bought,
-        price=avg_price,
-        fee=commission,
-        dip_price=current_price,
-        dip_qty=price_change_percent,
-        base_before=base_before,
-        base_after=base_after,
-        btc_before=btc_before,
-        btc_after=btc_after,
-        base_currency=BASE_CURRENCY
+PERCENT_SIGNALS = ("drawdown", "sma", "ema")  # signals whose value is a % below a reference
+
+
+@lru_cache(maxsize=None)
+def get_sizer(curve: str, min_dip: float, max_dip: float, min_amount: float, max_amount: float,
+              increment: float, steepness: float) -> DipSizer:
+    """Lookup table of a sizing curve, built once per process and settings"""
+    return DipSizer(curve=curve, min_dip=min_dip, max_dip=max_dip, min_amount=min_amount,
+                    max_amount=max_amount, increment=increment, steepness=steepness)
+
+
+def dip_signal(client, symbol: str, price_change_percent: Decimal, signal: str = DIP_SIGNAL,
+               threshold: float = None):
+    """
+    (signal value, threshold, is dip, depth) for the configured dip signal.
+    threshold defaults to -DIP_THRESHOLD for change_24h and DIP_SIGNAL_THRESHOLDS otherwise.
+    depth is the dip in % used for sizing: the signal itself for % signals,
+    the drawdown from the window high for the others.
+    """
+    if signal == "change_24h":
+        threshold = -DIP_THRESHOLD if threshold is None else threshold
+        return (price_change_percent, threshold, price_change_percent <= threshold,
+                -price_change_percent)
+    if signal not in DIP_SIGNAL_THRESHOLDS:
+        raise ValueError(f"Unknown DIP_SIGNAL '{signal}', use change_24h or one of {', '.join(DIP_SIGNAL_THRESHOLDS)}")
+
+    # Imported here: only needed (with numpy) when an indicator signal is configured
+    from src.utils.indicators import SignalEngine
+
+    engine = SignalEngine.load(symbol, SIGNAL_INTERVAL)
+    engine.sync(client)
+    engine.save()
+    values = engine.values()
+    value = values[signal]
+    threshold = DIP_SIGNAL_THRESHOLDS[signal] if threshold is None else threshold
+    if value is None:
+        print(f"Signal {signal} still warming up ({engine.warmup} {SIGNAL_INTERVAL} candles needed)")
+        return None, threshold, False, 0
+    depth = -(value if signal in PERCENT_SIGNALS else values["drawdown"] or 0)
+    return Decimal(str(round(value, 4))), threshold, value <= threshold, Decimal(str(round(depth, 4)))
+
+
+@register
+class BuyTheDip(Strategy):
+    """Baseline every run, plus an amount sized by the depth of the dip"""
+
+    name = "buy_the_dip"
+    title = "Buy The Dip"
+    params = {
+        "baseline": Param(float, BASELINE_AMOUNT, minimum=0),
+        "min_dip_percent": Param(float, MIN_DIP_PERCENT, minimum=0.0001, maximum=1),
+        "max_dip_percent": Param(float, MAX_DIP_PERCENT, minimum=0.0001, maximum=1),
+        "dip_increment": Param(float, DIP_INCREMENT, minimum=0.0001, maximum=1),
+        "signal": Param(str, DIP_SIGNAL, choices=("change_24h", *DIP_SIGNAL_THRESHOLDS)),
+        "signal_threshold": Param(float, None, optional=True),  # None = DIP_SIGNAL_THRESHOLDS / min_dip_percent
+        "curve": Param(str, DIP_SIZING_CURVE, choices=CURVES),
+        "min_amount": Param(float, DIP_MIN_AMOUNT, minimum=0),
+        "max_amount": Param(float, DIP_MAX_AMOUNT, minimum=0),
+        "steepness": Param(float, DIP_CURVE_STEEPNESS),
+        "monthly_budget": Param(float, DIP_MONTHLY_BUDGET, minimum=0, optional=True),
+        "max_carry": Param(int, DIP_BUDGET_MAX_CARRY, minimum=0),
+    }
+
+    @staticmethod
+    def check(settings: dict):
+        if settings["min_dip_percent"] > settings["max_dip_percent"]:
+            raise ValueError("min_dip_percent must be <= max_dip_percent")
+        if settings["min_amount"] > settings["max_amount"]:
+            raise ValueError("min_amount must be <= max_amount")
+
+    def banner(self, run):
+        return [f"Dip threshold: {run.settings['min_dip_percent'] * 100}%"]
+
+    def decide(self, run):
+        settings = run.settings
+        min_dip = settings["min_dip_percent"] * 100
+        signal = settings["signal"]
+        threshold = settings["signal_threshold"]
+        if signal == "change_24h" and threshold is None:
+            threshold = -min_dip
+
+        # Get current price
+        ticker = run.inputs.get("ticker")
+        if ticker is None:
+            ticker = run.client.ticker_24hr(symbol=run.symbol)
+        run.price = Decimal(ticker["lastPrice"])
+        run.change = Decimal(ticker["priceChangePercent"])
+        run.phases.lap("ticker")
+
+        print(f"Current {run.target_currency} price: {run.price} {run.base_currency}")
+        print(f"24h change: {run.change:+.2f}%")
+
+        run.signal_value, run.threshold, run.is_dip, depth = dip_signal(
+            run.client, run.symbol, run.change, signal, threshold)
+        if signal != "change_24h":
+            print(f"Dip signal {signal}: {run.signal_value} (dip at <= {run.threshold})")
+        run.phases.lap("signal")
+
+        # Baseline plus the sized dip amount, capped by what is left of this month's budget
+        sizer = get_sizer(settings["curve"], min_dip, settings["max_dip_percent"] * 100,
+                          settings["min_amount"], settings["max_amount"],
+                          settings["dip_increment"] * 100, settings["steepness"])
+        baseline = run.amount if run.amount is not None else settings["baseline"]
+        level = run.inputs.get("dip_level")
+        if level is None:
+            dip_amount = sizer.amount(depth) if run.is_dip else 0.0
+        else:
+            # A dip watcher level: only the curve amount between the level bought before
+            # and this one, so a fall through several levels adds up to one curve amount
+            baseline = 0
+            bought = run.inputs.get("bought_level") or 0
+            dip_amount = max(sizer.amount(level) - sizer.amount(bought), 0.0) if run.is_dip else 0.0
+        sized = round(float(baseline) + dip_amount, 8)
+        run.month = datetime.fromtimestamp(exchange_time(run.client), timezone.utc).strftime("%Y-%m")
+        run.budget = get_budget(settings["monthly_budget"], settings["max_carry"])
+        run.budget_key = f"{account_name(run.client)}:{run.symbol}"
+        amount = run.reserved = round(run.budget.reserve(run.budget_key, run.month, sized), 8)
+        run.capped = amount < sized
+        print(f"Amount: {amount} {run.base_currency} (baseline + {dip_amount:.2f} for a {depth:.2f}% dip"
+              f"{', capped by the monthly budget' if run.capped else ''})")
+
+        if run.is_dip:
+            print(f"DIP DETECTED! Price down {abs(run.change):.2f}% (threshold: {min_dip}%)"
+                  if signal == "change_24h" else f"DIP DETECTED: {self._signal_text(run)}!")
+        else:
+            print(f"No dip detected. Current change: {run.change:+.2f}% (threshold: -{min_dip}%)"
+                  if signal == "change_24h" else f"No dip detected. {self._signal_text(run)}")
+        run.dip_price = run.price
+        run.dip_qty = run.change
+        return amount
+
+    def order_placed(self, run, order):
+        run.budget.settle(run.budget_key, run.month, run.reserved, float(order["cummulativeQuoteQty"]))
+
+    def order_skipped(self, run):
+        run.budget.settle(run.budget_key, run.month, run.reserved, 0.0)
+
+    @staticmethod
+    def _signal_text(run) -> str:
+        return (f"{run.settings['signal']} {run.signal_value} (threshold: {run.threshold}), "
+                f"24h {run.change:+.2f}%")
+
+    def notification(self, run):
+        min_dip = run.settings["min_dip_percent"] * 100
+        if run.is_dip:
+            line = (f"DIP DETECTED: {run.change:+.2f}% (threshold: -{min_dip}%)"
+                    if run.settings["signal"] == "change_24h" else f"DIP DETECTED: {self._signal_text(run)}")
+            return "Buy The Dip Purchase Executed", [line], "Strategy: Buy the dip - great timing!"
+        line = (f"Market Condition: {run.change:+.2f}% (no dip, threshold: -{min_dip}%)"
+                if run.settings["signal"] == "change_24h" else f"Market Condition: {self._signal_text(run)}, no dip")
+        return "Buy The Dip Baseline Purchase", [line], "Strategy: Regular baseline purchase"
+
+
+def execute_buy_the_dip(
+        ticker: dict = None, symbol: str = SYMBOL, amount: float = None,
+        base_currency: str = BASE_CURRENCY, target_currency: str = TARGET_CURRENCY, client=None,
+        order_tag: str = None, book=None, dip_level: Decimal = None, bought_level: Decimal = None):
+    """Execute Buy The Dip strategy
+
+    amount: baseline bought every run (default buy_the_dip.baseline in the
+    strategy settings); a dip adds the sizing curve's amount for its depth,
+    all within the monthly budget. Nothing is bought when the total is zero.
+    ticker: optional ticker_24hr-shaped dict (e.g. from the price stream),
+    used instead of fetching the 24h ticker over REST.
+    order_tag: added to the client order id, for more than one buy per slot
+    (e.g. one per dip level).
+    book: optional LocalOrderBook of the symbol, used to price the execution
+    and check the expected slippage without REST calls.
+    dip_level: set by the dip watcher, the level (in %) just crossed. Only
+    the curve amount between bought_level (the level bought before in the
+    same dip, if any) and dip_level is bought, without the baseline.
+    """
+    get_strategy("buy_the_dip").execute(
+        symbol=symbol, amount=amount, base_currency=base_currency, target_currency=target_currency,
+        client=client, order_tag=order_tag, book=book, ticker=ticker,
+        dip_level=dip_level, bought_level=bought_level,
     )
-    print("Trade logged to history.csv")
-    
-    # Telegram notification
-    from src.utils.telegram import send_telegram
-    
-    # Check if it's a dip for notification message
-    if price_change_percent <= -DIP_THRESHOLD:
-        summary = (
-            f"Buy The Dip Purchase Executed {'(TESTNET)' if USE_TESTNET else '(MAINNET)'}\n\n"
-            f"Trading Pair: {SYMBOL}\n"
-            f"DIP DETECTED: {price_change_percent:+.2f}% (threshold: -{DIP_THRESHOLD}%)\n"
-            f"Purchase Amount: {DIP_AMOUNT} {BASE_CURRENCY}\n"
-            f"Bitcoin Purchased: {btc_bought}\n"
-            f"Purchase Price: {avg_price:.2f} {BASE_CURRENCY}\n"
-            f"Trading Fee: {commission} BTC\n\n"
-            f"{BASE_CURRENCY} Balance: {base_before} -> {base_after} ({base_after - base_before:+.2f})\n"
-            f"BTC Balance: {btc_before} -> {btc_after} ({btc_after - btc_before:+.8f})\n\n"
-            f"Strategy: Buy the dip - great timing!\n"
-            f"Executed: {datetime.now(timezone.utc).strftime('%d/%m/%Y %H:%M:%S')} UTC"
-        )
-        print(f"DIP DETECTED! Price down {abs(price_change_percent):.2f}% (threshold: {DIP_THRESHOLD}%)")
-    else:
-        summary = (
-            f"Buy The Dip Baseline Purchase {'(TESTNET)' if USE_TESTNET else '(MAINNET)'}\n\n"
-            f"Trading Pair: {SYMBOL}\n"
-            f"Market Condition: {price_change_percent:+.2f}% (no dip, threshold: -{DIP_THRESHOLD}%)\n"
-            f"Purchase Amount: {DIP_AMOUNT} {BASE_CURRENCY}\n"
-            f"Bitcoin Purchased: {btc_bought}\n"
-            f"Purchase Price: {avg_price:.2f} {BASE_CURRENCY}\n"
-            f"Trading Fee: {commission} BTC\n\n"
-            f"{BASE_CURRENCY} Balance: {base_before} -> {base_after} ({base_after - base_before:+.2f})\n"
-            f"BTC Balance: {btc_before} -> {btc_after} ({btc_after - btc_before:+.8f})\n\n"
-            f"Strategy: Regular baseline purchase\n"
-            f"Executed: {datetime.now(timezone.utc).strftime('%d/%m/%Y %H:%M:%S')} UTC"
-        )
-        print(f"No dip detected. Current change: {price_change_percent:+.2f}% (threshold: -{DIP_THRESHOLD}%)")
-        print("Baseline purchase completed.")
-    
-    try:
-        sent = send_telegram(summary, parse_mode=None)
-        print(f"Telegram notification sent: {sent}")
-    except Exception as e:
-        print(f"Telegram error (ignored): {e}")
 
 if __name__ == "__main__":
     execute_buy_the_dip()
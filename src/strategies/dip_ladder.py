@@ -0,0 +1,173 @@
+from decimal import getcontext, Decimal
+from datetime import datetime, timezone
+from binance.error import ClientError
+from src.utils.account import get_account_state
+from src.utils.client import get_client
+from src.utils.exchange_filters import get_filters, to_str, InvalidOrder
+from src.utils.strategy_config import get_config
+from src.strategies.base import get_strategy
+from config.settings import (
+    USE_TESTNET, BASE_URL,
+    TRADING_PAIR, BASE_CURRENCY, TARGET_CURRENCY,
+    LADDER_LEVEL_AMOUNT, LADDER_REPRICE_TOLERANCE
+)
+
+getcontext().prec = 28
+
+# Trading configuration
+SYMBOL = TRADING_PAIR
+ORDER_PREFIX = "ladder"
+
+
+def level_client_id(bps: int, price: Decimal, filters) -> str:
+    """Client order id encoding the ladder level, e.g. ladder-200-6123456"""
+    return f"{ORDER_PREFIX}-{bps}-{filters.price_ticks(price)}"
+
+
+def parse_level(client_order_id: str):
+    """Ladder level in basis points from a client order id, or None for other orders"""
+    parts = client_order_id.split("-")
+    if len(parts) != 3 or parts[0] != ORDER_PREFIX:
+        return None
+    return int(parts[1])
+
+
+def compute_ladder(reference_price: Decimal, current_price: Decimal, filters, settings: dict) -> dict:
+    """
+    Desired ladder as {level_bps: (price, qty)} from the min to the max dip of the buy_the_dip
+    settings in dip_increment steps, rounded to the symbol's tick and lot step. Levels the
+    filters would reject are left out.
+    """
+    ladder = {}
+    amount = Decimal(str(LADDER_LEVEL_AMOUNT))
+    bps = round(settings["min_dip_percent"] * 10000)
+    step = round(settings["dip_increment"] * 10000)
+    while bps <= round(settings["max_dip_percent"] * 10000):
+        try:
+            price, qty = filters.limit_order(reference_price * (1 - Decimal(bps) / 10000), amount)
+        except InvalidOrder as e:
+            print(f"Skipping -{bps / 100:.2f}%: {e}")
+            price = None
+        # A level at or above the market would fill immediately as a taker
+        if price is not None and price < current_price:
+            ladder[bps] = (price, qty)
+        bps += step
+    return ladder
+
+
+def diff_ladder(desired: dict, open_orders: list):
+    """Split the work into (keep, replace, place, cancel) against the resting orders"""
+    tolerance = Decimal(str(LADDER_REPRICE_TOLERANCE))
+    existing = {}
+    cancel = []
+
+    for order in open_orders:
+        bps = parse_level(order.get("clientOrderId", ""))
+        if bps is None:
+            continue  # not ours, leave it alone
+        if bps not in desired or bps in existing:
+            cancel.append(order)
+        else:
+            existing[bps] = order
+
+    keep, replace, place = [], [], []
+    for bps, (price, qty) in desired.items():
+        order = existing.get(bps)
+        if order is None:
+            place.append((bps, price, qty))
+            continue
+        drift = abs(Decimal(order["price"]) - price) / price
+        if drift <= tolerance or Decimal(order["executedQty"]) > 0:
+            # Close enough, or already partially filled: don't lose queue position
+            keep.append(order)
+        else:
+            replace.append((bps, price, qty, order))
+    return keep, replace, place, cancel
+
+
+def execute_dip_ladder(client=None):
+    """Sync the resting dip ladder with the desired levels, sending only the delta"""
+    client = client or get_client()
+    account = get_account_state(client)
+    get_strategy("buy_the_dip")  # registers the settings the levels come from
+    settings = get_config().get("buy_the_dip")
+
+    # Print clear environment indicator
+    print(f"ENVIRONMENT: {'TESTNET (Safe Mode)' if USE_TESTNET else 'MAINNET (Real Money)'}")
+    print(f"API URL: {BASE_URL if USE_TESTNET else 'https://api.binance.com'}")
+    print(f"Trading Pair: {TRADING_PAIR}")
+    print("Strategy: Dip Ladder")
+    print("-" * 50)
+
+    print("========== DIP LADDER ==========")
+    print("Datetime (UTC):", datetime.now(timezone.utc).isoformat())
+    print(f"Levels: -{settings['min_dip_percent'] * 100:.0f}% to -{settings['max_dip_percent'] * 100:.0f}% "
+          f"every {settings['dip_increment'] * 100:.0f}%, {LADDER_LEVEL_AMOUNT} {BASE_CURRENCY} each")
+    print("================================")
+
+    # The 24h open is the same reference priceChangePercent uses
+    ticker = client.ticker_24hr(symbol=SYMBOL)
+    reference_price = Decimal(ticker["openPrice"])
+    current_price = Decimal(ticker["lastPrice"])
+    print(f"Reference (24h open): {reference_price} {BASE_CURRENCY}")
+    print(f"Current price: {current_price} {BASE_CURRENCY}")
+
+    filters = get_filters(client, SYMBOL)
+    desired = compute_ladder(reference_price, current_price, filters, settings)
+    open_orders = client.get_open_orders(symbol=SYMBOL)
+    keep, replace, place, cancel = diff_ladder(desired, open_orders)
+
+    print(f"Keep: {len(keep)} | Replace: {len(replace)} | Place: {len(place)} | Cancel: {len(cancel)}")
+
+    for order in cancel:
+        print(f"Cancelling stale level {order['clientOrderId']} @ {order['price']}")
+        client.cancel_order(symbol=SYMBOL, orderId=order["orderId"])
+
+    # Resting ladder orders already hold their funds, only new levels need balance
+    available = account.get_balance(BASE_CURRENCY)
+
+    for bps, price, qty, order in replace:
+        print(f"Repricing -{bps / 100:.2f}%: {order['price']} -> {price} ({qty} {TARGET_CURRENCY})")
+        # One cancel-replace request instead of a cancel plus a new order
+        try:
+            client.cancel_and_replace(
+                symbol=SYMBOL,
+                side="BUY",
+                type="LIMIT",
+                cancelReplaceMode="STOP_ON_FAILURE",
+                cancelOrderId=order["orderId"],
+                timeInForce="GTC",
+                quantity=to_str(qty),
+                price=to_str(price),
+                newClientOrderId=level_client_id(bps, price, filters),
+            )
+        except ClientError as e:
+            # E.g. the order filled in the meantime: the next sync sees the new state
+            print(f"Repricing -{bps / 100:.2f}% failed, leaving it for the next sync: {e.error_message}")
+
+    for bps, price, qty in sorted(place):
+        cost = price * qty
+        if cost > available:
+            print(f"Insufficient {BASE_CURRENCY} for -{bps / 100:.2f}% and deeper levels ({available} left)")
+            break
+        print(f"Placing -{bps / 100:.2f}%: {qty} {TARGET_CURRENCY} @ {price} {BASE_CURRENCY}")
+        client.new_order(
+            symbol=SYMBOL,
+            side="BUY",
+            type="LIMIT",
+            timeInForce="GTC",
+            quantity=to_str(qty),
+            price=to_str(price),
+            newClientOrderId=level_client_id(bps, price, filters),
+        )
+        available -= cost
+
+    if cancel or replace or place:
+        # Resting orders moved funds between free and locked
+        account.invalidate()
+
+    print("========== LADDER SYNCED ==========")
+
+
+if __name__ == "__main__":
+    execute_dip_ladder()
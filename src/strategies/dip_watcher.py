@@ -0,0 +1,115 @@
+"""
+Real-time buy-the-dip trigger.
+
+Subscribes to the price stream instead of polling ticker_24hr and runs
+execute_buy_the_dip as soon as the 24h change crosses a new dip level between
+min_dip_percent and max_dip_percent of the buy_the_dip settings (in
+dip_increment steps, edits to strategies.toml apply on the next update). Each
+level fires once; the levels re-arm when the price recovers above the minimum dip.
+A level buys only what the sizing curve adds over the level bought before it
+(no baseline), so a fall through several levels adds up to the curve amount
+of the deepest one.
+A local order book of the symbol is kept alongside, so each buy is priced
+and slippage-checked without extra REST depth calls.
+"""
+import queue
+import signal
+from decimal import Decimal
+from src.utils.client import get_client
+from src.utils.order_book import LocalOrderBook
+from src.utils.price_stream import PriceFeed
+from src.strategies.buy_the_dip import execute_buy_the_dip
+from src.utils.strategy_config import get_config
+from config.settings import TRADING_PAIR
+
+SYMBOL = TRADING_PAIR
+
+
+def dip_levels() -> list:
+    """Dip levels in percent from the current buy_the_dip settings, e.g. [2, 3, ..., 15]"""
+    settings = get_config().get("buy_the_dip")
+    levels = []
+    level = Decimal(str(settings["min_dip_percent"])) * 100
+    step = Decimal(str(settings["dip_increment"])) * 100
+    while level <= Decimal(str(settings["max_dip_percent"])) * 100:
+        levels.append(level)
+        level += step
+    return levels
+
+
+class DipTrigger:
+    """Edge-triggered detector: each dip level fires once until price recovers"""
+
+    def __init__(self, levels: list):
+        self.levels = levels
+        self.deepest_fired = None
+
+    def check(self, change_percent: Decimal):
+        """Return the newly crossed level, or None"""
+        dip = -change_percent
+        if dip < self.levels[0]:
+            self.deepest_fired = None  # recovered, re-arm every level
+            return None
+        crossed = max(level for level in self.levels if level <= dip)
+        if self.deepest_fired is None or crossed > self.deepest_fired:
+            self.deepest_fired = crossed
+            return crossed
+        return None
+
+
+def watch():
+    levels = dip_levels()
+    trigger = DipTrigger(levels)
+    signals = queue.Queue()
+
+    def on_update(feed: PriceFeed):
+        # Runs on the websocket thread: only detect, execution happens on the main thread
+        trigger.levels = dip_levels()
+        rearmed = trigger.deepest_fired is None
+        level = trigger.check(feed.price_change_percent)
+        if level is not None:
+            signals.put((level, rearmed, feed.snapshot()))
+
+    feed = PriceFeed(SYMBOL, get_client(), on_update=on_update)
+    book = LocalOrderBook(SYMBOL, get_client())
+
+    def stop(signum, frame):
+        signals.put(None)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print("========== DIP WATCHER ==========")
+    print(f"Trading Pair: {SYMBOL}")
+    print(f"Dip levels: -{levels[0]}% .. -{levels[-1]}%")
+    print("=================================")
+    book.start()
+    feed.start()
+
+    bought = None  # deepest level bought in the current dip
+    try:
+        while True:
+            item = signals.get()
+            if item is None:
+                break
+            level, rearmed, ticker = item
+            if rearmed:
+                bought = None
+            print(f"Dip level -{level}% crossed (24h change {ticker['priceChangePercent']}%)")
+            spread = book.spread()
+            if spread is not None:
+                print(f"Spread: {spread[0]} ({spread[1]:.2f} bps)")
+            try:
+                # Each level only tops up to its curve amount, the levels above were bought already
+                execute_buy_the_dip(ticker=ticker, order_tag=f"L{level.normalize():f}", book=book,
+                                    dip_level=level, bought_level=bought)
+                bought = level
+            except Exception as e:
+                print(f"Buy the dip failed: {e}")
+    finally:
+        feed.stop()
+        book.stop()
+
+
+if __name__ == "__main__":
+    watch()
@@ -0,0 +1,66 @@
+"""
+Portfolio runner: execute every (account, symbol, strategy, amount) allocation
+in PORTFOLIO concurrently.
+
+Allocations run on a thread pool (PORTFOLIO_MAX_WORKERS), each account uses
+one pooled client shared by all of its allocations, so a full round takes
+about as long as the slowest symbol instead of the sum of all of them.
+Any strategy in the registry (src/strategies/base.py) can be allocated.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from src.utils.client import get_client
+from src.utils.exchange_filters import split_symbol
+from src.strategies.base import get_strategy
+from config.settings import PORTFOLIO, PORTFOLIO_MAX_WORKERS
+
+
+def run_allocation(account: str, symbol: str, strategy: str, amount: float):
+    """Run one allocation; returns (label, error or None, seconds)"""
+    label = f"{account}/{symbol}/{strategy}"
+    started = time.perf_counter()
+    try:
+        target, base = split_symbol(symbol)
+        get_strategy(strategy).execute(
+            symbol=symbol, amount=amount, base_currency=base, target_currency=target,
+            client=get_client(account),
+        )
+        return label, None, time.perf_counter() - started
+    except Exception as e:
+        return label, e, time.perf_counter() - started
+
+
+def execute_portfolio(allocations: list = None):
+    """Execute all allocations concurrently and print a summary"""
+    allocations = PORTFOLIO if allocations is None else allocations
+    for account, symbol, strategy, _ in allocations:
+        try:
+            get_strategy(strategy)
+        except ValueError as e:
+            raise ValueError(f"{e} for {account}/{symbol}") from None
+
+    print("========== PORTFOLIO ROUND ==========")
+    print("Datetime (UTC):", datetime.now(timezone.utc).isoformat())
+    print(f"Allocations: {len(allocations)} | Workers: {PORTFOLIO_MAX_WORKERS}")
+    print("=====================================")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=PORTFOLIO_MAX_WORKERS) as pool:
+        results = list(pool.map(lambda a: run_allocation(*a), allocations))
+    elapsed = time.perf_counter() - started
+
+    print("========== PORTFOLIO SUMMARY ==========")
+    for label, error, seconds in results:
+        status = "OK" if error is None else f"FAILED: {error}"
+        print(f"{label:<32} {seconds:6.2f}s  {status}")
+    print(f"Round completed in {elapsed:.2f}s")
+    print("=======================================")
+
+    failed = [label for label, error, _ in results if error is not None]
+    if failed:
+        raise Exception(f"{len(failed)} allocations failed: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    execute_portfolio()
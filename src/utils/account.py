@@ -0,0 +1,89 @@
+"""
+Shared account snapshot for the strategies and tools.
+
+A single client.account() call (request weight 20) is indexed by asset and
+kept in memory. Order responses are applied locally, so a run only refetches
+when the snapshot is older than ACCOUNT_CACHE_TTL or has been invalidated.
+"""
+import threading
+import time
+from decimal import Decimal
+
+from src.utils.accounting import Fills
+from config.settings import ACCOUNT_CACHE_TTL
+
+
+class AccountState:
+    """Free balances of one account, keyed by asset"""
+
+    def __init__(self, client, ttl=ACCOUNT_CACHE_TTL):
+        self.client = client
+        self.ttl = ttl
+        self._balances = {}
+        self._fetched_at = None
+        # Allocations on the same account may run in parallel threads
+        self._lock = threading.RLock()
+
+    def refresh(self):
+        """Fetch the account once and index every balance by asset"""
+        with self._lock:
+            acc = self.client.account()
+            self._balances = {b["asset"]: Decimal(b["free"]) for b in acc["balances"]}
+            self._fetched_at = time.monotonic()
+
+    def invalidate(self):
+        """Force the next read to refetch the account"""
+        self._fetched_at = None
+
+    def is_stale(self) -> bool:
+        if self._fetched_at is None:
+            return True
+        return self.ttl is not None and time.monotonic() - self._fetched_at > self.ttl
+
+    def get_balance(self, asset: str) -> Decimal:
+        """Get free balance for a specific asset"""
+        with self._lock:
+            if self.is_stale():
+                self.refresh()
+            return self._balances.get(asset, Decimal("0"))
+
+    def update_balances(self, balances: dict):
+        """Overwrite free balances pushed by the user data stream, {asset: free}"""
+        with self._lock:
+            if self._fetched_at is None:
+                # A partial push can't stand in for a full snapshot
+                return
+            for asset, free in balances.items():
+                self._balances[asset] = Decimal(free)
+            self._fetched_at = time.monotonic()
+
+    def apply_order(self, order: dict, base_asset: str, quote_asset: str):
+        """Update balances from an order response instead of refetching"""
+        with self._lock:
+            if self._fetched_at is None:
+                # Nothing cached yet, the next read fetches fresh balances anyway
+                return
+
+            executed = Decimal(order.get("executedQty", "0"))
+            quote_qty = Decimal(order.get("cummulativeQuoteQty", "0"))
+            if order.get("side") == "SELL":
+                executed, quote_qty = -executed, -quote_qty
+
+            self._balances[base_asset] = self._balances.get(base_asset, Decimal("0")) + executed
+            self._balances[quote_asset] = self._balances.get(quote_asset, Decimal("0")) - quote_qty
+
+            for asset, fee in Fills(order.get("fills", [])).fees().items():
+                self._balances[asset] = self._balances.get(asset, Decimal("0")) - fee
+
+
+_states = {}
+_states_lock = threading.Lock()
+
+
+def get_account_state(client) -> AccountState:
+    """Return the shared AccountState for a client, creating it on first use"""
+    with _states_lock:
+        state = _states.get(client)
+        if state is None:
+            state = _states[client] = AccountState(client)
+        return state
@@ -0,0 +1,321 @@
+"""
+Exact trade accounting on scaled integers.
+
+Binance amounts are decimal strings with at most 8 decimals, so at a fixed
+scale (1 BTC = 10**8 units, or fewer digits from the symbol's step and tick
+size) every quantity, price and fee is an integer and sums and products stay
+exact without Decimal:
+
+    fills = Fills(order["fills"])      # or Fills.for_symbol(trades, filters) for a long history
+    fills.qty_total()      # Decimal("0.00150000"), exact
+    fills.vwap()           # quote total / qty total
+    fills.fees()           # {"BTC": Decimal("0.00000150")}
+
+Long columns are parsed in bulk into NumPy int64 arrays (the joined text
+as integers when every value has the same decimals, as Binance sends them,
+else digit by digit from its bytes; no float rounding anywhere), and sums
+and dot products run in int64 (split in 21-bit limbs when a result could
+overflow it). Values the vectorized path can't take (exponents, too many
+digits) go through exact Python ints instead, and a column with more
+decimals than its scale is read at the scale it needs, so results never
+depend on size, only speed does. Short columns stay plain Python ints
+without loading NumPy, and Fills of a single order skip the scaling
+altogether and add up Decimals.
+"""
+from decimal import Decimal
+from functools import lru_cache
+
+SCALE = 8                  # Binance amounts have at most 8 decimals
+MAX_DIGITS = 17            # digits a parsed value may span at its scale (stays below 10**18 in int64)
+INT64_MAX = 2 ** 63 - 1
+VECTOR_MIN = 64            # shorter columns stay Python ints (NumPy's per-call overhead dominates)
+LIMB_BITS = 21             # int64 split in three limbs: limb products and their sums stay in int64
+CHUNK = 2 ** 20            # rows summed at once, so 2**42 products times CHUNK stays below 2**63
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    """
+    NumPy with the parser's lookup tables (powers of ten, bytes of a plain
+    number), imported on the first long column: single orders stay pure
+    Python and don't pay for loading it.
+    """
+    import numpy as np
+
+    pow10 = np.array([10 ** i for i in range(MAX_DIGITS + 1)], dtype="int64")
+    plain_bytes = np.zeros(256, dtype=bool)
+    plain_bytes[[*range(48, 58), 44, 46]] = True  # digits, "," and "."
+    return np, pow10, plain_bytes
+
+
+def decimals(step) -> int:
+    """Decimals of a step or tick size: Decimal("0.00001000") -> 5"""
+    exponent = Decimal(str(step)).normalize().as_tuple().exponent
+    return max(-exponent, 0)
+
+
+def parse_units(text, scale: int = SCALE) -> int:
+    """Exact integer units of one decimal string"""
+    if text.__class__ is not str or not text:
+        text = "0" if text is None or text == "" else str(text)
+    text = text.strip()
+    point = text.find(".")
+    places = len(text) - point - 1 if point >= 0 else 0
+    if places > scale and point >= 0 and not text[point + 1 + scale:].strip("0"):
+        text, places = text[:point + 1 + scale], scale  # "60000.01000000" at a 0.01 tick
+    if places <= scale and "_" not in text and text.count(".") < 2:
+        try:
+            return int(text.replace(".", "")) * 10 ** (scale - places)
+        except ValueError:
+            pass
+    # Exponents, more decimals than the scale, other spellings: through Decimal
+    units = Decimal(text).scaleb(scale)
+    if units != units.to_integral_value():
+        raise ValueError(f"{text} has more than {scale} decimals")
+    return int(units)
+
+
+def _parse_uniform(values: list, scale: int):
+    """
+    Common case, as Binance sends them: unsigned values with the same number
+    of decimals ("0.00100000"). The joined text without its dots is parsed
+    as integers by NumPy in C. Returns None for anything else.
+    """
+    first = values[0]
+    places = len(first) - first.find(".") - 1 if "." in first else 0
+    joined = ",".join(values)
+    if joined.count(".") != (len(values) if places else 0):
+        return None
+    np, _, plain_bytes = _numpy()
+    data = np.frombuffer(joined.encode(), dtype=np.uint8)
+    if not plain_bytes[data].all():
+        return None
+    ends = np.append(np.flatnonzero(data == 44), len(data))
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    if (ends - starts).max() > MAX_DIGITS + 1:
+        return None
+    if places and not (ends - np.flatnonzero(data == 46) - 1 == places).all():
+        return None
+    units = np.fromstring(joined.replace(".", ""), dtype=np.int64, sep=",")
+    if len(units) != len(values):
+        return None
+    if places > scale:
+        extra = 10 ** (places - scale)
+        if (units % extra).any():
+            return None
+        return units // extra
+    if int(units.max()) * 10 ** (scale - places) >= INT64_MAX:
+        return None
+    return units * 10 ** (scale - places)
+
+
+def _parse_joined(values: list, scale: int):
+    """
+    Vectorized exact parse of the strings joined into one byte buffer: each
+    digit is weighted by its power of ten and summed per value. Returns
+    (int64 units, indexes of the values it can't take).
+    """
+    np, pow10, _ = _numpy()
+    data = np.frombuffer((",".join(values) + ",").encode(), dtype=np.uint8)
+    is_sep = data == 44
+    ends = np.flatnonzero(is_sep)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    owner = np.cumsum(is_sep) - is_sep  # value index of every byte
+
+    # Dot position of each value (its end when it has none)
+    dots = np.flatnonzero(data == 46)
+    dot = ends.copy()
+    dot[owner[dots]] = dots
+    dot_count = np.bincount(owner[dots], minlength=len(ends))
+
+    # Power of ten of every byte: 10**(dot - pos - 1) left of the dot, 10**(dot - pos) right of it
+    position = np.arange(len(data))
+    value_dot = dot[owner]
+    power = value_dot - position - (position < value_dot) + scale
+    is_digit = (data >= 48) & (data <= 57)
+
+    bad = (dot_count > 1) | (dot - starts + scale > MAX_DIGITS) | (starts == ends)
+    bad[owner[~(is_digit | is_sep | (data == 46))]] = True
+    bad[owner[is_digit & (data > 48) & (power < 0)]] = True  # more decimals than the scale
+
+    contributions = np.where(is_digit & (power >= 0),
+                             (data.astype("int64") - 48) * pow10[np.clip(power, 0, MAX_DIGITS)], 0)
+    return np.add.reduceat(contributions, starts), np.flatnonzero(bad)
+
+
+def to_units(values, scale: int = SCALE):
+    """
+    Decimal strings as exact units at scale. Short columns are a list of
+    Python ints, longer ones an int64 array (an object array of Python ints
+    if a value doesn't fit in int64).
+    """
+    if len(values) < VECTOR_MIN:
+        return [parse_units(v, scale) for v in values]
+    try:
+        units = _parse_uniform(values, scale)
+    except TypeError:  # not all strings (floats, None): joined as their text
+        values = ["0" if v is None else str(v) for v in values]
+        units = _parse_uniform(values, scale)
+    if units is not None:
+        return units
+    units, bad = _parse_joined(values, scale)
+    fixed = [parse_units(values[i], scale) for i in bad]
+    if fixed and max(map(abs, fixed)) >= INT64_MAX:
+        units = units.astype(object)
+    units[bad] = fixed
+    return units
+
+
+def column_units(values, scale: int = SCALE) -> tuple:
+    """
+    (units, scale) of a column: at scale, or at the larger scale its most
+    precise value needs (e.g. a quote amount computed as qty * price), so
+    sums stay exact whatever was stored.
+    """
+    try:
+        return to_units(values, scale), scale
+    except ValueError:
+        # Only values with more written decimals than scale, or an exponent, can need more
+        longer = [v for v in map(str, filter(None, values)) if len(v) - v.find(".") - 1 > scale or "E" in v.upper()]
+        scale = max((decimals(v.strip()) for v in longer), default=scale)
+        return to_units(values, scale), scale
+
+
+def to_decimal(units: int, scale: int = SCALE) -> Decimal:
+    return Decimal(int(units)).scaleb(-scale)
+
+
+def plain(value: Decimal) -> str:
+    """Decimal as a plain string without exponent or trailing zeros, e.g. 1.2340E-5 -> "0.00001234" """
+    text = format(value, "f")
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    return "0" if text in ("", "-0") else text
+
+
+def _int64(units) -> bool:
+    return getattr(units, "dtype", None) == "int64"
+
+
+def _max(units) -> int:
+    return int(abs(units).max()) if len(units) else 0
+
+
+def _limbs(units) -> list:
+    """(limb, shift) with units == sum(limb << shift): low limbs unsigned, the top one carries the sign"""
+    mask = (1 << LIMB_BITS) - 1
+    return [(units & mask, 0), ((units >> LIMB_BITS) & mask, LIMB_BITS), (units >> 2 * LIMB_BITS, 2 * LIMB_BITS)]
+
+
+def total(units) -> int:
+    """Exact sum of a units column"""
+    if not _int64(units):
+        return sum(int(u) for u in units)
+    if _max(units) * len(units) < INT64_MAX:
+        return int(units.sum())
+    return sum(int(limb[i:i + CHUNK].sum()) << shift
+               for limb, shift in _limbs(units) for i in range(0, len(units), CHUNK))
+
+
+def dot(a, b) -> int:
+    """Exact sum of a[i] * b[i] (at the scale of a plus the scale of b)"""
+    if not (_int64(a) and _int64(b)):
+        return sum(int(x) * int(y) for x, y in zip(a, b))
+    if _max(a) * _max(b) * len(a) < INT64_MAX:
+        return int(a.dot(b))
+    # Past int64: dot products of 21-bit limbs, each one exact in int64
+    return sum(int(x[i:i + CHUNK].dot(y[i:i + CHUNK])) << (x_shift + y_shift)
+               for x, x_shift in _limbs(a) for y, y_shift in _limbs(b) for i in range(0, len(a), CHUNK))
+
+
+def group_totals(keys: list, *columns) -> dict:
+    """{key: [exact sum of each units column over the rows with that key]}, keys in first-seen order"""
+    index = {key: code for code, key in enumerate(dict.fromkeys(keys))}
+    if len(index) == 1:
+        return {keys[0]: [total(units) for units in columns]}
+    if len(keys) < VECTOR_MIN:
+        sums = {key: [0] * len(columns) for key in index}
+        for i, key in enumerate(keys):
+            row = sums[key]
+            for j, units in enumerate(columns):
+                row[j] += int(units[i])
+        return sums
+
+    # Rows sorted by key, then one sum per run of equal keys
+    np = _numpy()[0]
+    codes = np.fromiter(map(index.__getitem__, keys), dtype=np.int64, count=len(keys))
+    order = np.argsort(codes, kind="stable")
+    starts = np.flatnonzero(np.diff(codes[order], prepend=-1))
+    ends = np.append(starts[1:], len(keys))
+    sums = []
+    for units in columns:
+        units = np.asarray(units)[order]
+        if _int64(units) and _max(units) * len(units) < INT64_MAX:
+            sums.append(np.add.reduceat(units, starts).tolist())
+        else:
+            sums.append([total(units[start:end]) for start, end in zip(starts, ends)])
+    return {key: list(row) for key, row in zip(index, zip(*sums))}
+
+
+class Fills:
+    """
+    Fills of one or more orders. A single order (fewer than VECTOR_MIN fills)
+    is summed as plain Decimal, exact at that size and cheaper than scaling;
+    longer histories as scaled-integer columns.
+    """
+
+    def __init__(self, fills: list, qty_scale: int = SCALE, price_scale: int = SCALE, fee_scale: int = SCALE):
+        qty, price, fee = ([fill[key] for fill in fills] for key in ("qty", "price", "commission"))
+        self.fee_assets = [fill["commissionAsset"] for fill in fills]
+        if len(fills) < VECTOR_MIN:
+            self.qty, self.price, self.fee = ([Decimal(v) for v in column] for column in (qty, price, fee))
+            self.qty_scale = self.price_scale = self.fee_scale = None  # Decimal columns
+            return
+        # A column with more decimals than its scale (e.g. a simulated qty * fee rate) takes the scale it needs
+        self.qty, self.qty_scale = column_units(qty, qty_scale)
+        self.price, self.price_scale = column_units(price, price_scale)
+        self.fee, self.fee_scale = column_units(fee, fee_scale)
+
+    @classmethod
+    def for_symbol(cls, fills: list, filters) -> "Fills":
+        """Scales from the symbol's lot step and price tick: fewer digits keep products in int64"""
+        qty_scale = decimals(filters.step_size) if filters.step_size else SCALE
+        price_scale = decimals(filters.tick_size) if filters.tick_size else SCALE
+        return cls(fills, qty_scale, price_scale)
+
+    def __len__(self):
+        return len(self.qty)
+
+    def _total(self, column: list, scale) -> Decimal:
+        if scale is None:
+            return sum(column, Decimal("0"))
+        return to_decimal(total(column), scale)
+
+    def qty_total(self) -> Decimal:
+        return self._total(self.qty, self.qty_scale)
+
+    def quote_total(self) -> Decimal:
+        """Exact sum of qty * price"""
+        if self.qty_scale is None:
+            return sum((q * p for q, p in zip(self.qty, self.price)), Decimal("0"))
+        return to_decimal(dot(self.qty, self.price), self.qty_scale + self.price_scale)
+
+    def vwap(self) -> Decimal:
+        qty = self.qty_total()
+        if not qty:
+            return Decimal("0")
+        return self.quote_total() / qty
+
+    def fees(self) -> dict:
+        """{commissionAsset: total commission}"""
+        if self.fee_scale is None:
+            fees = {}
+            for asset, fee in zip(self.fee_assets, self.fee):
+                fees[asset] = fees.get(asset, Decimal("0")) + fee
+            return fees
+        return {asset: to_decimal(units, self.fee_scale)
+                for asset, (units,) in group_totals(self.fee_assets, self.fee).items()}
+
+    def fee_total(self) -> Decimal:
+        """All commissions added up, whatever their asset (as the ledger's fee column)"""
+        return self._total(self.fee, self.fee_scale)
@@ -0,0 +1,55 @@
+"""
+Shared Binance Spot clients.
+
+A client is built once per account and process and reused, so every strategy
+and monitoring job in the same interpreter shares one HTTP session (and its
+warm TLS connection) per account instead of opening a new one per run.
+Clients are RateLimitedSpot, so they also share the request weight budget.
+With EXCHANGE_MODE=paper each account gets a SimulatedSpot instead, which
+keeps its state in DATA_DIR between runs (PAPER_STATE_FILE).
+"""
+import os
+import threading
+import time
+
+from config.settings import BASE_URL, API_KEY, API_SECRET, ACCOUNTS, EXCHANGE_MODE, REQUEST_TIMEOUT, PAPER_STATE_FILE
+
+DEFAULT_ACCOUNT = "main"
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_client(account: str = DEFAULT_ACCOUNT):
+    """Return the process-wide Spot client for an account, creating it on first use"""
+    with _lock:
+        client = _clients.get(account)
+        if client is None:
+            if account == DEFAULT_ACCOUNT:
+                api_key, api_secret = API_KEY, API_SECRET
+            elif account in ACCOUNTS:
+                key_env, secret_env = ACCOUNTS[account]
+                api_key, api_secret = os.getenv(key_env), os.getenv(secret_env)
+            else:
+                raise ValueError(f"Unknown account '{account}', add it to ACCOUNTS in config/settings.py")
+            if EXCHANGE_MODE == "paper":
+                from src.utils.simulator import SimulatedSpot
+                state_file = PAPER_STATE_FILE.format(account=account) if PAPER_STATE_FILE else None
+                client = _clients[account] = SimulatedSpot(state_file=state_file)
+            else:
+                # Imported here: the connector is slow to load and not every command needs it
+                from src.utils.rate_limit import RateLimitedSpot
+                client = _clients[account] = RateLimitedSpot(
+                    api_key=api_key, api_secret=api_secret, base_url=BASE_URL, timeout=REQUEST_TIMEOUT)
+        return client
+
+
+def account_name(client) -> str:
+    """Name of the account a shared client belongs to (DEFAULT_ACCOUNT for clients built elsewhere)"""
+    with _lock:
+        return next((name for name, c in _clients.items() if c is client), DEFAULT_ACCOUNT)
+
+
+def exchange_time(client) -> float:
+    """Current time in epoch seconds as the client sees it (simulated for the paper exchange)"""
+    return getattr(client, "simulated_time", None) or time.time()
@@ -0,0 +1,181 @@
+"""
+Dip sizing: how much to buy for a given dip depth, within a monthly budget.
+
+DipSizer maps the depth of a dip (in %, e.g. 4.5 for -4.5%) onto an amount
+between DIP_MIN_AMOUNT at MIN_DIP_PERCENT and DIP_MAX_AMOUNT at
+MAX_DIP_PERCENT (and deeper) along a curve:
+
+    flat         DIP_MAX_AMOUNT for any dip
+    linear       straight line between the two
+    exponential  small top-ups for shallow dips, most of the money for deep
+                 ones (DIP_CURVE_STEEPNESS shapes it)
+    tiered       linear, but only stepping up every DIP_INCREMENT
+
+The curve is precomputed into a lookup table at 0.01% resolution, so a
+decision is one index. The backtester reads the same table (vectorized), so
+live and backtested amounts match exactly.
+
+MonthlyBudget caps the spending per calendar month; what is left at the end
+of a month carries forward, up to DIP_BUDGET_MAX_CARRY months' worth. The
+live state is a flock-guarded JSON file shared by every process, and a live
+buy reserves its amount up front, so concurrent runs can't overspend it.
+"""
+import fcntl
+import json
+import math
+from pathlib import Path
+
+from config.settings import (
+    DATA_DIR, MIN_DIP_PERCENT, MAX_DIP_PERCENT, DIP_INCREMENT,
+    DIP_SIZING_CURVE, DIP_MIN_AMOUNT, DIP_MAX_AMOUNT, DIP_CURVE_STEEPNESS,
+    DIP_MONTHLY_BUDGET, DIP_BUDGET_MAX_CARRY
+)
+
+CURVES = ("flat", "linear", "exponential", "tiered")
+STEPS_PER_PERCENT = 100  # table resolution: 0.01% of dip depth
+BUDGET_FILE = Path(DATA_DIR) / "dip_budget.json"
+
+
+class DipSizer:
+    """Dip depth (%) -> amount, as a precomputed lookup table"""
+
+    def __init__(self, curve: str = DIP_SIZING_CURVE,
+                 min_dip: float = MIN_DIP_PERCENT * 100, max_dip: float = MAX_DIP_PERCENT * 100,
+                 min_amount: float = DIP_MIN_AMOUNT, max_amount: float = DIP_MAX_AMOUNT,
+                 increment: float = DIP_INCREMENT * 100, steepness: float = DIP_CURVE_STEEPNESS):
+        if curve not in CURVES:
+            raise ValueError(f"Unknown dip sizing curve '{curve}', use one of {', '.join(CURVES)}")
+        if not 0 < min_dip <= max_dip:
+            raise ValueError(f"Dip range must satisfy 0 < min ({min_dip}) <= max ({max_dip})")
+        self.curve = curve
+        self.min_step = round(min_dip * STEPS_PER_PERCENT)
+        self.max_step = round(max_dip * STEPS_PER_PERCENT)
+        span = self.max_step - self.min_step
+        tier = max(1, round(increment * STEPS_PER_PERCENT))
+
+        self.table = []
+        for step in range(span + 1):
+            t = step / span if span else 1.0
+            if curve == "flat":
+                t = 1.0
+            elif curve == "exponential":
+                t = math.expm1(steepness * t) / math.expm1(steepness) if steepness else t
+            elif curve == "tiered":
+                t = (step // tier * tier) / span if span else 1.0
+            self.table.append(min_amount + (max_amount - min_amount) * t)
+
+    def _index(self, depth: float):
+        step = math.floor(depth * STEPS_PER_PERCENT + 1e-9)
+        if step < self.min_step:
+            return None
+        return min(step, self.max_step) - self.min_step
+
+    def amount(self, depth: float) -> float:
+        """Amount for a dip of depth % (0 below the minimum dip)"""
+        index = self._index(float(depth))
+        return 0.0 if index is None else self.table[index]
+
+    def amounts(self, depths):
+        """amount() over a NumPy array of depths, for the backtester"""
+        import numpy as np
+
+        steps = np.floor(np.asarray(depths, dtype="float64") * STEPS_PER_PERCENT + 1e-9).astype("int64")
+        table = np.asarray(self.table, dtype="float64")
+        index = np.clip(steps, self.min_step, self.max_step) - self.min_step
+        return np.where(steps < self.min_step, 0.0, table[index])
+
+
+def _month_number(month: str) -> int:
+    year, number = month.split("-")
+    return int(year) * 12 + int(number) - 1
+
+
+class MonthlyBudget:
+    """
+    Spending cap per calendar month ("YYYY-MM") with carry-forward.
+    With a path the state is shared through a locked JSON file, without one
+    it lives in memory (backtests).
+    """
+
+    def __init__(self, monthly: float = DIP_MONTHLY_BUDGET, max_carry: int = DIP_BUDGET_MAX_CARRY, path=None):
+        self.monthly = monthly
+        self.max_carry = max_carry
+        self.path = Path(path) if path else None
+        self._state = {}
+
+    def _roll(self, entry: dict, month: str) -> dict:
+        """Entry as of month: every month passed adds a budget, capped by the carry limit"""
+        if entry is None:
+            return {"month": month, "available": self.monthly}
+        elapsed = _month_number(month) - _month_number(entry["month"])
+        if elapsed <= 0:
+            return entry
+        cap = self.monthly * (self.max_carry + 1)
+        return {"month": month, "available": min(entry["available"] + self.monthly * elapsed, cap)}
+
+    def _update(self, key: str, month: str, change):
+        if self.path is None:
+            entry = self._state[key] = self._roll(self._state.get(key), month)
+            return change(entry)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                state = json.loads(raw) if raw else {}
+                entry = state[key] = self._roll(state.get(key), month)
+                result = change(entry)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()  # on disk before the lock is released, not when the file closes
+                return result
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def available(self, key: str, month: str) -> float:
+        if self.monthly is None:
+            return math.inf
+        return self._update(key, month, lambda entry: entry["available"])
+
+    def cap(self, key: str, month: str, amount: float) -> float:
+        """amount, reduced to what is left of the budget"""
+        return min(amount, self.available(key, month))
+
+    def spend(self, key: str, month: str, amount: float):
+        if self.monthly is None:
+            return
+
+        def take(entry):
+            entry["available"] = max(0.0, entry["available"] - amount)
+        self._update(key, month, take)
+
+    def reserve(self, key: str, month: str, amount: float) -> float:
+        """
+        Take amount (or what is left of the budget) out of it in one locked
+        step, so concurrent runs can't all pass the same cap. Returns the
+        amount granted; settle() it once the order is done.
+        """
+        if self.monthly is None:
+            return amount
+
+        def take(entry):
+            granted = min(amount, entry["available"])
+            entry["available"] -= granted
+            return granted
+        return self._update(key, month, take)
+
+    def settle(self, key: str, month: str, reserved: float, spent: float):
+        """Give back the part of a reservation that wasn't spent (or take what was spent beyond it)"""
+        if self.monthly is None:
+            return
+
+        def adjust(entry):
+            entry["available"] = max(0.0, entry["available"] + reserved - spent)
+        self._update(key, month, adjust)
+
+
+def get_budget(monthly: float = DIP_MONTHLY_BUDGET, max_carry: int = DIP_BUDGET_MAX_CARRY) -> MonthlyBudget:
+    """The live budget, shared by every process through DATA_DIR"""
+    return MonthlyBudget(monthly=monthly, max_carry=max_carry, path=BUDGET_FILE)
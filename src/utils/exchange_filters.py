@@ -0,0 +1,209 @@
+"""
+Symbol trading rules from exchangeInfo, cached on disk.
+
+exchangeInfo costs 20 request weight and the filters rarely change, so each
+symbol's entry is stored in EXCHANGE_INFO_FILE and only refetched once it is
+older than EXCHANGE_INFO_TTL. The filters are parsed into Decimals once per
+process, so rounding and validating an order before it is sent is pure local
+arithmetic: a bad amount or price fails here instead of as an exchange
+rejection after a round trip.
+"""
+import json
+import os
+import threading
+import time
+from decimal import Decimal, ROUND_DOWN
+
+from config.settings import EXCHANGE_INFO_FILE, EXCHANGE_INFO_TTL, QUOTE_ASSETS
+
+ZERO = Decimal("0")
+
+
+class InvalidOrder(Exception):
+    """The order would be rejected by the exchange filters"""
+
+
+def split_symbol(symbol: str):
+    """Split e.g. 'ETHEUR' into ('ETH', 'EUR') using QUOTE_ASSETS"""
+    for quote in QUOTE_ASSETS:
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return symbol[:-len(quote)], quote
+    raise ValueError(f"Can't find the quote asset of {symbol}, add it to QUOTE_ASSETS")
+
+
+def to_str(value: Decimal) -> str:
+    """Plain decimal string for the API (never scientific notation)"""
+    return format(value, "f")
+
+
+def _floor(value: Decimal, step: Decimal) -> Decimal:
+    return (value / step).to_integral_value(rounding=ROUND_DOWN) * step
+
+
+def _places(step: Decimal) -> Decimal:
+    """Quantum with the number of decimals a step size allows, e.g. 0.01000000 -> 0.01"""
+    return Decimal(1).scaleb(min(0, step.normalize().as_tuple().exponent))
+
+
+class SymbolFilters:
+    """PRICE_FILTER, LOT_SIZE, MARKET_LOT_SIZE and (MIN_)NOTIONAL of one symbol, as Decimals"""
+
+    def __init__(self, info: dict):
+        self.symbol = info["symbol"]
+        self.status = info.get("status", "TRADING")
+        self.base_asset = info.get("baseAsset")
+        self.quote_asset = info.get("quoteAsset")
+        self.quote_places = Decimal(1).scaleb(-int(info.get("quoteAssetPrecision", info.get("quotePrecision", 8))))
+
+        filters = {f["filterType"]: f for f in info.get("filters", [])}
+
+        price = filters.get("PRICE_FILTER", {})
+        self.tick_size = Decimal(price.get("tickSize", "0"))
+        self.min_price = Decimal(price.get("minPrice", "0"))
+        self.max_price = Decimal(price.get("maxPrice", "0"))
+
+        lot = filters.get("LOT_SIZE", {})
+        self.step_size = Decimal(lot.get("stepSize", "0"))
+        self.min_qty = Decimal(lot.get("minQty", "0"))
+        self.max_qty = Decimal(lot.get("maxQty", "0"))
+
+        # MARKET_LOT_SIZE limits of 0 mean "same as LOT_SIZE"
+        market = filters.get("MARKET_LOT_SIZE", {})
+        self.market_min_qty = Decimal(market.get("minQty", "0")) or self.min_qty
+        self.market_max_qty = Decimal(market.get("maxQty", "0")) or self.max_qty
+
+        self.min_notional = ZERO
+        self.max_notional = ZERO
+        self.min_notional_market = True
+        self.max_notional_market = False
+        if "NOTIONAL" in filters:
+            notional = filters["NOTIONAL"]
+            self.min_notional = Decimal(notional.get("minNotional", "0"))
+            self.max_notional = Decimal(notional.get("maxNotional", "0"))
+            self.min_notional_market = notional.get("applyMinToMarket", True)
+            self.max_notional_market = notional.get("applyMaxToMarket", False)
+        elif "MIN_NOTIONAL" in filters:
+            notional = filters["MIN_NOTIONAL"]
+            self.min_notional = Decimal(notional.get("minNotional", "0"))
+            self.min_notional_market = notional.get("applyToMarket", True)
+
+        self._price_places = _places(self.tick_size) if self.tick_size else None
+        self._qty_places = _places(self.step_size) if self.step_size else None
+
+    def round_price(self, price: Decimal, rounding=ROUND_DOWN) -> Decimal:
+        """Snap a price to the tick size (down by default, so a buy never pays more)"""
+        if not self.tick_size:
+            return price
+        steps = (price / self.tick_size).to_integral_value(rounding=rounding)
+        return (steps * self.tick_size).quantize(self._price_places)
+
+    def round_qty(self, qty: Decimal) -> Decimal:
+        """Floor a quantity to the lot step"""
+        if not self.step_size:
+            return qty
+        return _floor(qty, self.step_size).quantize(self._qty_places)
+
+    def round_quote(self, amount: Decimal) -> Decimal:
+        """Floor a quote amount (quoteOrderQty) to the quote asset precision"""
+        return amount.quantize(self.quote_places, rounding=ROUND_DOWN)
+
+    def price_ticks(self, price: Decimal) -> int:
+        """Price as a whole number of ticks"""
+        return int(price / self.tick_size) if self.tick_size else int(price)
+
+    def _check_trading(self):
+        if self.status != "TRADING":
+            raise InvalidOrder(f"{self.symbol} is not trading (status {self.status})")
+
+    def validate_limit(self, price: Decimal, qty: Decimal):
+        """Raise InvalidOrder if a LIMIT order at (price, qty) breaks any filter"""
+        self._check_trading()
+        if price <= 0 or price < self.min_price or (self.max_price and price > self.max_price):
+            raise InvalidOrder(f"{self.symbol} price {price} outside [{self.min_price}, {self.max_price or 'inf'}]")
+        if self.tick_size and price % self.tick_size:
+            raise InvalidOrder(f"{self.symbol} price {price} is not a multiple of tick size {self.tick_size}")
+        if qty <= 0 or qty < self.min_qty or (self.max_qty and qty > self.max_qty):
+            raise InvalidOrder(f"{self.symbol} quantity {qty} outside [{self.min_qty}, {self.max_qty or 'inf'}]")
+        if self.step_size and qty % self.step_size:
+            raise InvalidOrder(f"{self.symbol} quantity {qty} is not a multiple of step size {self.step_size}")
+        notional = price * qty
+        if notional < self.min_notional:
+            raise InvalidOrder(f"{self.symbol} order value {notional} is below the minimum {self.min_notional}")
+        if self.max_notional and notional > self.max_notional:
+            raise InvalidOrder(f"{self.symbol} order value {notional} is above the maximum {self.max_notional}")
+
+    def limit_order(self, price: Decimal, quote_amount: Decimal) -> tuple:
+        """Round a limit buy of quote_amount at price to (price, qty) and validate it"""
+        price = self.round_price(price)
+        qty = self.round_qty(quote_amount / price) if price > 0 else ZERO
+        self.validate_limit(price, qty)
+        return price, qty
+
+    def market_quote_order(self, amount, price: Decimal = None) -> Decimal:
+        """
+        Round and validate a MARKET order sized by quoteOrderQty; returns the amount to send.
+        With a reference price the implied quantity is checked against MARKET_LOT_SIZE too.
+        """
+        self._check_trading()
+        amount = self.round_quote(Decimal(str(amount)))
+        if amount <= 0:
+            raise InvalidOrder(f"{self.symbol} order amount must be positive")
+        if self.min_notional_market and amount < self.min_notional:
+            raise InvalidOrder(f"{self.symbol} order value {amount} is below the minimum {self.min_notional}")
+        if self.max_notional_market and self.max_notional and amount > self.max_notional:
+            raise InvalidOrder(f"{self.symbol} order value {amount} is above the maximum {self.max_notional}")
+        if price:
+            qty = amount / price
+            if qty < self.market_min_qty:
+                raise InvalidOrder(f"{self.symbol} quantity ~{qty:.8f} is below the minimum {self.market_min_qty}")
+            if self.market_max_qty and qty > self.market_max_qty:
+                raise InvalidOrder(f"{self.symbol} quantity ~{qty:.8f} is above the maximum {self.market_max_qty}")
+        return amount
+
+
+_filters = {}
+_lock = threading.Lock()
+
+
+def _read_cache() -> dict:
+    try:
+        with open(EXCHANGE_INFO_FILE) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_cache(cache: dict):
+    os.makedirs(os.path.dirname(EXCHANGE_INFO_FILE) or ".", exist_ok=True)
+    tmp = f"{EXCHANGE_INFO_FILE}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp, EXCHANGE_INFO_FILE)
+
+
+def get_filters(client, symbol: str) -> SymbolFilters:
+    """Filters for a symbol: from memory, then disk, then exchangeInfo once the TTL has expired"""
+    with _lock:
+        cached = _filters.get(symbol)
+        if cached and time.time() - cached[0] < EXCHANGE_INFO_TTL:
+            return cached[1]
+
+        entry = _read_cache().get(symbol)
+        if entry is None or time.time() - entry["fetched_at"] >= EXCHANGE_INFO_TTL:
+            entry = {"fetched_at": time.time(), "info": client.exchange_info(symbol=symbol)["symbols"][0]}
+            cache = _read_cache()
+            cache[symbol] = entry
+            _write_cache(cache)
+
+        filters = SymbolFilters(entry["info"])
+        _filters[symbol] = (entry["fetched_at"], filters)
+        return filters
+
+
+def invalidate(symbol: str):
+    """Drop a symbol's cached filters (e.g. after an unexpected filter rejection)"""
+    with _lock:
+        _filters.pop(symbol, None)
+        cache = _read_cache()
+        if cache.pop(symbol, None) is not None:
+            _write_cache(cache)
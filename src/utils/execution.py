@@ -0,0 +1,192 @@
+"""
+Execution engine: how a strategy's purchase reaches the exchange.
+
+    market  one MARKET order for the whole amount
+    twap    up to TWAP_SLICES market orders spread evenly over TWAP_WINDOW_SECONDS
+    maker   a LIMIT_MAKER buy at the best bid (maker fee, no spread paid),
+            re-posted if the bid moved, and whatever is still unfilled after
+            MAKER_TIMEOUT_SECONDS is bought at market
+
+Every child order is journaled (src/utils/order_journal.py), so a rerun of
+the slot resumes a purchase instead of repeating it. The result is shaped like
+a FULL new_order response covering all child orders, plus an "execution"
+dict with the arrival price (mid of the book when execution started), the
+achieved VWAP and the slippage between them in basis points, as logged to
+the ledger.
+
+Given a LocalOrderBook (src/utils/order_book.py) the engine reads the
+arrival price and best bid from it instead of REST, and checks the expected
+slippage of a market buy first: above MAX_SLIPPAGE_BPS it is sliced as
+TWAP instead.
+"""
+import time
+from decimal import Decimal
+
+from binance.error import ClientError
+
+from src.utils.exchange_filters import InvalidOrder, get_filters, to_str
+from src.utils.order_journal import lookup_order
+from config.settings import (
+    EXECUTION_MODE, TWAP_SLICES, TWAP_WINDOW_SECONDS,
+    MAKER_TIMEOUT_SECONDS, MAKER_POLL_SECONDS, MAKER_REPRICES, MAX_SLIPPAGE_BPS
+)
+
+MODES = ("market", "twap", "maker")
+OPEN_STATUSES = ("NEW", "PARTIALLY_FILLED")
+
+
+def _wait(client, seconds: float):
+    """Sleep, or move the paper exchange's clock forward"""
+    advance = getattr(client, "advance", None)
+    if advance is not None:
+        advance(seconds)
+    else:
+        time.sleep(seconds)
+
+
+def arrival_price(client, symbol: str, book=None) -> Decimal:
+    """Mid price of the book, the benchmark slippage is measured against"""
+    mid = book.mid() if book is not None else None
+    if mid is not None:
+        return mid
+    ticker = client.book_ticker(symbol=symbol)
+    return (Decimal(ticker["bidPrice"]) + Decimal(ticker["askPrice"])) / 2
+
+
+def _best_bid(client, symbol: str, book=None) -> Decimal:
+    bid = book.best_bid() if book is not None else None
+    if bid is not None:
+        return bid[0]
+    return Decimal(client.book_ticker(symbol=symbol)["bidPrice"])
+
+
+def _market(intent, amount: Decimal) -> dict:
+    return intent.submit(symbol=intent.symbol, side="BUY", type="MARKET", quoteOrderQty=to_str(amount))
+
+
+def _twap(client, intent, amount: Decimal, filters) -> list:
+    # Fewer, larger slices when the amount can't be split TWAP_SLICES ways above the minimum notional
+    slices = TWAP_SLICES
+    while slices > 1:
+        try:
+            filters.market_quote_order(amount / slices)
+            break
+        except InvalidOrder:
+            slices -= 1
+    slice_amount = filters.round_quote(amount / slices)
+
+    orders = []
+    for i in range(slices):
+        child = intent.child(f"t{i + 1}")
+        if i and not child.placed:
+            _wait(client, TWAP_WINDOW_SECONDS / slices)
+        quote = amount - slice_amount * (slices - 1) if i == slices - 1 else slice_amount
+        orders.append(_market(child, quote))
+    return orders
+
+
+def _maker(client, intent, amount: Decimal, filters, book=None) -> list:
+    orders = []
+    child = intent.child("m")
+    order = None
+    for _ in range(MAKER_REPRICES + 1):
+        bid = _best_bid(client, intent.symbol, book)
+        try:
+            price, qty = filters.limit_order(bid, amount)
+        except InvalidOrder as e:
+            print(f"No maker order ({e}), buying at market")
+            break
+        try:
+            order = child.submit(symbol=intent.symbol, side="BUY", type="LIMIT_MAKER",
+                                 price=to_str(price), quantity=to_str(qty))
+            break
+        except ClientError as e:
+            # The bid moved up between the book read and the order: re-price
+            if e.error_code != -2010 or "immediately match" not in str(e.error_message):
+                raise
+
+    if order is not None:
+        waited = 0
+        while order["status"] in OPEN_STATUSES and waited < MAKER_TIMEOUT_SECONDS:
+            _wait(client, MAKER_POLL_SECONDS)
+            waited += MAKER_POLL_SECONDS
+            order = client.get_order(symbol=intent.symbol, origClientOrderId=child.client_order_id)
+        if order["status"] in OPEN_STATUSES:
+            try:
+                client.cancel_order(symbol=intent.symbol, origClientOrderId=child.client_order_id)
+            except ClientError as e:
+                if e.error_code != -2011:  # filled in the meantime
+                    raise
+        order = lookup_order(client, intent.symbol, child.client_order_id)
+        child.update(order)
+        orders.append(order)
+        amount -= Decimal(order["cummulativeQuoteQty"])
+
+    if amount > 0:
+        try:
+            remaining = filters.market_quote_order(amount)
+        except InvalidOrder as e:
+            print(f"Remaining {amount} not bought: {e}")
+        else:
+            print(f"Maker order not fully filled, buying the remaining {remaining} at market")
+            orders.append(_market(intent.child("f"), remaining))
+    return orders
+
+
+def _combine(orders: list, symbol: str, mode: str, arrival: Decimal) -> dict:
+    qty = sum((Decimal(o["executedQty"]) for o in orders), Decimal("0"))
+    quote = sum((Decimal(o["cummulativeQuoteQty"]) for o in orders), Decimal("0"))
+    vwap = quote / qty if qty > 0 else Decimal("0")
+    # Positive = paid more than the mid at arrival
+    slippage = (vwap - arrival) / arrival * 10000 if qty > 0 and arrival > 0 else Decimal("0")
+    last = orders[-1]
+    return {
+        "symbol": symbol,
+        "orderId": last["orderId"],
+        "clientOrderId": last.get("clientOrderId"),
+        "side": "BUY",
+        "status": last["status"] if last["status"] == "FILLED" or qty == 0 else "PARTIALLY_FILLED",
+        "executedQty": to_str(qty),
+        "cummulativeQuoteQty": to_str(quote),
+        "fills": [fill for o in orders for fill in o.get("fills", [])],
+        "childOrders": [o["orderId"] for o in orders],
+        "execution": {
+            "execution_mode": mode,
+            "arrival_price": arrival,
+            "vwap": vwap.quantize(Decimal("0.00000001")),
+            "slippage_bps": slippage.quantize(Decimal("0.01")),
+        },
+    }
+
+
+def execute_buy(client, intent, amount: Decimal, mode: str = EXECUTION_MODE, book=None) -> dict:
+    """
+    Buy amount (quote currency, already validated) of intent.symbol using the
+    given execution mode; book: optional LocalOrderBook of the symbol.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown execution mode '{mode}', use one of {', '.join(MODES)}")
+    filters = get_filters(client, intent.symbol)
+    arrival = arrival_price(client, intent.symbol, book)
+
+    # Never switch once the single market order went out (a rerun would buy twice)
+    if mode == "market" and book is not None and not intent.placed:
+        estimate = book.cost_to_fill(amount)
+        if estimate is None:
+            print("Order book not synced or too thin for an estimate, buying at market")
+        elif estimate["slippage_bps"] > MAX_SLIPPAGE_BPS:
+            print(f"Expected slippage {estimate['slippage_bps']:.1f} bps is above {MAX_SLIPPAGE_BPS}, slicing as TWAP")
+            mode = "twap"
+
+    if mode == "twap":
+        orders = _twap(client, intent, amount, filters)
+    elif mode == "maker":
+        orders = _maker(client, intent, amount, filters, book)
+    else:
+        orders = [_market(intent, amount)]
+
+    order = _combine(orders, intent.symbol, mode, arrival)
+    execution = order["execution"]
+    print(f"Execution: {mode}, {len(orders)} order(s), VWAP {execution['vwap']} "
+          f"vs arrival {arrival} ({execution['slippage_bps']:+} bps)")
+    return order
@@ -0,0 +1,345 @@
+"""
+Incremental dip indicators fed from closed klines.
+
+Every indicator updates in O(1) per candle (amortized for the rolling
+maximum) from fixed-size ring buffers and running sums, so a run only feeds
+the candles closed since the last one. SignalEngine keeps one of each for a
+symbol and interval and persists their state as JSON between runs:
+
+    engine = SignalEngine.load("BTCEUR", "1h")
+    engine.sync(client)                 # only the klines closed since the last run
+    engine.values()["drawdown"]         # -7.4 (% below the 30-day high)
+    engine.save()
+
+Values are floats (signals, not accounting) and None until warmed up. All
+are "lower = deeper dip", so a dip is value <= threshold:
+
+    drawdown  % below the highest high of the window
+    sma, ema  % below the moving average
+    rsi       0..100 Wilder RSI
+    atr       distance below the window high in ATRs (e.g. -3 = three ATRs)
+    zscore    standard deviations below the rolling mean close
+"""
+import json
+import math
+import os
+from collections import deque
+
+from src.utils.client import exchange_time
+from src.utils.kline_store import INTERVAL_MS
+from config.settings import DATA_DIR, SIGNAL_PERIODS
+
+PAGE_LIMIT = 1000  # maximum klines per request
+
+
+class RollingMax:
+    """Maximum of the last `period` values (monotonic deque)"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.count = 0
+        self._window = deque()  # (index, value), values decreasing
+
+    def update(self, value: float) -> float:
+        while self._window and self._window[-1][1] <= value:
+            self._window.pop()
+        self._window.append((self.count, value))
+        if self._window[0][0] <= self.count - self.period:
+            self._window.popleft()
+        self.count += 1
+        return self._window[0][1]
+
+    @property
+    def value(self):
+        return self._window[0][1] if self.count >= self.period else None
+
+    def state(self) -> dict:
+        return {"count": self.count, "window": list(self._window)}
+
+    def load(self, state: dict):
+        self.count = state["count"]
+        self._window = deque(tuple(item) for item in state["window"])
+
+
+class Drawdown:
+    """% of the close below the highest high of the window"""
+
+    def __init__(self, period: int):
+        self.high = RollingMax(period)
+        self.value = None
+
+    def update(self, high: float, low: float, close: float):
+        self.high.update(high)
+        peak = self.high.value
+        self.value = (close - peak) / peak * 100 if peak else None
+
+    def state(self) -> dict:
+        return {"high": self.high.state(), "value": self.value}
+
+    def load(self, state: dict):
+        self.high.load(state["high"])
+        self.value = state["value"]
+
+
+class SmaDeviation:
+    """% of the close below its simple moving average"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self._closes = deque(maxlen=period)
+        self._sum = 0.0
+        self._updates = 0
+        self.value = None
+
+    def update(self, high: float, low: float, close: float):
+        if len(self._closes) == self.period:
+            self._sum -= self._closes[0]
+        self._closes.append(close)
+        self._sum += close
+        self._updates += 1
+        if self._updates % self.period == 0:
+            self._sum = math.fsum(self._closes)  # don't let float error accumulate
+        if len(self._closes) == self.period:
+            sma = self._sum / self.period
+            self.value = (close - sma) / sma * 100
+
+    def state(self) -> dict:
+        return {"closes": list(self._closes), "updates": self._updates, "value": self.value}
+
+    def load(self, state: dict):
+        self._closes = deque(state["closes"], maxlen=self.period)
+        self._sum = math.fsum(self._closes)
+        self._updates = state["updates"]
+        self.value = state["value"]
+
+
+class EmaDeviation:
+    """% of the close below its exponential moving average (seeded with the SMA)"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.ema = None
+        self._seed = []
+        self.value = None
+
+    def update(self, high: float, low: float, close: float):
+        if self.ema is None:
+            self._seed.append(close)
+            if len(self._seed) < self.period:
+                return
+            self.ema = sum(self._seed) / self.period
+            self._seed = []
+        else:
+            self.ema += self.alpha * (close - self.ema)
+        self.value = (close - self.ema) / self.ema * 100
+
+    def state(self) -> dict:
+        return {"ema": self.ema, "seed": self._seed, "value": self.value}
+
+    def load(self, state: dict):
+        self.ema, self._seed, self.value = state["ema"], state["seed"], state["value"]
+
+
+class Rsi:
+    """Wilder's relative strength index"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self.prev_close = None
+        self.avg_gain = self.avg_loss = 0.0
+        self.count = 0
+        self.value = None
+
+    def update(self, high: float, low: float, close: float):
+        if self.prev_close is not None:
+            change = close - self.prev_close
+            gain, loss = max(change, 0.0), max(-change, 0.0)
+            self.count += 1
+            if self.count <= self.period:
+                # Plain average of the first `period` changes
+                self.avg_gain += gain / self.period
+                self.avg_loss += loss / self.period
+            else:
+                self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+                self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+            if self.count >= self.period:
+                self.value = 100.0 if self.avg_loss == 0 else 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+        self.prev_close = close
+
+    def state(self) -> dict:
+        return {"prev_close": self.prev_close, "avg_gain": self.avg_gain, "avg_loss": self.avg_loss,
+                "count": self.count, "value": self.value}
+
+    def load(self, state: dict):
+        self.prev_close, self.avg_gain, self.avg_loss = state["prev_close"], state["avg_gain"], state["avg_loss"]
+        self.count, self.value = state["count"], state["value"]
+
+
+class AtrDip:
+    """Distance of the close below the window high, in Wilder ATRs"""
+
+    def __init__(self, period: int, window: int):
+        self.period = period
+        self.high = RollingMax(window)
+        self.prev_close = None
+        self.atr = None
+        self._seed = []
+        self.value = None
+
+    def update(self, high: float, low: float, close: float):
+        peak = self.high.update(high)
+        if self.prev_close is not None:
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+            if self.atr is None:
+                self._seed.append(true_range)
+                if len(self._seed) == self.period:
+                    self.atr = sum(self._seed) / self.period
+                    self._seed = []
+            else:
+                self.atr = (self.atr * (self.period - 1) + true_range) / self.period
+        self.prev_close = close
+        if self.atr and self.high.value is not None:
+            self.value = (close - peak) / self.atr
+
+    def state(self) -> dict:
+        return {"high": self.high.state(), "prev_close": self.prev_close, "atr": self.atr,
+                "seed": self._seed, "value": self.value}
+
+    def load(self, state: dict):
+        self.high.load(state["high"])
+        self.prev_close, self.atr, self._seed = state["prev_close"], state["atr"], state["seed"]
+        self.value = state["value"]
+
+
+class ZScore:
+    """Standard deviations of the close below the rolling mean close"""
+
+    def __init__(self, period: int):
+        self.period = period
+        self._closes = deque(maxlen=period)
+        self._sum = self._sum_sq = 0.0
+        self._updates = 0
+        self.value = None
+
+    def update(self, high: float, low: float, close: float):
+        if len(self._closes) == self.period:
+            old = self._closes[0]
+            self._sum -= old
+            self._sum_sq -= old * old
+        self._closes.append(close)
+        self._sum += close
+        self._sum_sq += close * close
+        self._updates += 1
+        if self._updates % self.period == 0:
+            self._refresh()
+        if len(self._closes) == self.period:
+            mean = self._sum / self.period
+            variance = max(self._sum_sq / self.period - mean * mean, 0.0)
+            self.value = (close - mean) / math.sqrt(variance) if variance > 0 else 0.0
+
+    def _refresh(self):
+        self._sum = math.fsum(self._closes)
+        self._sum_sq = math.fsum(c * c for c in self._closes)
+
+    def state(self) -> dict:
+        return {"closes": list(self._closes), "updates": self._updates, "value": self.value}
+
+    def load(self, state: dict):
+        self._closes = deque(state["closes"], maxlen=self.period)
+        self._refresh()
+        self._updates = state["updates"]
+        self.value = state["value"]
+
+
+def state_path(symbol: str, interval: str) -> str:
+    return os.path.join(DATA_DIR, "signals", f"{symbol}_{interval}.json")
+
+
+class SignalEngine:
+    """Every indicator of one symbol and interval, fed the same closed candles"""
+
+    def __init__(self, symbol: str, interval: str, periods: dict = None):
+        if interval not in INTERVAL_MS:
+            raise ValueError(f"Unsupported interval '{interval}', use one of {', '.join(INTERVAL_MS)}")
+        self.symbol = symbol
+        self.interval = interval
+        self.periods = dict(periods or SIGNAL_PERIODS)
+        self.last_open_time = None
+        self.indicators = {
+            "drawdown": Drawdown(self.periods["drawdown"]),
+            "sma": SmaDeviation(self.periods["sma"]),
+            "ema": EmaDeviation(self.periods["ema"]),
+            "rsi": Rsi(self.periods["rsi"]),
+            "atr": AtrDip(self.periods["atr"], self.periods["drawdown"]),
+            "zscore": ZScore(self.periods["zscore"]),
+        }
+
+    @property
+    def warmup(self) -> int:
+        """Candles needed before every indicator has a value"""
+        return max(self.periods.values()) + 1
+
+    def update(self, kline: list):
+        """Feed one closed kline (REST row); older or repeated candles are ignored"""
+        open_time = int(kline[0])
+        if self.last_open_time is not None and open_time <= self.last_open_time:
+            return
+        high, low, close = float(kline[2]), float(kline[3]), float(kline[4])
+        for indicator in self.indicators.values():
+            indicator.update(high, low, close)
+        self.last_open_time = open_time
+
+    def values(self) -> dict:
+        return {name: indicator.value for name, indicator in self.indicators.items()}
+
+    def sync(self, client) -> int:
+        """Feed the candles closed since the last update (the warmup window on first use); returns how many"""
+        step = INTERVAL_MS[self.interval]
+        now_ms = int(exchange_time(client) * 1000)
+        if self.last_open_time is None:
+            start = now_ms - (self.warmup + 1) * step
+        else:
+            start = self.last_open_time + step
+        fed = 0
+        while True:
+            page = client.klines(self.symbol, self.interval, startTime=start, limit=PAGE_LIMIT)
+            for kline in page:
+                if kline[6] < now_ms:  # skip the candle still open
+                    self.update(kline)
+                    fed += 1
+            if len(page) < PAGE_LIMIT:
+                return fed
+            start = page[-1][0] + step
+
+    # ----- persistence -----
+
+    def save(self, path: str = None):
+        path = path or state_path(self.symbol, self.interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        state = {
+            "symbol": self.symbol, "interval": self.interval, "periods": self.periods,
+            "last_open_time": self.last_open_time,
+            "indicators": {name: indicator.state() for name, indicator in self.indicators.items()},
+        }
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, symbol: str, interval: str, periods: dict = None, path: str = None) -> "SignalEngine":
+        """Saved engine, or a fresh one if there is no state or the periods changed"""
+        engine = cls(symbol, interval, periods)
+        path = path or state_path(symbol, interval)
+        try:
+            with open(path) as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return engine
+        if state.get("periods") != engine.periods:
+            return engine
+        engine.last_open_time = state["last_open_time"]
+        for name, indicator in engine.indicators.items():
+            indicator.load(state["indicators"][name])
+        return engine
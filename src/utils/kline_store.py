@@ -0,0 +1,140 @@
+"""
+Local kline store: one memory-mapped column file per field.
+
+Layout: DATA_DIR/klines/<SYMBOL>/<interval>/<column>.bin, each a raw
+little-endian array. A sync only downloads the tail after the last stored
+candle, fetching the 1000-candle pages concurrently and appending each one
+in order as soon as it arrives (a few pages in memory, not the whole
+download), and readers get
+read-only np.memmap views, so repeated analyses cost no network and no copy.
+"""
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from config.settings import DATA_DIR, KLINE_SYNC_WORKERS
+
+PAGE_LIMIT = 1000  # Binance maximum candles per /api/v3/klines request
+
+# Column name -> (position in the kline REST row, dtype)
+COLUMNS = {
+    "open_time": (0, "<i8"),
+    "open": (1, "<f8"),
+    "high": (2, "<f8"),
+    "low": (3, "<f8"),
+    "close": (4, "<f8"),
+    "volume": (5, "<f8"),
+    "close_time": (6, "<i8"),
+    "quote_volume": (7, "<f8"),
+    "trades": (8, "<i8"),
+}
+
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000,
+    "8h": 28_800_000, "12h": 43_200_000, "1d": 86_400_000, "3d": 259_200_000,
+    "1w": 604_800_000,
+}
+
+
+def store_path(symbol: str, interval: str) -> Path:
+    return Path(DATA_DIR) / "klines" / symbol.upper() / interval
+
+
+def _stored_rows(path: Path) -> int:
+    """Number of complete rows, i.e. the shortest column (guards against a torn append)"""
+    rows = []
+    for name, (_, dtype) in COLUMNS.items():
+        file = path / f"{name}.bin"
+        rows.append(file.stat().st_size // np.dtype(dtype).itemsize if file.exists() else 0)
+    return min(rows)
+
+
+def open_klines(symbol: str, interval: str) -> dict:
+    """Read-only memory-mapped arrays for every column, {column: np.ndarray}"""
+    path = store_path(symbol, interval)
+    rows = _stored_rows(path)
+    columns = {}
+    for name, (_, dtype) in COLUMNS.items():
+        if rows == 0:
+            columns[name] = np.empty(0, dtype=dtype)
+        else:
+            columns[name] = np.memmap(path / f"{name}.bin", dtype=dtype, mode="r", shape=(rows,))
+    return columns
+
+
+def last_open_time(symbol: str, interval: str):
+    path = store_path(symbol, interval)
+    rows = _stored_rows(path)
+    if rows == 0:
+        return None
+    return int(np.memmap(path / "open_time.bin", dtype="<i8", mode="r", shape=(rows,))[-1])
+
+
+def _append(path: Path, klines: list):
+    path.mkdir(parents=True, exist_ok=True)
+    rows = _stored_rows(path)
+    for name, (position, dtype) in COLUMNS.items():
+        values = np.array([k[position] for k in klines], dtype=np.float64 if dtype == "<f8" else np.int64)
+        with open(path / f"{name}.bin", "r+b" if (path / f"{name}.bin").exists() else "wb") as f:
+            # Drop any partial tail left by an interrupted append before writing
+            f.truncate(rows * np.dtype(dtype).itemsize)
+            f.seek(0, 2)
+            values.astype(dtype).tofile(f)
+
+
+def sync_klines(client, symbol: str, interval: str, start_time: int = None) -> int:
+    """Download closed candles after the last stored one; returns how many were added"""
+    if interval not in INTERVAL_MS:
+        raise ValueError(f"Unsupported interval: {interval}")
+    step = INTERVAL_MS[interval]
+    last = last_open_time(symbol, interval)
+    if last is not None:
+        start = last + step
+    elif start_time is not None:
+        start = start_time
+    else:
+        raise ValueError(f"No stored klines for {symbol} {interval}, pass start_time for the first sync")
+
+    now_ms = int(time.time() * 1000)
+    span = PAGE_LIMIT * step
+    pages = list(range(start, now_ms, span))
+    if not pages:
+        return 0
+
+    def fetch(page_start):
+        return client.klines(symbol, interval, startTime=page_start,
+                             endTime=page_start + span - 1, limit=PAGE_LIMIT)
+
+    path = store_path(symbol, interval)
+
+    def store(page) -> int:
+        # Only closed candles are stored, the open one is fetched again next sync
+        klines = [k for k in page if k[6] < now_ms and k[0] >= start]
+        if klines:
+            _append(path, klines)
+        return len(klines)
+
+    added = 0
+    pending = deque()  # futures in page order, at most one per worker waiting to be stored
+    with ThreadPoolExecutor(max_workers=KLINE_SYNC_WORKERS) as pool:
+        for page_start in pages:
+            pending.append(pool.submit(fetch, page_start))
+            if len(pending) > KLINE_SYNC_WORKERS:
+                added += store(pending.popleft().result())
+        while pending:
+            added += store(pending.popleft().result())
+    return added
+
+
+def load_frame(symbol: str, interval: str):
+    """Stored klines as a pandas DataFrame indexed by open time (UTC)"""
+    import pandas as pd
+
+    columns = open_klines(symbol, interval)
+    df = pd.DataFrame({name: values for name, values in columns.items() if name != "open_time"})
+    df.index = pd.to_datetime(columns["open_time"], unit="ms", utc=True)
+    return df
@@ -0,0 +1,268 @@
+"""
+SQLite trade ledger (WAL mode).
+
+Replaces the append-only history.csv: rows are inserted in batches inside one
+transaction, deduplicated by order/trade id, and indexed by time, action and
+symbol. WAL lets readers (show_history, exports) run while a strategy writes,
+and concurrent writers wait on the busy timeout instead of interleaving rows.
+Amounts are stored as TEXT so Decimal values round-trip exactly.
+
+Running aggregates (overall, per strategy and per month, each per symbol)
+are updated in the same transaction as each insert, so portfolio summaries
+are a handful of primary-key lookups no matter how long the history gets.
+They are summed as scaled-integer columns (see src/utils/accounting.py),
+which keeps a rebuild over the whole history exact and fast.
+"""
+import csv
+import sqlite3
+from itertools import repeat
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+
+from src.utils.accounting import column_units, group_totals, plain, to_decimal
+from config.settings import LEDGER_FILE
+
+AMOUNT_COLUMNS = ("base_amount", "btc_qty", "fee")  # summed into invested, qty and fees
+
+# Column order of the legacy history.csv, kept for CSV import/export
+CSV_COLUMNS = [
+    "datetime_utc", "action", "symbol", "base_currency",
+    "base_amount", "btc_qty", "avg_price", "fee",
+    "dip_price", "dip_qty",
+    "base_before", "base_after", "btc_before", "btc_after",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    id            INTEGER PRIMARY KEY,
+    datetime_utc  TEXT NOT NULL,
+    action        TEXT NOT NULL,
+    symbol        TEXT NOT NULL,
+    base_currency TEXT,
+    base_amount   TEXT,
+    btc_qty       TEXT,
+    avg_price     TEXT,
+    fee           TEXT,
+    dip_price     TEXT,
+    dip_qty       TEXT,
+    base_before   TEXT,
+    base_after    TEXT,
+    btc_before    TEXT,
+    btc_after     TEXT,
+    order_id      INTEGER,
+    trade_id      INTEGER,
+    dedupe_key    TEXT UNIQUE,
+    execution_mode TEXT,
+    arrival_price TEXT,
+    vwap          TEXT,
+    slippage_bps  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_trades_time ON trades (datetime_utc);
+CREATE INDEX IF NOT EXISTS idx_trades_action ON trades (action, datetime_utc);
+CREATE INDEX IF NOT EXISTS idx_trades_symbol ON trades (symbol, datetime_utc);
+CREATE TABLE IF NOT EXISTS aggregates (
+    scope         TEXT NOT NULL,  -- 'total', 'strategy' or 'month'
+    key           TEXT NOT NULL,  -- '' for total, the action, or 'YYYY-MM'
+    symbol        TEXT NOT NULL,  -- quantities of different assets are never summed together
+    base_currency TEXT NOT NULL,
+    trades        INTEGER NOT NULL,
+    invested      TEXT NOT NULL,
+    qty           TEXT NOT NULL,  -- bought, in the symbol's base asset
+    fees          TEXT NOT NULL,
+    PRIMARY KEY (scope, key, symbol, base_currency)
+);
+"""
+
+# How a purchase was executed (see src/utils/execution.py); not part of the CSV layout
+EXECUTION_COLUMNS = ["execution_mode", "arrival_price", "vwap", "slippage_bps"]
+
+INSERT_COLUMNS = CSV_COLUMNS + ["order_id", "trade_id", "dedupe_key"] + EXECUTION_COLUMNS
+
+
+def connect(path=None) -> sqlite3.Connection:
+    """Open the ledger in WAL mode, creating the schema on first use"""
+    path = Path(path or LEDGER_FILE)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    # Ledgers created before the aggregates table existed are backfilled once
+    if (conn.execute("SELECT 1 FROM trades LIMIT 1").fetchone()
+            and not conn.execute("SELECT 1 FROM aggregates LIMIT 1").fetchone()):
+        rebuild_aggregates(conn)
+    return conn
+
+
+def _to_text(value):
+    return None if value is None else str(value)
+
+
+def _row_values(row: dict) -> tuple:
+    order_id = row.get("order_id")
+    trade_id = row.get("trade_id")
+    dedupe_key = None
+    if order_id is not None:
+        # One row per order, or per fill when the trade id is known
+        dedupe_key = f"{row['symbol']}:{order_id}:{'' if trade_id is None else trade_id}"
+    values = [_to_text(row.get(c)) for c in CSV_COLUMNS]
+    execution = [_to_text(row.get(c)) for c in EXECUTION_COLUMNS]
+    return tuple(values + [order_id, trade_id, dedupe_key] + execution)
+
+
+def _decimal(value) -> Decimal:
+    try:
+        return Decimal(str(value)) if value not in (None, "") else Decimal("0")
+    except InvalidOperation:
+        return Decimal("0")
+
+
+def _aggregate_keys(columns: dict) -> dict:
+    """Aggregate key of every row per scope: {scope: [(key, symbol, base), ...]}"""
+    bases = [base or "" for base in columns["base_currency"]]
+    keys = {
+        "total": repeat("", len(bases)),
+        "strategy": columns["action"],
+        "month": ((time or "")[:7] for time in columns["datetime_utc"]),
+    }
+    return {scope: list(zip(column, columns["symbol"], bases)) for scope, column in keys.items()}
+
+
+def _amounts(values: list) -> tuple:
+    """(units, scale) of an amount column; values that don't parse count as zero, as in _decimal"""
+    try:
+        return column_units(values)
+    except ArithmeticError:
+        return column_units([str(_decimal(v)) for v in values])
+
+
+def _accumulate(deltas: dict, columns: dict):
+    """
+    Add trades, given as {column: [values]}, to the pending
+    {(scope, key, symbol, base): [trades, invested, qty, fees]} deltas
+    """
+    amounts = [_amounts(list(columns[column])) for column in AMOUNT_COLUMNS]
+    scales = [scale for _, scale in amounts]
+    ones = [1] * len(columns["action"])  # summed into the trade count
+    for scope, keys in _aggregate_keys(columns).items():
+        for (key, symbol, base), (trades, *sums) in group_totals(keys, ones, *(units for units, _ in amounts)).items():
+            delta = deltas.setdefault((scope, key, symbol, base), [0, Decimal("0"), Decimal("0"), Decimal("0")])
+            delta[0] += trades
+            for i, (units, scale) in enumerate(zip(sums, scales), start=1):
+                delta[i] += to_decimal(units, scale)
+
+
+def _apply_deltas(conn: sqlite3.Connection, deltas: dict):
+    for (scope, key, symbol, base), (trades, invested, qty, fees) in deltas.items():
+        current = conn.execute(
+            "SELECT trades, invested, qty, fees FROM aggregates "
+            "WHERE scope = ? AND key = ? AND symbol = ? AND base_currency = ?",
+            (scope, key, symbol, base),
+        ).fetchone()
+        if current:
+            trades += current["trades"]
+            invested += Decimal(current["invested"])
+            qty += Decimal(current["qty"])
+            fees += Decimal(current["fees"])
+        conn.execute(
+            "INSERT OR REPLACE INTO aggregates (scope, key, symbol, base_currency, trades, invested, qty, fees) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (scope, key, symbol, base, trades, plain(invested), plain(qty), plain(fees)),
+        )
+
+
+def insert_trades(rows: list, conn: sqlite3.Connection = None) -> int:
+    """Insert trade rows in one transaction, skipping duplicates; returns rows added"""
+    own = conn is None
+    conn = conn or connect()
+    sql = (f"INSERT OR IGNORE INTO trades ({', '.join(INSERT_COLUMNS)}) "
+           f"VALUES ({', '.join('?' * len(INSERT_COLUMNS))})")
+    try:
+        with conn:
+            added = []
+            for row in rows:
+                values = _row_values(row)
+                if conn.execute(sql, values).rowcount:
+                    added.append(values)
+            deltas = {}
+            if added:
+                _accumulate(deltas, dict(zip(INSERT_COLUMNS, zip(*added))))
+            _apply_deltas(conn, deltas)
+            return len(added)
+    finally:
+        if own:
+            conn.close()
+
+
+def rebuild_aggregates(conn: sqlite3.Connection):
+    """Recompute every aggregate from the trades table"""
+    names = ("datetime_utc", "action", "symbol", "base_currency") + AMOUNT_COLUMNS
+    cursor = conn.cursor()
+    cursor.row_factory = None  # plain tuples, transposed into columns
+    rows = cursor.execute(f"SELECT {', '.join(names)} FROM trades").fetchall()
+    deltas = {}
+    if rows:
+        _accumulate(deltas, dict(zip(names, zip(*rows))))
+    with conn:
+        conn.execute("DELETE FROM aggregates")
+        _apply_deltas(conn, deltas)
+
+
+def get_aggregates(conn: sqlite3.Connection, scope: str) -> list:
+    """Precomputed rows for one scope ('total', 'strategy' or 'month'), ordered by key"""
+    return conn.execute(
+        "SELECT * FROM aggregates WHERE scope = ? ORDER BY key, symbol, base_currency", (scope,)
+    ).fetchall()
+
+
+def query_trades(conn: sqlite3.Connection, since: str = None, until: str = None,
+                 action: str = None, symbol: str = None, limit: int = None, offset: int = 0,
+                 newest_first: bool = False) -> list:
+    """Trades in time order, optionally filtered by an ISO time range, action or symbol and paginated"""
+    clauses, params = [], []
+    if since:
+        clauses.append("datetime_utc >= ?")
+        params.append(since)
+    if until:
+        clauses.append("datetime_utc < ?")
+        params.append(until)
+    if action:
+        clauses.append("action = ?")
+        params.append(action)
+    if symbol:
+        clauses.append("symbol = ?")
+        params.append(symbol)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    order = "DESC" if newest_first else "ASC"
+    sql = f"SELECT * FROM trades {where} ORDER BY datetime_utc {order}, id {order}"
+    if limit is not None:
+        sql += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+    return conn.execute(sql, params).fetchall()
+
+
+def export_csv(path, conn: sqlite3.Connection = None) -> int:
+    """Write the ledger in the legacy history.csv layout; returns rows written"""
+    own = conn is None
+    conn = conn or connect()
+    try:
+        rows = conn.execute(f"SELECT {', '.join(CSV_COLUMNS)} FROM trades ORDER BY datetime_utc, id")
+        count = 0
+        with open(path, mode="w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS)
+            for row in rows:
+                writer.writerow(["" if v is None else v for v in row])
+                count += 1
+        return count
+    finally:
+        if own:
+            conn.close()
+
+
+def import_csv(path, conn: sqlite3.Connection = None) -> int:
+    """Load a legacy history.csv into the ledger in one batch; returns rows added"""
+    with open(path, mode="r", newline="") as f:
+        rows = [{c: (row.get(c) or None) for c in CSV_COLUMNS} for row in csv.DictReader(f)]
+    return insert_trades(rows, conn)
@@ -1,31 +1,28 @@
-import csv
-from pathlib import Path
 from datetime import datetime, timezone
+from src.utils.ledger import insert_trades
 
-CSV_FILE = Path("history.csv")
-
-def log_trade(action, symbol, base_amount, btc_qty, price, fee, dip_price=None, dip_qty=None, base_before=None, base_after=None, btc_before=None, btc_after=None, base_currency="EUR"):
+def log_trade(action, symbol, base_amount, btc_qty, price, fee, dip_price=None, dip_qty=None, base_before=None, base_after=None, btc_before=None, btc_after=None, base_currency="EUR", order_id=None, trade_id=None, execution=None):
     """
-    Append a row to history.csv with all relevant data
+    Record a trade in the ledger with all relevant data.
+    Rows with an order_id (and trade_id for individual fills) are only stored once.
+    execution: optional {execution_mode, arrival_price, vwap, slippage_bps} of the purchase.
     """
-    # create file with headers if not exists
-    if not CSV_FILE.exists():
-        with open(CSV_FILE, mode="w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                "datetime_utc", "action", "symbol", "base_currency",
-                "base_amount", "btc_qty", "avg_price", "fee",
-                "dip_price", "dip_qty",
-                "base_before", "base_after", "btc_before", "btc_after"
-            ])
-
-    # write new row
-    with open(CSV_FILE, mode="a", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([
-            datetime.now(timezone.utc).isoformat(),
-            action, symbol, base_currency,
-            base_amount, btc_qty, price, fee,
-            dip_price, dip_qty,
-            base_before, base_after, btc_before, btc_after
-        ])
+    return insert_trades([{
+        "datetime_utc": datetime.now(timezone.utc).isoformat(),
+        "action": action,
+        "symbol": symbol,
+        "base_currency": base_currency,
+        "base_amount": base_amount,
+        "btc_qty": btc_qty,
+        "avg_price": price,
+        "fee": fee,
+        "dip_price": dip_price,
+        "dip_qty": dip_qty,
+        "base_before": base_before,
+        "base_after": base_after,
+        "btc_before": btc_before,
+        "btc_after": btc_after,
+        "order_id": order_id,
+        "trade_id": trade_id,
+        **(execution or {}),
+    }]) > 0
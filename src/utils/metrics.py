@@ -0,0 +1,164 @@
+"""
+Process-wide latency and counter metrics.
+
+    with timed("api.GET /api/v3/account"):
+        ...
+
+    phases = PhaseTimer("simple_dca")
+    ...                    # balances
+    phases.lap("balances")
+    ...                    # order
+    phases.lap("order")
+
+Timings keep the last MAX_SAMPLES durations per name for p50/p95/p99;
+counters (request weight, bytes, ...) only accumulate. When METRICS_FILE is
+set, everything is written there at exit: Prometheus textfile format for a
+.prom path (node_exporter's textfile collector), JSON otherwise.
+"""
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from config.settings import METRICS_FILE
+
+MAX_SAMPLES = 10_000
+QUANTILES = (0.5, 0.95, 0.99)
+
+_timings = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+_totals = defaultdict(lambda: [0, 0.0])  # name -> [count, seconds], not capped like the samples
+_counters = defaultdict(float)
+_gauges = {}
+_lock = threading.Lock()
+
+
+def observe(name: str, seconds: float):
+    with _lock:
+        _timings[name].append(seconds)
+        total = _totals[name]
+        total[0] += 1
+        total[1] += seconds
+
+
+def count(name: str, value: float = 1):
+    with _lock:
+        _counters[name] += value
+
+
+def gauge(name: str, value: float):
+    with _lock:
+        _gauges[name] = value
+
+
+@contextmanager
+def timed(name: str):
+    """Record how long the block takes, also when it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+class PhaseTimer:
+    """Times consecutive phases of a run: each lap() records the time since the previous one"""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.started = self.last = time.perf_counter()
+
+    def lap(self, phase: str):
+        now = time.perf_counter()
+        observe(f"{self.prefix}.{phase}", now - self.last)
+        self.last = now
+
+    def done(self):
+        observe(f"{self.prefix}.total", time.perf_counter() - self.started)
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summary() -> dict:
+    """{"timings": {name: {count, sum, p50, p95, p99, max}}, "counters": {...}, "gauges": {...}}"""
+    with _lock:
+        samples = {name: sorted(values) for name, values in _timings.items()}
+        totals = {name: list(total) for name, total in _totals.items()}
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+    timings = {}
+    for name, values in samples.items():
+        stats = {"count": totals[name][0], "sum": totals[name][1], "max": values[-1] if values else 0.0}
+        for q in QUANTILES:
+            stats[f"p{round(q * 100)}"] = percentile(values, q)
+        timings[name] = stats
+    return {"timings": timings, "counters": counters, "gauges": gauges}
+
+
+def reset():
+    with _lock:
+        _timings.clear()
+        _totals.clear()
+        _counters.clear()
+        _gauges.clear()
+
+
+def _prom_name(name: str) -> str:
+    return "autoinvest_" + "".join(c if c.isalnum() else "_" for c in name).strip("_").lower()
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def to_prometheus(data: dict = None) -> str:
+    """Render a summary() in the Prometheus text exposition format"""
+    data = data or summary()
+    lines = ["# TYPE autoinvest_duration_seconds summary"]
+    for name, stats in sorted(data["timings"].items()):
+        label = f'name="{_escape(name)}"'
+        for q in QUANTILES:
+            lines.append(f'autoinvest_duration_seconds{{{label},quantile="{q}"}} {stats[f"p{round(q * 100)}"]:.6f}')
+        lines.append(f"autoinvest_duration_seconds_sum{{{label}}} {stats['sum']:.6f}")
+        lines.append(f"autoinvest_duration_seconds_count{{{label}}} {stats['count']}")
+    for name, value in sorted(data["counters"].items()):
+        metric = _prom_name(name) + "_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value:g}"]
+    for name, value in sorted(data["gauges"].items()):
+        metric = _prom_name(name)
+        lines += [f"# TYPE {metric} gauge", f"{metric} {value:g}"]
+    return "\n".join(lines) + "\n"
+
+
+def export(path: str):
+    """Write the metrics to path atomically, Prometheus format for *.prom, JSON otherwise"""
+    data = summary()
+    content = to_prometheus(data) if path.endswith(".prom") else json.dumps(data, indent=2)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(content)
+    os.replace(tmp, path)
+
+
+def print_summary(data: dict = None):
+    data = data or summary()
+    print(f"{'phase':<40} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, stats in sorted(data["timings"].items()):
+        print(f"{name:<40} {stats['count']:>7} {stats['p50'] * 1000:>9.3f} {stats['p95'] * 1000:>9.3f} "
+              f"{stats['p99'] * 1000:>9.3f} {stats['max'] * 1000:>9.3f}")
+    for name, value in sorted(data["counters"].items()):
+        print(f"{name:<40} {value:>7g}")
+
+
+if METRICS_FILE:
+    atexit.register(lambda: export(METRICS_FILE) if _totals or _counters else None)
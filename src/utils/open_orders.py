@@ -0,0 +1,213 @@
+"""
+Open order management across every configured account and symbol.
+
+Open orders are listed with one request per (account, symbol) pair, all run
+concurrently. By default the pairs are the TRADING_PAIR plus every PORTFOLIO
+allocation. Orders can be filtered by side, price band, age and client order
+id prefix before they are printed (as a table or as JSON) or cancelled.
+
+When the selection is every open order of a symbol (e.g. clearing a dip
+ladder), the whole symbol is cancelled with a single cancel_open_orders
+(DELETE /openOrders) request instead of one cancel per order. An order
+placed between the listing and that request is cancelled too. Partial
+selections are cancelled one by one. --dry-run prints the plan and sends
+nothing.
+
+    autoinvest orders --side BUY --older-than 86400 --json
+    autoinvest cancel --symbol BTCEUR --prefix ladder --dry-run
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from datetime import datetime, timezone
+
+from src.utils.client import DEFAULT_ACCOUNT, exchange_time, get_client
+from config.settings import TRADING_PAIR, PORTFOLIO, PORTFOLIO_MAX_WORKERS
+
+TABLE_COLUMNS = ("account", "symbol", "orderId", "side", "type", "price", "origQty", "executedQty",
+                 "age", "clientOrderId")
+
+
+def configured_targets() -> list:
+    """(account, symbol) of the TRADING_PAIR and every PORTFOLIO allocation, without repeats"""
+    targets = [(DEFAULT_ACCOUNT, TRADING_PAIR)]
+    for account, symbol, _, _ in PORTFOLIO:
+        if (account, symbol) not in targets:
+            targets.append((account, symbol))
+    return targets
+
+
+def _fetch(target: tuple):
+    account, symbol = target
+    try:
+        orders = get_client(account).get_open_orders(symbol=symbol)
+    except Exception as e:
+        return target, [], e
+    return target, [dict(order, account=account) for order in orders], None
+
+
+def fetch_open_orders(targets: list) -> list:
+    """Open orders of every (account, symbol), fetched concurrently, each tagged with its account"""
+    with ThreadPoolExecutor(max_workers=PORTFOLIO_MAX_WORKERS) as pool:
+        results = list(pool.map(_fetch, targets))
+    orders = []
+    for (account, symbol), found, error in results:
+        if error is not None:
+            print(f"Could not list {account}/{symbol}: {error}")
+        orders.extend(found)
+    return orders
+
+
+def filter_orders(orders: list, side: str = None, min_price=None, max_price=None,
+                  older_than: float = None, newer_than: float = None, prefix: str = None,
+                  now: float = None) -> list:
+    """
+    Orders matching every given filter. Prices are limit prices in quote
+    currency, ages are seconds since the order was placed (now: epoch
+    seconds, default the exchange clock).
+    """
+    if now is None:
+        now = exchange_time(get_client())
+    selected = []
+    for order in orders:
+        price = Decimal(order["price"])
+        age = now - order["time"] / 1000
+        if side is not None and order["side"] != side:
+            continue
+        if min_price is not None and price < Decimal(str(min_price)):
+            continue
+        if max_price is not None and price > Decimal(str(max_price)):
+            continue
+        if older_than is not None and age < older_than:
+            continue
+        if newer_than is not None and age > newer_than:
+            continue
+        if prefix is not None and not order["clientOrderId"].startswith(prefix):
+            continue
+        selected.append(order)
+    return selected
+
+
+def cancel_orders(selected: list, open_orders: list, dry_run: bool = False) -> list:
+    """
+    Cancel the selected orders; returns one result per request:
+    {"account", "symbol", "request", "orders": [order ids], "error"}.
+    """
+    # Imported here: parsing the command line shouldn't load the connector
+    from binance.error import ClientError
+
+    groups = {}
+    for order in selected:
+        groups.setdefault((order["account"], order["symbol"]), []).append(order)
+
+    results = []
+    for (account, symbol), orders in groups.items():
+        client = get_client(account)
+        listed = {o["orderId"] for o in open_orders if o["account"] == account and o["symbol"] == symbol}
+        if {o["orderId"] for o in orders} == listed:
+            # Everything open on the symbol: one request
+            result = {"account": account, "symbol": symbol, "request": "cancel_open_orders",
+                      "orders": [o["orderId"] for o in orders], "error": None}
+            if not dry_run:
+                try:
+                    client.cancel_open_orders(symbol=symbol)
+                except ClientError as e:
+                    result["error"] = e.error_message
+            results.append(result)
+            continue
+        for order in orders:
+            result = {"account": account, "symbol": symbol, "request": "cancel_order",
+                      "orders": [order["orderId"]], "error": None}
+            if not dry_run:
+                try:
+                    client.cancel_order(symbol=symbol, orderId=order["orderId"])
+                except ClientError as e:
+                    # -2011: filled or cancelled since it was listed
+                    result["error"] = e.error_message
+            results.append(result)
+    return results
+
+
+def _age(seconds: float) -> str:
+    seconds = max(int(seconds), 0)
+    if seconds >= 86400:
+        return f"{seconds // 86400}d{seconds % 86400 // 3600}h"
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60}m"
+    return f"{seconds // 60}m{seconds % 60}s"
+
+
+def format_table(orders: list, now: float) -> str:
+    rows = [[str(order.get(column, "")) for column in TABLE_COLUMNS[:-2]]
+            + [_age(now - order["time"] / 1000), order["clientOrderId"]] for order in orders]
+    widths = [max([len(column)] + [len(row[i]) for row in rows]) for i, column in enumerate(TABLE_COLUMNS)]
+    lines = [TABLE_COLUMNS, ["-" * width for width in widths]] + rows
+    return "\n".join("  ".join(value.ljust(width) for value, width in zip(line, widths)).rstrip()
+                     for line in lines)
+
+
+# ----- command line (autoinvest orders / cancel) -----
+
+def add_arguments(parser, cancel: bool = False):
+    parser.add_argument("--symbol", action="append", help="symbol to include (repeatable, default: "
+                        "TRADING_PAIR and every PORTFOLIO symbol)")
+    parser.add_argument("--account", default=None, help=f"only this account (default: every configured one, "
+                        f"'{DEFAULT_ACCOUNT}' with --symbol)")
+    parser.add_argument("--side", type=str.upper, choices=("BUY", "SELL"), help="only buy or sell orders")
+    parser.add_argument("--min-price", type=Decimal, help="only orders priced at or above this")
+    parser.add_argument("--max-price", type=Decimal, help="only orders priced at or below this")
+    parser.add_argument("--older-than", type=float, metavar="SECONDS", help="only orders older than this")
+    parser.add_argument("--newer-than", type=float, metavar="SECONDS", help="only orders newer than this")
+    parser.add_argument("--prefix", help="only client order ids starting with this (e.g. ladder)")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    if cancel:
+        parser.add_argument("--dry-run", action="store_true", help="show what would be cancelled, send nothing")
+
+
+def _targets(args) -> list:
+    if args.symbol:
+        return [(args.account or DEFAULT_ACCOUNT, symbol) for symbol in args.symbol]
+    targets = configured_targets()
+    if args.account:
+        targets = [target for target in targets if target[0] == args.account]
+    return targets
+
+
+def _select(args):
+    open_orders = fetch_open_orders(_targets(args))
+    now = exchange_time(get_client())
+    selected = filter_orders(open_orders, side=args.side, min_price=args.min_price, max_price=args.max_price,
+                             older_than=args.older_than, newer_than=args.newer_than, prefix=args.prefix, now=now)
+    return open_orders, selected, now
+
+
+def run_list(args):
+    open_orders, selected, now = _select(args)
+    if args.json:
+        print(json.dumps(selected, indent=2, default=str))
+        return
+    print("========== OPEN ORDERS ==========")
+    print("Datetime (UTC):", datetime.now(timezone.utc).isoformat())
+    if selected:
+        print(format_table(selected, now))
+    print(f"{len(selected)} of {len(open_orders)} open orders")
+    print("=================================")
+
+
+def run_cancel(args):
+    open_orders, selected, now = _select(args)
+    results = cancel_orders(selected, open_orders, dry_run=args.dry_run)
+    if args.json:
+        print(json.dumps({"dry_run": args.dry_run, "results": results}, indent=2, default=str))
+        return
+    print(f"========== CANCEL ORDERS{' (DRY RUN)' if args.dry_run else ''} ==========")
+    if not selected:
+        print("No matching open orders")
+    else:
+        print(format_table(selected, now))
+    for result in results:
+        status = "would cancel" if args.dry_run else ("FAILED: " + result["error"] if result["error"] else "cancelled")
+        print(f"{result['account']}/{result['symbol']}: {result['request']} "
+              f"({len(result['orders'])} orders) {status}")
+    print(f"{len(results)} requests for {len(selected)} orders")
+    print("=======================================")
@@ -0,0 +1,299 @@
+"""
+Local order book built from the Binance @depth diff stream.
+
+Follows the documented sync: buffer the diff events, fetch a REST snapshot,
+drop events older than its lastUpdateId, then apply events in update id
+order (the first one must straddle the snapshot, U <= lastUpdateId + 1 <= u,
+each later one start right after the previous u). A gap in the ids (or a
+dropped socket) triggers a fresh snapshot, so consumers only ever read a
+consistent book and never call depth themselves.
+
+Each side keeps its price levels in a sorted list: finding a level is a
+binary search, adding or removing one an O(n) memmove of the list (cheap
+at a few thousand levels). Cost-to-fill uses prefix sums of quantity and
+quote value from the best price down; an update only truncates them at its
+level and a query extends them as deep as it needs, so an estimate costs a
+binary search plus the levels changed since the last one within its depth.
+"""
+import json
+import threading
+from bisect import bisect_left
+from decimal import Decimal
+
+from binance.websocket.spot.websocket_stream import SpotWebsocketStreamClient
+
+from config.settings import STREAM_URL, ORDER_BOOK_DEPTH_LIMIT
+
+ZERO = Decimal("0")
+
+
+class BookSide:
+    """Price levels of one side; the best price comes first"""
+
+    def __init__(self, descending: bool):
+        self.descending = descending
+        self._keys = []       # ascending sort keys: -price for bids, price for asks
+        self._qty = {}        # key -> quantity
+        self._cum_qty = []    # prefix sums over the first levels, valid as far as they go
+        self._cum_quote = []
+
+    def _key(self, price: Decimal) -> Decimal:
+        return -price if self.descending else price
+
+    def _price(self, key: Decimal) -> Decimal:
+        return -key if self.descending else key
+
+    def __len__(self):
+        return len(self._keys)
+
+    def clear(self):
+        self._keys.clear()
+        self._qty.clear()
+        self._cum_qty.clear()
+        self._cum_quote.clear()
+
+    def set(self, price: Decimal, qty: Decimal):
+        """Set the quantity at a price level; zero removes the level"""
+        key = self._key(price)
+        index = bisect_left(self._keys, key)
+        if qty == 0:
+            if key not in self._qty:
+                return
+            del self._qty[key]
+            del self._keys[index]
+        else:
+            if key not in self._qty:
+                self._keys.insert(index, key)
+            self._qty[key] = qty
+        # Sums of the levels before this one still hold
+        del self._cum_qty[index:]
+        del self._cum_quote[index:]
+
+    def best(self):
+        """(price, qty) of the best level, or None when empty"""
+        if not self._keys:
+            return None
+        key = self._keys[0]
+        return self._price(key), self._qty[key]
+
+    def levels(self, count: int) -> list:
+        return [(self._price(key), self._qty[key]) for key in self._keys[:count]]
+
+    def _sums(self, quote_amount: Decimal):
+        """Prefix sums extended until they cover quote_amount (or the whole side)"""
+        cum_qty, cum_quote = self._cum_qty, self._cum_quote
+        while len(cum_quote) < len(self._keys) and (not cum_quote or cum_quote[-1] < quote_amount):
+            key = self._keys[len(cum_quote)]
+            qty = self._qty[key]
+            cum_qty.append((cum_qty[-1] if cum_qty else ZERO) + qty)
+            cum_quote.append((cum_quote[-1] if cum_quote else ZERO) + qty * self._price(key))
+        return cum_qty, cum_quote
+
+    def fill_quote(self, quote_amount: Decimal):
+        """(qty, worst price) to trade quote_amount against this side, or None if it isn't deep enough"""
+        cum_qty, cum_quote = self._sums(quote_amount)
+        if not cum_quote or quote_amount > cum_quote[-1]:
+            return None
+        i = bisect_left(cum_quote, quote_amount)  # first level that completes the amount
+        qty_before = cum_qty[i - 1] if i else ZERO
+        quote_before = cum_quote[i - 1] if i else ZERO
+        price = self._price(self._keys[i])
+        return qty_before + (quote_amount - quote_before) / price, price
+
+
+class LocalOrderBook:
+    """Order book of one symbol kept in sync from the diff depth stream"""
+
+    def __init__(self, symbol: str, client, stream_url: str = STREAM_URL,
+                 depth_limit: int = ORDER_BOOK_DEPTH_LIMIT, max_backoff: float = 60.0):
+        self.symbol = symbol
+        self.client = client
+        self.stream_url = stream_url
+        self.depth_limit = depth_limit
+        self.max_backoff = max_backoff
+
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.last_update_id = None
+        self.synced = False
+        self._bridged = False  # an event was applied on top of the current snapshot
+
+        self._buffer = []  # diff events received while not synced
+        self._lock = threading.Lock()
+        self._ws = None
+        self._wake = threading.Event()          # disconnect or gap: the supervisor resyncs
+        self._disconnected = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    # ----- public API -----
+
+    def start(self):
+        """Connect, load the snapshot and supervise the stream in the background"""
+        self._connect()
+        self.resync()
+        self._thread = threading.Thread(target=self._supervise, name=f"order-book-{self.symbol}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+        if self._ws is not None:
+            self._ws.stop()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def best_bid(self):
+        with self._lock:
+            return self.bids.best() if self.synced else None
+
+    def best_ask(self):
+        with self._lock:
+            return self.asks.best() if self.synced else None
+
+    def mid(self):
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return (bid[0] + ask[0]) / 2
+
+    def spread(self):
+        """(absolute spread, spread in bps of the mid), or None while not synced"""
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        mid = (bid[0] + ask[0]) / 2
+        return ask[0] - bid[0], (ask[0] - bid[0]) / mid * 10000
+
+    def cost_to_fill(self, quote_amount, side: str = "BUY"):
+        """
+        Estimated market order of quote_amount against the current book:
+        {"qty", "avg_price", "worst_price", "slippage_bps"} (slippage against
+        the mid, positive = worse), or None while not synced or too thin.
+        """
+        quote_amount = Decimal(str(quote_amount))
+        with self._lock:
+            if not self.synced:
+                return None
+            book_side = self.asks if side == "BUY" else self.bids
+            fill = book_side.fill_quote(quote_amount)
+            bid, ask = self.bids.best(), self.asks.best()
+        if fill is None or bid is None or ask is None:
+            return None
+        qty, worst = fill
+        avg_price = quote_amount / qty
+        mid = (bid[0] + ask[0]) / 2
+        slippage = (avg_price - mid) / mid * 10000
+        return {"qty": qty, "avg_price": avg_price, "worst_price": worst,
+                "slippage_bps": slippage if side == "BUY" else -slippage}
+
+    def resync(self):
+        """Load a REST snapshot and replay the buffered diffs on top of it"""
+        snapshot = self.client.depth(symbol=self.symbol, limit=self.depth_limit)
+        with self._lock:
+            last_update_id = snapshot["lastUpdateId"]
+            pending = [e for e in self._buffer if e["u"] > last_update_id]
+            if pending and pending[0]["U"] > last_update_id + 1:
+                # Snapshot older than the first buffered event: stay unsynced, try again
+                self._wake.set()
+                return
+            self.bids.clear()
+            self.asks.clear()
+            for price, qty in snapshot["bids"]:
+                self.bids.set(Decimal(price), Decimal(qty))
+            for price, qty in snapshot["asks"]:
+                self.asks.set(Decimal(price), Decimal(qty))
+            self.last_update_id = last_update_id
+            self._bridged = False
+            for event in pending:
+                if not self._continues(event):
+                    print(f"Order book gap for {self.symbol} while replaying the buffer, resyncing")
+                    self._wake.set()
+                    return
+                self._apply(event)
+            self._buffer = []
+            self.synced = True
+
+    # ----- stream handling -----
+
+    def _connect(self):
+        if self._ws is not None:
+            self._ws.stop()
+        self._disconnected.clear()
+        with self._lock:
+            self.synced = False
+            self._buffer = []
+        self._ws = SpotWebsocketStreamClient(
+            stream_url=self.stream_url,
+            on_message=self._handle_message,
+            on_close=self._handle_close,
+            on_error=self._handle_error,
+            is_combined=True,
+        )
+        self._ws.diff_book_depth(symbol=self.symbol, speed=100)
+
+    def _supervise(self):
+        """Reconnect after drops and resync after gaps, with exponential backoff"""
+        backoff = 1.0
+        while not self._stopping.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            if self._stopping.is_set():
+                break
+            try:
+                if self._disconnected.is_set():
+                    print(f"Depth stream for {self.symbol} disconnected, reconnecting in {backoff:.0f}s")
+                    if self._stopping.wait(backoff):
+                        break
+                    self._connect()
+                self.resync()
+                backoff = 1.0
+            except Exception as e:
+                print(f"Order book resync failed: {e}")
+                self._disconnected.set()
+                self._wake.set()
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def _handle_message(self, _, message):
+        payload = json.loads(message)
+        data = payload.get("data", payload)
+        if data.get("e") != "depthUpdate":
+            return
+        with self._lock:
+            if not self.synced:
+                self._buffer.append(data)
+                return
+            if data["u"] <= self.last_update_id:
+                return
+            if not self._continues(data):
+                print(f"Order book gap for {self.symbol} ({self.last_update_id} -> {data['U']}), resyncing")
+                self.synced = False
+                self._buffer = [data]
+                self._wake.set()
+                return
+            self._apply(data)
+
+    def _continues(self, event: dict) -> bool:
+        """The event follows the book: the first one straddles the snapshot, later ones are contiguous"""
+        if self._bridged:
+            return event["U"] == self.last_update_id + 1
+        return event["U"] <= self.last_update_id + 1 <= event["u"]
+
+    def _apply(self, event: dict):
+        for price, qty in event["b"]:
+            self.bids.set(Decimal(price), Decimal(qty))
+        for price, qty in event["a"]:
+            self.asks.set(Decimal(price), Decimal(qty))
+        self.last_update_id = event["u"]
+        self._bridged = True
+
+    def _handle_close(self, manager):
+        if self._ws is None or manager is not self._ws.socket_manager:
+            return  # a socket we already replaced
+        if not self._stopping.is_set():
+            self._disconnected.set()
+            self._wake.set()
+
+    def _handle_error(self, manager, error):
+        print(f"Depth stream error for {self.symbol}: {error}")
+        self._handle_close(manager)
@@ -0,0 +1,304 @@
+"""
+Write-ahead order journal: idempotent order submission.
+
+Every order a strategy intends to place gets a deterministic client order id
+(strategy, symbol and schedule slot, e.g. simple_dca-BTCEUR-2510171700) and is
+written to the journal *before* it is sent. Binance only rejects duplicate
+client ids among open orders, so a market order that already filled would
+happily be placed twice; instead, whenever the outcome is unknown (timeout,
+5xx, crash, rerun of the same slot) the order is looked up by
+origClientOrderId and its fills rebuilt from my_trades before anything is
+resent. That makes short timeouts and fast retries safe.
+
+Entry status: pending (written, outcome unknown) -> acked (the exchange has
+it) -> done (logged to the ledger); failed (rejected, or never reached the
+exchange).
+
+A purchase split into several orders (see src/utils/execution.py) journals
+each one as a child of the strategy's intent: children stay acked until the
+whole purchase is logged, so a rerun of the slot resumes it where it stopped.
+"""
+import hashlib
+import json
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from binance.error import ClientError, ServerError
+
+from src.utils.accounting import Fills
+from src.utils.client import account_name, exchange_time
+from src.utils.exchange_filters import split_symbol
+from src.utils.ledger import connect
+from src.utils.logger import log_trade
+from config.settings import LEDGER_FILE, ORDER_SLOT_SECONDS, ORDER_SUBMIT_RETRIES
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS order_journal (
+    account         TEXT NOT NULL,
+    client_order_id TEXT NOT NULL,
+    strategy        TEXT NOT NULL,
+    symbol          TEXT NOT NULL,
+    status          TEXT NOT NULL,  -- pending, acked, done or failed
+    slot            INTEGER,        -- start of the schedule slot (epoch seconds)
+    request         TEXT,           -- new_order parameters (JSON)
+    response        TEXT,           -- order with fills (JSON)
+    error           TEXT,
+    created_at      TEXT NOT NULL,
+    updated_at      TEXT NOT NULL,
+    PRIMARY KEY (account, client_order_id)
+);
+CREATE INDEX IF NOT EXISTS idx_order_journal_status ON order_journal (status);
+"""
+MAX_CLIENT_ORDER_ID = 36  # Binance limit
+UNKNOWN_STATUS_CODES = {-1006, -1007}  # "unexpected response" / "timeout, send status unknown"
+
+_schema_ready = set()
+
+
+def _connect():
+    conn = connect()
+    if LEDGER_FILE not in _schema_ready:
+        conn.executescript(SCHEMA)
+        _schema_ready.add(LEDGER_FILE)
+    # An intent that isn't on disk when the order goes out defeats the journal
+    conn.execute("PRAGMA synchronous=FULL")
+    return conn
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def current_slot(client) -> int:
+    """Start of the schedule slot the client is in (epoch seconds)"""
+    # The paper exchange runs on simulated time, so its slots must too
+    return int(exchange_time(client) // ORDER_SLOT_SECONDS) * ORDER_SLOT_SECONDS
+
+
+def client_order_id(strategy: str, symbol: str, slot: int, *tags) -> str:
+    """Deterministic id for a strategy's order in a schedule slot"""
+    stamp = datetime.fromtimestamp(slot, timezone.utc).strftime("%y%m%d%H%M")
+    order_id = "-".join([strategy, symbol, stamp] + [tag for tag in tags if tag])
+    if len(order_id) > MAX_CLIENT_ORDER_ID:
+        # Still deterministic, just not readable
+        digest = hashlib.sha1(order_id.encode()).hexdigest()
+        order_id = f"{strategy[:11]}-{digest[:MAX_CLIENT_ORDER_ID - 12]}"
+    return order_id
+
+
+def is_journaled(account: str, client_order_id: str) -> bool:
+    """True for orders placed through the journal: their strategy logs them, not the fill listeners"""
+    conn = _connect()
+    try:
+        return conn.execute(
+            "SELECT 1 FROM order_journal WHERE account = ? AND client_order_id = ?", (account, client_order_id)
+        ).fetchone() is not None
+    finally:
+        conn.close()
+
+
+def _is_unknown_outcome(error: Exception) -> bool:
+    """True when the request may or may not have reached the matching engine"""
+    import requests
+
+    if isinstance(error, ClientError):
+        return error.error_code in UNKNOWN_STATUS_CODES
+    return isinstance(error, (ServerError, requests.exceptions.RequestException))
+
+
+def lookup_order(client, symbol: str, client_order_id: str):
+    """The order with its fills as new_order would have returned it, or None if the exchange never got it"""
+    try:
+        order = client.get_order(symbol=symbol, origClientOrderId=client_order_id)
+    except ClientError as e:
+        if e.error_code == -2013:  # Order does not exist
+            return None
+        raise
+    fills = []
+    if Decimal(order.get("executedQty", "0")) > 0:
+        fills = [{"price": t["price"], "qty": t["qty"], "commission": t["commission"],
+                  "commissionAsset": t["commissionAsset"], "tradeId": t["id"]}
+                 for t in client.my_trades(symbol=symbol, orderId=order["orderId"])]
+    return dict(order, fills=fills)
+
+
+class OrderIntent:
+    """
+    One journaled order of a strategy run:
+
+        intent = OrderIntent(client, "simple_dca", symbol)
+        if intent.done:
+            return                      # this slot already bought
+        order = intent.submit(symbol=symbol, side="BUY", type="MARKET", quoteOrderQty="62")
+        log_trade(...)
+        intent.complete()
+    """
+
+    def __init__(self, client, strategy: str, symbol: str, tag: str = None, slot: int = None):
+        self.client = client
+        self.account = account_name(client)
+        self.strategy = strategy
+        self.symbol = symbol
+        self.tag = tag
+        self.slot = current_slot(client) if slot is None else slot
+        self.client_order_id = client_order_id(strategy, symbol, self.slot, tag)
+        self.children = []
+
+    def child(self, tag: str) -> "OrderIntent":
+        """Journaled order that is part of this one, completed together with it"""
+        child = OrderIntent(self.client, self.strategy, self.symbol, slot=self.slot)
+        child.client_order_id = client_order_id(self.strategy, self.symbol, self.slot, self.tag, tag)
+        self.children.append(child)
+        return child
+
+    def _entry(self):
+        conn = _connect()
+        try:
+            return conn.execute(
+                "SELECT * FROM order_journal WHERE account = ? AND client_order_id = ?",
+                (self.account, self.client_order_id),
+            ).fetchone()
+        finally:
+            conn.close()
+
+    def _write(self, status: str, request: dict = None, response: dict = None, error: str = None):
+        conn = _connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT INTO order_journal (account, client_order_id, strategy, symbol, slot, status, request, "
+                    "response, error, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (account, client_order_id) DO UPDATE SET status = excluded.status, "
+                    "request = COALESCE(excluded.request, request), response = COALESCE(excluded.response, response), "
+                    "error = excluded.error, updated_at = excluded.updated_at",
+                    (self.account, self.client_order_id, self.strategy, self.symbol, self.slot, status,
+                     json.dumps(request) if request is not None else None,
+                     json.dumps(response) if response is not None else None,
+                     error, _now_iso(), _now_iso()),
+                )
+        finally:
+            conn.close()
+
+    @property
+    def done(self) -> bool:
+        """The order of this slot was already placed and logged by an earlier run"""
+        entry = self._entry()
+        return entry is not None and entry["status"] == "done"
+
+    @property
+    def placed(self) -> bool:
+        """The exchange already has this order (from an earlier attempt or run)"""
+        entry = self._entry()
+        return entry is not None and entry["status"] in ("acked", "done")
+
+    def submit(self, **params) -> dict:
+        """Place the order at most once per slot, whatever happened to earlier attempts"""
+        entry = self._entry()
+        if entry is not None and entry["status"] in ("acked", "done"):
+            print(f"Order {self.client_order_id} was already placed, reusing it")
+            return json.loads(entry["response"])
+        if entry is None or entry["status"] == "pending":
+            # A previous run died with the order in flight, or ran with another journal
+            # (e.g. a CI rerun that starts without data/): the exchange knows either way.
+            # Binance only rejects a duplicate client order id while the first order is open.
+            order = lookup_order(self.client, self.symbol, self.client_order_id)
+            if order is not None:
+                print(f"Order {self.client_order_id} found on the exchange, not resending")
+                self._write("acked", response=order)
+                return order
+
+        self._write("pending", request=params)
+        for attempt in range(ORDER_SUBMIT_RETRIES + 1):
+            try:
+                order = self.client.new_order(newClientOrderId=self.client_order_id,
+                                              newOrderRespType="FULL", **params)
+                self._write("acked", response=order)
+                return order
+            except Exception as e:
+                if not _is_unknown_outcome(e):
+                    self._write("failed", error=str(e))
+                    raise
+                print(f"Order {self.client_order_id} status unknown ({e}), checking the exchange")
+            time.sleep(min(2 ** attempt, 10) * 0.5)
+            order = lookup_order(self.client, self.symbol, self.client_order_id)
+            if order is not None:
+                self._write("acked", response=order)
+                return order
+        raise Exception(f"Order {self.client_order_id} status still unknown after {ORDER_SUBMIT_RETRIES} retries, "
+                        f"it stays pending and is reconciled on the next run")
+
+    def update(self, order: dict):
+        """Store the latest state of an acked order (e.g. a resting limit order that filled since)"""
+        self._write("acked", response=order)
+
+    def complete(self):
+        """Mark the order (and its children) as logged, so reruns of the slot skip it"""
+        for child in self.children:
+            child.complete()
+        self._write("done")
+
+
+def log_recovered(entry, order: dict):
+    """Ledger row for an order whose run died before logging it (balances unknown)"""
+    fills = Fills(order.get("fills", []))
+    log_trade(
+        action=entry["strategy"],
+        symbol=entry["symbol"],
+        base_amount=fills.quote_total(),
+        btc_qty=fills.qty_total(),
+        price=fills.vwap(),
+        fee=fills.fee_total(),
+        base_currency=split_symbol(entry["symbol"])[1],
+        order_id=order["orderId"],
+    )
+
+
+def reconcile_pending(client, log=log_recovered) -> int:
+    """
+    Settle journal entries of this account left by runs of earlier slots that
+    died: pending orders are looked up on the exchange, found ones are logged
+    with log(entry, order) (the ledger dedupes by order id) and marked done,
+    missing ones failed. Entries of the current slot are left to its own
+    reruns, which resume them. Returns how many entries were settled.
+    """
+    account = account_name(client)
+    conn = _connect()
+    try:
+        entries = conn.execute(
+            "SELECT * FROM order_journal WHERE account = ? AND status IN ('pending', 'acked') "
+            "AND COALESCE(slot, 0) < ? ORDER BY created_at",
+            (account, current_slot(client)),
+        ).fetchall()
+    finally:
+        conn.close()
+
+    settled = 0
+    for entry in entries:
+        intent = OrderIntent(client, entry["strategy"], entry["symbol"], slot=entry["slot"] or 0)
+        intent.client_order_id = entry["client_order_id"]
+
+        if entry["status"] == "pending":
+            order = lookup_order(client, entry["symbol"], entry["client_order_id"])
+            if order is None:
+                intent._write("failed", error="not found on the exchange")
+                settled += 1
+                continue
+        else:
+            order = json.loads(entry["response"])
+        if order.get("status") in ("NEW", "PARTIALLY_FILLED"):
+            # A resting child order: cancel what is left, keep what filled
+            try:
+                client.cancel_order(symbol=entry["symbol"], origClientOrderId=entry["client_order_id"])
+            except ClientError as e:
+                if e.error_code != -2011:  # already filled or cancelled
+                    raise
+            order = lookup_order(client, entry["symbol"], entry["client_order_id"])
+        intent.update(order)
+
+        print(f"Recovered order {entry['client_order_id']} ({order.get('status')})")
+        if order.get("fills"):
+            log(entry, order)
+        intent.complete()
+        settled += 1
+    return settled
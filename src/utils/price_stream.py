@@ -0,0 +1,170 @@
+"""
+Streaming price view built on the Binance @ticker and @kline_1m streams.
+
+PriceFeed keeps the latest price, 24h change and a rolling window of closed
+1m candles in memory. When the socket drops it reconnects with backoff and
+backfills the gap over REST (one ticker_24hr call plus the missing klines),
+so consumers never have to poll the API themselves.
+"""
+import json
+import threading
+import time
+from collections import deque
+from decimal import Decimal
+
+from binance.websocket.spot.websocket_stream import SpotWebsocketStreamClient
+
+from config.settings import STREAM_URL
+
+KLINE_INTERVAL_MS = 60 * 1000
+MAX_CANDLES = 24 * 60  # one day of 1m candles
+KLINES_PAGE = 1000     # klines per REST request (the API maximum)
+
+
+class PriceFeed:
+    """Rolling in-memory price view for one symbol"""
+
+    def __init__(self, symbol: str, client, on_update=None, stream_url: str = STREAM_URL,
+                 max_backoff: float = 60.0):
+        self.symbol = symbol
+        self.client = client
+        self.on_update = on_update
+        self.stream_url = stream_url
+        self.max_backoff = max_backoff
+
+        self.last_price = None
+        self.price_change_percent = None
+        self.updated_at = None
+        self.candles = deque(maxlen=MAX_CANDLES)  # (open_time_ms, close) of closed candles
+
+        self._lock = threading.Lock()
+        self._ws = None
+        self._disconnected = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    # ----- public API -----
+
+    def start(self):
+        """Backfill over REST, connect and supervise the stream in the background"""
+        self.backfill()
+        self._connect()
+        self._thread = threading.Thread(target=self._supervise, name=f"price-feed-{self.symbol}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._disconnected.set()
+        if self._ws is not None:
+            self._ws.stop()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def snapshot(self) -> dict:
+        """Latest view in the same shape as a ticker_24hr response"""
+        with self._lock:
+            return {
+                "symbol": self.symbol,
+                "lastPrice": str(self.last_price),
+                "priceChangePercent": str(self.price_change_percent),
+            }
+
+    def backfill(self):
+        """Refresh the 24h ticker and fetch the closed candles missed while offline"""
+        ticker = self.client.ticker_24hr(symbol=self.symbol)
+        now_ms = int(time.time() * 1000)
+        # Only the last MAX_CANDLES are kept, older ones aren't worth fetching
+        start = now_ms - MAX_CANDLES * KLINE_INTERVAL_MS
+        with self._lock:
+            if self.candles:
+                start = max(start, self.candles[-1][0] + KLINE_INTERVAL_MS)
+        klines = []
+        while True:
+            page = self.client.klines(self.symbol, "1m", startTime=start, limit=KLINES_PAGE)
+            klines.extend(page)
+            if len(page) < KLINES_PAGE:
+                break
+            start = page[-1][0] + KLINE_INTERVAL_MS
+
+        with self._lock:
+            self.last_price = Decimal(ticker["lastPrice"])
+            self.price_change_percent = Decimal(ticker["priceChangePercent"])
+            self.updated_at = time.time()
+            for k in klines:
+                # Skip the candle that is still open, the stream delivers it on close
+                if k[6] < now_ms:
+                    self._add_candle(k[0], Decimal(k[4]))
+        self._notify()
+
+    # ----- stream handling -----
+
+    def _connect(self):
+        if self._ws is not None:
+            self._ws.stop()
+        self._disconnected.clear()
+        self._ws = SpotWebsocketStreamClient(
+            stream_url=self.stream_url,
+            on_message=self._handle_message,
+            on_close=self._handle_close,
+            on_error=self._handle_error,
+            is_combined=True,
+        )
+        self._ws.ticker(symbol=self.symbol)
+        self._ws.kline(symbol=self.symbol, interval="1m")
+
+    def _supervise(self):
+        """Reconnect with exponential backoff and backfill after every drop"""
+        backoff = 1.0
+        while not self._stopping.is_set():
+            self._disconnected.wait()
+            if self._stopping.is_set():
+                break
+            print(f"Price stream for {self.symbol} disconnected, reconnecting in {backoff:.0f}s")
+            if self._stopping.wait(backoff):
+                break
+            try:
+                self._connect()
+                self.backfill()
+                backoff = 1.0
+            except Exception as e:
+                print(f"Price stream reconnect failed: {e}")
+                self._disconnected.set()
+                backoff = min(backoff * 2, self.max_backoff)
+
+    def _handle_message(self, _, message):
+        payload = json.loads(message)
+        data = payload.get("data", payload)
+        event = data.get("e")
+
+        if event == "24hrTicker":
+            with self._lock:
+                self.last_price = Decimal(data["c"])
+                self.price_change_percent = Decimal(data["P"])
+                self.updated_at = data["E"] / 1000
+            self._notify()
+        elif event == "kline":
+            kline = data["k"]
+            with self._lock:
+                self.last_price = Decimal(kline["c"])
+                self.updated_at = data["E"] / 1000
+                if kline["x"]:
+                    self._add_candle(kline["t"], Decimal(kline["c"]))
+
+    def _handle_close(self, manager):
+        if self._ws is None or manager is not self._ws.socket_manager:
+            return  # a socket we already replaced
+        if not self._stopping.is_set():
+            self._disconnected.set()
+
+    def _handle_error(self, manager, error):
+        print(f"Price stream error for {self.symbol}: {error}")
+        self._handle_close(manager)
+
+    def _add_candle(self, open_time: int, close: Decimal):
+        if self.candles and open_time <= self.candles[-1][0]:
+            return
+        self.candles.append((open_time, close))
+
+    def _notify(self):
+        if self.on_update is not None and self.price_change_percent is not None:
+            self.on_update(self)
@@ -0,0 +1,221 @@
+"""
+Client-side request-weight limiter for the Binance Spot API.
+
+RateLimitedSpot is a drop-in binance.spot.Spot that:
+- charges every request its endpoint weight against a token bucket shared by
+  all processes on this host (state file + flock under DATA_DIR), with a
+  second bucket for the 10s order count;
+- re-syncs the buckets from the X-MBX-USED-WEIGHT-1M / X-MBX-ORDER-COUNT-10S
+  response headers, so other users of the same IP are accounted for;
+- on 429/418 blocks every process until Retry-After, then retries with
+  jittered exponential backoff (those responses mean the request was rejected,
+  never executed, so retrying is safe even for orders);
+- times every call and counts weight, bytes and throttling in src/utils/metrics.
+"""
+import fcntl
+import json
+import random
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+from binance.error import ClientError
+from binance.spot import Spot
+
+from src.utils import metrics
+from config.settings import (
+    DATA_DIR, REQUEST_WEIGHT_LIMIT, ORDER_LIMIT_10S, RATE_LIMIT_SAFETY, MAX_REQUEST_RETRIES
+)
+
+# (method, path) -> weight; requests without a symbol are far heavier on some endpoints
+ENDPOINT_WEIGHTS = {
+    ("GET", "/api/v3/ping"): 1,
+    ("GET", "/api/v3/time"): 1,
+    ("GET", "/api/v3/exchangeInfo"): 20,
+    ("GET", "/api/v3/klines"): 2,
+    ("GET", "/api/v3/ticker/price"): 2,
+    ("GET", "/api/v3/ticker/bookTicker"): 2,
+    ("GET", "/api/v3/ticker/24hr"): 2,
+    ("GET", "/api/v3/account"): 20,
+    ("GET", "/api/v3/myTrades"): 20,
+    ("GET", "/api/v3/allOrders"): 20,
+    ("GET", "/api/v3/order"): 4,
+    ("GET", "/api/v3/openOrders"): 6,
+    ("POST", "/api/v3/order"): 1,
+    ("DELETE", "/api/v3/order"): 1,
+    ("DELETE", "/api/v3/openOrders"): 1,
+    ("POST", "/api/v3/order/cancelReplace"): 1,
+    ("POST", "/api/v3/userDataStream"): 2,
+    ("PUT", "/api/v3/userDataStream"): 2,
+    ("DELETE", "/api/v3/userDataStream"): 2,
+}
+NO_SYMBOL_WEIGHTS = {
+    "/api/v3/ticker/price": 4,
+    "/api/v3/ticker/bookTicker": 4,
+    "/api/v3/ticker/24hr": 80,
+    "/api/v3/openOrders": 80,
+}
+ORDER_ENDPOINTS = {("POST", "/api/v3/order"), ("POST", "/api/v3/order/cancelReplace")}
+
+def request_weight(http_method: str, url_path: str, payload: dict = None) -> int:
+    payload = payload or {}
+    if url_path in NO_SYMBOL_WEIGHTS and "symbol" not in payload and "symbols" not in payload:
+        return NO_SYMBOL_WEIGHTS[url_path]
+    if url_path == "/api/v3/depth":
+        limit = int(payload.get("limit", 100))
+        return 5 if limit <= 100 else 25 if limit <= 500 else 50 if limit <= 1000 else 250
+    return ENDPOINT_WEIGHTS.get((http_method, url_path), 1)
+
+
+class SharedLimiter:
+    """Token buckets for request weight (per minute) and orders (per 10s), shared across processes"""
+
+    def __init__(self, path: Path, weight_limit: int = REQUEST_WEIGHT_LIMIT,
+                 order_limit: int = ORDER_LIMIT_10S, safety: float = RATE_LIMIT_SAFETY):
+        self.path = path
+        self.weight_capacity = weight_limit * safety
+        self.order_capacity = order_limit * safety
+        self.weight_rate = self.weight_capacity / 60.0
+        self.order_rate = self.order_capacity / 10.0
+
+    def _update(self, change):
+        """Run change(state, now) under an exclusive lock on the shared state file"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                now = time.time()
+                state = json.loads(raw) if raw else {
+                    "weight": self.weight_capacity, "orders": self.order_capacity,
+                    "updated": now, "blocked_until": 0.0,
+                }
+                elapsed = max(0.0, now - state["updated"])
+                state["weight"] = min(self.weight_capacity, state["weight"] + elapsed * self.weight_rate)
+                state["orders"] = min(self.order_capacity, state["orders"] + elapsed * self.order_rate)
+                state["updated"] = now
+                result = change(state, now)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                return result
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def acquire(self, weight: int, orders: int = 0):
+        """Block until the request fits in both buckets, then take its cost"""
+        def take(state, now):
+            if state["blocked_until"] > now:
+                return state["blocked_until"] - now
+            if state["weight"] >= weight and state["orders"] >= orders:
+                state["weight"] -= weight
+                state["orders"] -= orders
+                return 0.0
+            weight_wait = max(0.0, weight - state["weight"]) / self.weight_rate
+            order_wait = max(0.0, orders - state["orders"]) / self.order_rate if orders else 0.0
+            return max(weight_wait, order_wait)
+
+        while True:
+            wait = self._update(take)
+            if wait <= 0:
+                return
+            metrics.count("rate_limit_throttled_seconds", wait)
+            time.sleep(wait + random.uniform(0, 0.05))
+
+    def observe(self, headers):
+        """Correct the buckets with the usage the server reports"""
+        used_weight = headers.get("x-mbx-used-weight-1m")
+        order_count = headers.get("x-mbx-order-count-10s")
+        if used_weight is None and order_count is None:
+            return
+        if used_weight is not None:
+            metrics.gauge("api_used_weight_1m", int(used_weight))
+
+        def correct(state, now):
+            if used_weight is not None:
+                state["weight"] = min(state["weight"], self.weight_capacity - int(used_weight))
+            if order_count is not None:
+                state["orders"] = min(state["orders"], self.order_capacity - int(order_count))
+
+        self._update(correct)
+
+    def block(self, seconds: float):
+        """Stop every process from sending until the server's Retry-After has passed"""
+        def set_block(state, now):
+            state["blocked_until"] = max(state["blocked_until"], now + seconds)
+            state["weight"] = 0.0
+
+        self._update(set_block)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(base_url: str) -> SharedLimiter:
+    """One limiter per API host (testnet and mainnet have separate limits)"""
+    host = urlparse(base_url).hostname or "api.binance.com"
+    with _limiters_lock:
+        if host not in _limiters:
+            _limiters[host] = SharedLimiter(Path(DATA_DIR) / f"rate_limit_{host}.json")
+        return _limiters[host]
+
+
+class RateLimitedSpot(Spot):
+    """binance.spot.Spot that respects request weight limits and backs off on 429/418"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limiter = get_limiter(self.base_url)
+
+    # Entry points: retried as a whole so signed requests get a fresh timestamp
+
+    def query(self, url_path, payload=None):
+        return self._with_retry(super().query, url_path, payload)
+
+    def limit_request(self, http_method, url_path, payload=None):
+        return self._with_retry(super().limit_request, url_path, payload, http_method)
+
+    def sign_request(self, http_method, url_path, payload=None):
+        return self._with_retry(super().sign_request, url_path, payload, http_method)
+
+    def limited_encoded_sign_request(self, http_method, url_path, payload=None):
+        return self._with_retry(super().limited_encoded_sign_request, url_path, payload, http_method)
+
+    def _with_retry(self, request, url_path, payload, http_method=None):
+        for attempt in range(MAX_REQUEST_RETRIES + 1):
+            # Signing mutates the payload, so every attempt starts from a clean copy
+            args = (url_path, dict(payload) if payload else None)
+            try:
+                return request(*args) if http_method is None else request(http_method, *args)
+            except ClientError as e:
+                if e.status_code not in (418, 429) or attempt == MAX_REQUEST_RETRIES:
+                    raise
+                metrics.count(f"api_status_{e.status_code}")
+                retry_after = float((e.header or {}).get("Retry-After", 0) or 0)
+                self.limiter.block(retry_after)
+                delay = max(retry_after, min(60.0, 2 ** attempt)) + random.uniform(0, 1)
+                print(f"Binance returned {e.status_code} on {url_path}, retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def send_request(self, http_method, url_path, payload=None):
+        weight = request_weight(http_method, url_path, payload)
+        orders = 1 if (http_method, url_path) in ORDER_ENDPOINTS else 0
+        self.limiter.acquire(weight, orders)
+        metrics.count("api_requests")
+        metrics.count("api_weight", weight)
+        with metrics.timed(f"api.{http_method} {url_path}"):
+            return super().send_request(http_method, url_path, payload)
+
+    def _dispatch_request(self, http_method):
+        send = super()._dispatch_request(http_method)
+
+        def dispatch(**params):
+            response = send(**params)
+            metrics.count("api_bytes", len(response.content))
+            self.limiter.observe({k.lower(): v for k, v in response.headers.items()})
+            return response
+
+        return dispatch
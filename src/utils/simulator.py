@@ -0,0 +1,509 @@
+"""
+Paper exchange: an in-process stand-in for binance.spot.Spot.
+
+SimulatedSpot implements the client methods the strategies, tools and
+monitoring jobs call, backed by its own balances, order book and trade list
+instead of the network. Prices come from klines in the local store
+(tools/sync_klines.py); the clock moves when advance() is called, and
+resting limit orders are matched against every candle the clock passes:
+a buy fills when the candle's low reaches its price (at the open if it gapped
+through), a sell when the high does. Market orders fill at the last close.
+
+Select it with EXCHANGE_MODE=paper; get_client() then returns one simulator
+per account, so strategies run unchanged, as fast as the CPU allows.
+Those simulators keep their clock, balances, orders and trades in a state
+file (PAPER_STATE_FILE) and their clock also follows wall time, so the next
+CLI run or daemon job sees a later slot, its resting orders matched against
+the candles in between, and order ids that carry on from the last run.
+One process at a time should use an account's state file.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from decimal import Decimal
+
+import numpy as np
+from binance.error import ClientError
+
+from src.utils.exchange_filters import SymbolFilters, InvalidOrder, split_symbol, to_str
+from src.utils.kline_store import open_klines, INTERVAL_MS
+from config.settings import PAPER_BALANCES, PAPER_FEE_RATE, PAPER_KLINE_INTERVAL, TRADING_PAIR
+
+DAY_MS = 86_400_000
+ORDER_DECIMALS = ("_price", "_qty", "_executed", "_quote")
+
+# Filters served by exchange_info(), close to Binance's BTC pairs
+PAPER_FILTERS = [
+    {"filterType": "PRICE_FILTER", "minPrice": "0.01000000", "maxPrice": "1000000.00000000", "tickSize": "0.01000000"},
+    {"filterType": "LOT_SIZE", "minQty": "0.00001000", "maxQty": "9000.00000000", "stepSize": "0.00001000"},
+    {"filterType": "MARKET_LOT_SIZE", "minQty": "0.00000000", "maxQty": "100.00000000", "stepSize": "0.00000000"},
+    {"filterType": "NOTIONAL", "minNotional": "5.00000000", "applyMinToMarket": True,
+     "maxNotional": "9000000.00000000", "applyMaxToMarket": False, "avgPriceMins": 5},
+]
+
+
+def _error(code: int, message: str):
+    return ClientError(400, code, message, {})
+
+
+def _dec(value) -> Decimal:
+    return Decimal(str(float(value)))
+
+
+def _synced(method):
+    """Bring the clock up to wall time before serving a request (simulators with a state file)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            self._catch_up()
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class SimulatedSpot:
+    """Matching simulator with the Spot client surface used in this repo"""
+
+    def __init__(self, balances: dict = None, interval: str = PAPER_KLINE_INTERVAL,
+                 fee_rate: float = PAPER_FEE_RATE, start_time: int = None, state_file: str = None):
+        self.interval = interval
+        self.step = INTERVAL_MS[interval]
+        self.fee_rate = Decimal(str(fee_rate))
+        self.now = start_time
+        self.free = {asset: Decimal(str(amount)) for asset, amount in (balances or PAPER_BALANCES).items()}
+        self.locked = {}
+        self.orders = {}      # orderId -> order
+        self.trades = []      # fills in id order
+        self._markets = {}    # symbol -> {column: array}
+        self._filters = {}
+        self._next_order_id = 1
+        self._lock = threading.RLock()  # portfolio allocations share a client across threads
+        self.state_file = state_file
+        self._wall = None     # wall time (epoch seconds) the clock was last moved to, once it follows it
+        if state_file is not None:
+            self._load()
+
+    @property
+    def simulated_time(self):
+        """Simulated clock in epoch seconds (None until there is market data to start it on)"""
+        with self._lock:
+            if self.now is None:
+                # Order slots are read before any market data: start the clock on the default pair
+                try:
+                    self._market(TRADING_PAIR)
+                except Exception:
+                    return None  # no stored klines for it, the first market data request starts the clock
+            self._catch_up()
+            return self.now / 1000
+
+    # ===== State =====
+
+    def _load(self):
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return
+        self.now, self._wall = state["now"], state["wall"]
+        self.free = {asset: Decimal(amount) for asset, amount in state["free"].items()}
+        self.locked = {asset: Decimal(amount) for asset, amount in state["locked"].items()}
+        self.orders = {order["orderId"]: {k: Decimal(v) if k in ORDER_DECIMALS and v is not None else v
+                                          for k, v in order.items()} for order in state["orders"]}
+        self.trades = state["trades"]
+        self._next_order_id = state["next_order_id"]
+
+    def _save(self):
+        """Write the state file atomically (a temp file renamed over the old one)"""
+        if self.state_file is None:
+            return
+        state = {
+            "now": self.now, "wall": self._wall, "next_order_id": self._next_order_id,
+            "free": {asset: str(amount) for asset, amount in self.free.items()},
+            "locked": {asset: str(amount) for asset, amount in self.locked.items()},
+            "orders": [{k: str(v) if k in ORDER_DECIMALS and v is not None else v for k, v in order.items()}
+                       for order in self.orders.values()],
+            "trades": self.trades,
+        }
+        os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+        tmp = f"{self.state_file}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp, self.state_file)
+
+    def _catch_up(self):
+        """Move the clock by the wall time since the last request, or since the last run saved it"""
+        if self._wall is None or self.now is None:
+            return
+        elapsed = int((time.time() - self._wall) * 1000)
+        if elapsed > 0:
+            self._wall += elapsed / 1000
+            trades = len(self.trades)
+            self._move_clock(self.now + elapsed)
+            if len(self.trades) > trades:
+                self._save()
+
+    # ===== Market data =====
+
+    def _market(self, symbol: str) -> dict:
+        market = self._markets.get(symbol)
+        if market is None:
+            market = open_klines(symbol, self.interval)
+            if len(market["open_time"]) == 0:
+                raise Exception(f"No stored {self.interval} klines for {symbol}, "
+                                f"run python -m tools.sync_klines --symbol {symbol} --interval {self.interval}")
+            self._markets[symbol] = market
+            if self.now is None:
+                # Start a day into the data, so the 24h ticker has a full window
+                first = min(len(market["open_time"]) - 1, DAY_MS // self.step)
+                self.now = int(market["open_time"][first]) + self.step
+                if self.state_file is not None:
+                    self._wall = time.time()
+                    self._save()
+        return market
+
+    def _last_closed(self, market: dict) -> int:
+        """Index of the last candle closed at the current time"""
+        index = int(np.searchsorted(market["open_time"], self.now - self.step, side="right")) - 1
+        if index < 0:
+            raise _error(-1003, "No market data before the simulated time")
+        return index
+
+    def _price(self, symbol: str) -> Decimal:
+        market = self._market(symbol)
+        return _dec(market["close"][self._last_closed(market)])
+
+    def _symbol_filters(self, symbol: str) -> SymbolFilters:
+        if symbol not in self._filters:
+            self._filters[symbol] = SymbolFilters(self._symbol_info(symbol))
+        return self._filters[symbol]
+
+    def _symbol_info(self, symbol: str) -> dict:
+        base, quote = split_symbol(symbol)
+        return {
+            "symbol": symbol, "status": "TRADING", "baseAsset": base, "quoteAsset": quote,
+            "baseAssetPrecision": 8, "quoteAssetPrecision": 8,
+            "orderTypes": ["LIMIT", "LIMIT_MAKER", "MARKET"], "filters": PAPER_FILTERS,
+        }
+
+    def ping(self):
+        return {}
+
+    @_synced
+    def time(self):
+        with self._lock:
+            return {"serverTime": self.now}
+
+    def exchange_info(self, symbol: str = None, symbols: list = None, **kwargs):
+        names = [symbol] if symbol else (symbols or list(self._markets))
+        return {"timezone": "UTC", "serverTime": self.now, "rateLimits": [],
+                "symbols": [self._symbol_info(s) for s in names]}
+
+    @_synced
+    def ticker_price(self, symbol: str = None, **kwargs):
+        with self._lock:
+            return {"symbol": symbol, "price": to_str(self._price(symbol))}
+
+    @_synced
+    def book_ticker(self, symbol: str = None, **kwargs):
+        """Klines have no book: market buys fill at the last price, so that is the ask and the bid is a tick lower"""
+        with self._lock:
+            market = self._market(symbol)
+            price = self._price(symbol)
+            volume = to_str(_dec(market["volume"][self._last_closed(market)]))
+            tick = self._symbol_filters(symbol).tick_size
+            return {"symbol": symbol, "bidPrice": to_str(price - tick), "bidQty": volume,
+                    "askPrice": to_str(price), "askQty": volume}
+
+    @_synced
+    def ticker_24hr(self, symbol: str = None, **kwargs):
+        with self._lock:
+            market = self._market(symbol)
+            last = self._last_closed(market)
+            first = int(np.searchsorted(market["open_time"], self.now - DAY_MS, side="left"))
+            window = slice(first, last + 1)
+            open_price = _dec(market["open"][first])
+            last_price = _dec(market["close"][last])
+            volume = float(market["volume"][window].sum())
+            quote_volume = float(market["quote_volume"][window].sum())
+            change = last_price - open_price
+            return {
+                "symbol": symbol,
+                "priceChange": to_str(change),
+                "priceChangePercent": f"{change / open_price * 100:.3f}",
+                "weightedAvgPrice": f"{quote_volume / volume:.8f}" if volume else to_str(last_price),
+                "openPrice": to_str(open_price),
+                "highPrice": to_str(_dec(market["high"][window].max())),
+                "lowPrice": to_str(_dec(market["low"][window].min())),
+                "lastPrice": to_str(last_price),
+                "volume": f"{volume:.8f}",
+                "quoteVolume": f"{quote_volume:.8f}",
+                "openTime": int(market["open_time"][first]),
+                "closeTime": self.now - 1,
+                "count": int(market["trades"][window].sum()),
+            }
+
+    @_synced
+    def klines(self, symbol: str, interval: str, startTime: int = None, endTime: int = None,
+               limit: int = 500, **kwargs):
+        """Closed candles from the store, as REST rows; nothing from the simulated future"""
+        with self._lock:
+            self._market(symbol)
+            columns = open_klines(symbol, interval)
+            open_time = columns["open_time"]
+            end = int(np.searchsorted(open_time, self.now - INTERVAL_MS[interval], side="right"))
+            if endTime is not None:
+                end = min(end, int(np.searchsorted(open_time, endTime, side="right")))
+            if startTime is not None:
+                start = int(np.searchsorted(open_time, startTime, side="left"))
+                end = min(end, start + limit)
+            else:
+                start = max(0, end - limit)
+            return [[int(columns["open_time"][i]), to_str(_dec(columns["open"][i])),
+                     to_str(_dec(columns["high"][i])), to_str(_dec(columns["low"][i])),
+                     to_str(_dec(columns["close"][i])), to_str(_dec(columns["volume"][i])),
+                     int(columns["close_time"][i]), to_str(_dec(columns["quote_volume"][i])),
+                     int(columns["trades"][i]), "0", "0", "0"] for i in range(start, end)]
+
+    # ===== Account =====
+
+    @_synced
+    def account(self, **kwargs):
+        with self._lock:
+            assets = sorted(set(self.free) | set(self.locked))
+            return {
+                "makerCommission": int(self.fee_rate * 10000), "takerCommission": int(self.fee_rate * 10000),
+                "canTrade": True, "canWithdraw": False, "canDeposit": False,
+                "updateTime": self.now, "accountType": "SPOT", "permissions": ["SPOT"],
+                "balances": [{"asset": a, "free": to_str(self.free.get(a, Decimal("0"))),
+                              "locked": to_str(self.locked.get(a, Decimal("0")))} for a in assets],
+            }
+
+    @_synced
+    def deposit(self, asset: str, amount):
+        """Credit free balance, e.g. to keep a long soak run funded"""
+        with self._lock:
+            self.free[asset] = self.free.get(asset, Decimal("0")) + Decimal(str(amount))
+            self._save()
+
+    def _move(self, asset: str, amount: Decimal, to_locked: bool):
+        source, target = (self.free, self.locked) if to_locked else (self.locked, self.free)
+        source[asset] = source.get(asset, Decimal("0")) - amount
+        target[asset] = target.get(asset, Decimal("0")) + amount
+
+    @_synced
+    def my_trades(self, symbol: str, orderId: int = None, startTime: int = None, endTime: int = None,
+                  fromId: int = None, limit: int = 500, **kwargs):
+        with self._lock:
+            trades = [t for t in self.trades if t["symbol"] == symbol]
+            if orderId is not None:
+                trades = [t for t in trades if t["orderId"] == orderId]
+            if fromId is not None:
+                trades = [t for t in trades if t["id"] >= fromId]
+            elif startTime is not None or endTime is not None:
+                trades = [t for t in trades if (startTime is None or t["time"] >= startTime)
+                          and (endTime is None or t["time"] <= endTime)]
+            else:
+                # Without a starting point Binance returns the most recent trades
+                trades = trades[-limit:]
+            return [dict(t) for t in trades[:limit]]
+
+    # ===== Orders =====
+
+    def _fill(self, order: dict, qty: Decimal, price: Decimal, is_maker: bool) -> dict:
+        """Execute qty at price: settle balances, record the trade, return the fill"""
+        base, quote = split_symbol(order["symbol"])
+        quote_qty = qty * price
+        if order["side"] == "BUY":
+            commission, commission_asset = qty * self.fee_rate, base
+            if order["type"] == "MARKET":
+                self.free[quote] -= quote_qty
+            else:
+                self.locked[quote] -= quote_qty
+                # A fill below the limit price releases the difference
+                self._move(quote, (order["_price"] - price) * qty, to_locked=False)
+            self.free[base] = self.free.get(base, Decimal("0")) + qty - commission
+        else:
+            commission, commission_asset = quote_qty * self.fee_rate, quote
+            if order["type"] == "MARKET":
+                self.free[base] -= qty
+            else:
+                self.locked[base] -= qty
+            self.free[quote] = self.free.get(quote, Decimal("0")) + quote_qty - commission
+
+        order["_executed"] += qty
+        order["_quote"] += quote_qty
+        order["status"] = "FILLED" if order["_executed"] >= order["_qty"] else "PARTIALLY_FILLED"
+        order["updateTime"] = self.now
+
+        trade = {
+            "symbol": order["symbol"], "id": len(self.trades) + 1, "orderId": order["orderId"],
+            "orderListId": -1, "price": to_str(price), "qty": to_str(qty), "quoteQty": to_str(quote_qty),
+            "commission": to_str(commission), "commissionAsset": commission_asset, "time": self.now,
+            "isBuyer": order["side"] == "BUY", "isMaker": is_maker, "isBestMatch": True,
+        }
+        self.trades.append(trade)
+        return {"price": trade["price"], "qty": trade["qty"], "commission": trade["commission"],
+                "commissionAsset": commission_asset, "tradeId": trade["id"]}
+
+    @staticmethod
+    def _public(order: dict) -> dict:
+        return {k: v for k, v in order.items() if not k.startswith("_")} | {
+            "executedQty": to_str(order["_executed"]),
+            "cummulativeQuoteQty": to_str(order["_quote"]),
+        }
+
+    def _find(self, symbol: str, orderId: int = None, origClientOrderId: str = None):
+        if orderId is not None:
+            order = self.orders.get(orderId)
+            return order if order and order["symbol"] == symbol else None
+        for order in reversed(self.orders.values()):
+            if order["symbol"] == symbol and order["clientOrderId"] == origClientOrderId:
+                return order
+        return None
+
+    @_synced
+    def new_order(self, symbol: str, side: str, type: str, quantity=None, quoteOrderQty=None,
+                  price=None, timeInForce: str = None, newClientOrderId: str = None, **kwargs):
+        with self._lock:
+            filters = self._symbol_filters(symbol)
+            base, quote = split_symbol(symbol)
+            market_price = self._price(symbol)
+            client_order_id = newClientOrderId or f"paper-{self._next_order_id}"
+            if any(o["clientOrderId"] == client_order_id and o["status"] in ("NEW", "PARTIALLY_FILLED")
+                   for o in self.orders.values()):
+                raise _error(-2010, "Duplicate order sent.")
+
+            try:
+                if type == "MARKET":
+                    if quoteOrderQty is not None:
+                        quote_qty = filters.market_quote_order(quoteOrderQty)
+                        qty = filters.round_qty(quote_qty / market_price)
+                    else:
+                        qty = filters.round_qty(Decimal(str(quantity)))
+                    limit_price = None
+                elif type in ("LIMIT", "LIMIT_MAKER"):
+                    limit_price, qty = Decimal(str(price)), Decimal(str(quantity))
+                    filters.validate_limit(limit_price, qty)
+                else:
+                    raise _error(-1116, "Invalid orderType.")
+            except InvalidOrder as e:
+                raise _error(-1013, f"Filter failure: {e}")
+            if qty <= 0:
+                raise _error(-1013, "Filter failure: LOT_SIZE")
+
+            crosses = limit_price is None or (limit_price >= market_price if side == "BUY" else limit_price <= market_price)
+            if type == "LIMIT_MAKER" and crosses:
+                raise _error(-2010, "Order would immediately match and take.")
+
+            cost_asset, cost = (quote, qty * (limit_price or market_price)) if side == "BUY" else (base, qty)
+            if self.free.get(cost_asset, Decimal("0")) < cost:
+                raise _error(-2010, "Account has insufficient balance for requested action.")
+
+            order = {
+                "symbol": symbol, "orderId": self._next_order_id, "orderListId": -1,
+                "clientOrderId": client_order_id, "transactTime": self.now,
+                "price": to_str(limit_price or Decimal("0")), "origQty": to_str(qty),
+                "status": "NEW", "timeInForce": timeInForce or "GTC", "type": type, "side": side,
+                "time": self.now, "updateTime": self.now, "isWorking": True,
+                "_price": limit_price, "_qty": qty, "_executed": Decimal("0"), "_quote": Decimal("0"),
+            }
+            self._next_order_id += 1
+            self.orders[order["orderId"]] = order
+
+            fills = []
+            if crosses:
+                if type != "MARKET":
+                    self._move(cost_asset, cost, to_locked=True)
+                # Marketable orders take at the last price (never worse than the limit)
+                fills.append(self._fill(order, qty, market_price, is_maker=False))
+            elif timeInForce in ("IOC", "FOK"):
+                order["status"] = "EXPIRED"
+            else:
+                self._move(cost_asset, cost, to_locked=True)
+            self._save()
+            return self._public(order) | {"fills": fills}
+
+    @_synced
+    def get_order(self, symbol: str, orderId: int = None, origClientOrderId: str = None, **kwargs):
+        with self._lock:
+            order = self._find(symbol, orderId, origClientOrderId)
+            if order is None:
+                raise _error(-2013, "Order does not exist.")
+            return self._public(order)
+
+    @_synced
+    def get_open_orders(self, symbol: str = None, **kwargs):
+        with self._lock:
+            return [self._public(o) for o in self.orders.values()
+                    if o["status"] in ("NEW", "PARTIALLY_FILLED") and (symbol is None or o["symbol"] == symbol)]
+
+    @_synced
+    def cancel_order(self, symbol: str, orderId: int = None, origClientOrderId: str = None, **kwargs):
+        with self._lock:
+            order = self._find(symbol, orderId, origClientOrderId)
+            if order is None or order["status"] not in ("NEW", "PARTIALLY_FILLED"):
+                raise _error(-2011, "Unknown order sent.")
+            remaining = order["_qty"] - order["_executed"]
+            base, quote = split_symbol(symbol)
+            if order["side"] == "BUY":
+                self._move(quote, remaining * order["_price"], to_locked=False)
+            else:
+                self._move(base, remaining, to_locked=False)
+            order["status"] = "CANCELED"
+            order["updateTime"] = self.now
+            self._save()
+            return self._public(order)
+
+    def cancel_open_orders(self, symbol: str, **kwargs):
+        with self._lock:
+            return [self.cancel_order(symbol, orderId=o["orderId"]) for o in self.get_open_orders(symbol)]
+
+    def cancel_and_replace(self, symbol: str, side: str, type: str, cancelReplaceMode: str,
+                           cancelOrderId: int = None, cancelOrigClientOrderId: str = None, **kwargs):
+        with self._lock:
+            try:
+                cancel_response = self.cancel_order(symbol, cancelOrderId, cancelOrigClientOrderId)
+            except ClientError:
+                if cancelReplaceMode == "STOP_ON_FAILURE":
+                    raise
+                cancel_response = None
+            new_response = self.new_order(symbol, side, type, **kwargs)
+            return {"cancelResult": "SUCCESS" if cancel_response else "FAILURE", "newOrderResult": "SUCCESS",
+                    "cancelResponse": cancel_response, "newOrderResponse": new_response}
+
+    # ===== Clock =====
+
+    @_synced
+    def advance(self, seconds: float):
+        """Move the clock forward, matching resting orders against every candle that closes"""
+        with self._lock:
+            if self.now is None:
+                raise Exception("The simulated clock starts with the first market data request (or start_time)")
+            self._move_clock(self.now + int(seconds * 1000))
+            self._save()
+
+    def _move_clock(self, target: int):
+        symbols = {o["symbol"] for o in self.orders.values() if o["status"] in ("NEW", "PARTIALLY_FILLED")}
+        for symbol in symbols:
+            market = self._market(symbol)
+            first = int(np.searchsorted(market["open_time"], self.now - self.step, side="right"))
+            last = int(np.searchsorted(market["open_time"], target - self.step, side="right"))
+            for i in range(first, last):
+                self._match(symbol, market, i)
+        self.now = target
+
+    def _match(self, symbol: str, market: dict, i: int):
+        resting = [o for o in self.orders.values()
+                   if o["symbol"] == symbol and o["status"] in ("NEW", "PARTIALLY_FILLED")]
+        if not resting:
+            return
+        candle_open, high, low = _dec(market["open"][i]), _dec(market["high"][i]), _dec(market["low"][i])
+        # Fills are stamped with the close of the candle that triggered them
+        self.now = max(self.now, int(market["open_time"][i]) + self.step)
+        for order in resting:
+            remaining = order["_qty"] - order["_executed"]
+            if order["side"] == "BUY" and low <= order["_price"]:
+                self._fill(order, remaining, min(order["_price"], candle_open), is_maker=True)
+            elif order["side"] == "SELL" and high >= order["_price"]:
+                self._fill(order, remaining, max(order["_price"], candle_open), is_maker=True)
@@ -0,0 +1,157 @@
+"""
+Strategy settings from a TOML file, validated at load and reloaded when it changes.
+
+STRATEGY_CONFIG_FILE (config/strategies.toml) has one table per strategy.
+Every key is optional and falls back to the defaults in config/settings.py:
+
+    [buy_the_dip]
+    baseline = 5.0
+    curve = "exponential"
+    monthly_budget = 300.0
+
+Each strategy declares its parameters (see src/strategies/base.py) and the
+file is checked against them: unknown tables or keys, wrong types and values
+out of range are all reported at once. The file's mtime is checked on every
+read, so a resident runner (daemon, dip watcher) picks up an edit at its
+next run without a restart. An edit that doesn't validate is reported and
+the last good settings stay in use.
+"""
+import importlib.util
+import os
+import threading
+import tomllib
+
+from config.settings import STRATEGY_CONFIG_FILE
+
+
+class Param:
+    """One strategy setting: type, default and allowed values"""
+
+    def __init__(self, kind: type, default, choices=None, minimum=None, maximum=None, optional: bool = False):
+        self.kind = kind
+        self.default = default
+        self.choices = choices
+        self.minimum = minimum
+        self.maximum = maximum
+        self.optional = optional  # None (TOML: leave the key out) allowed
+
+    def check(self, value):
+        """value converted to the param's type, or ValueError"""
+        if value is None:
+            if self.optional:
+                return None
+            raise ValueError("is required")
+        # TOML integers are fine where a float is expected, booleans never are
+        if isinstance(value, bool) and self.kind is not bool:
+            raise ValueError(f"must be {self.kind.__name__}, got {value!r}")
+        if self.kind is float and isinstance(value, int):
+            value = float(value)
+        if not isinstance(value, self.kind):
+            raise ValueError(f"must be {self.kind.__name__}, got {value!r}")
+        if self.choices is not None and value not in self.choices:
+            raise ValueError(f"must be one of {', '.join(map(str, self.choices))}, got {value!r}")
+        if self.minimum is not None and value < self.minimum:
+            raise ValueError(f"must be >= {self.minimum}, got {value!r}")
+        if self.maximum is not None and value > self.maximum:
+            raise ValueError(f"must be <= {self.maximum}, got {value!r}")
+        return value
+
+
+def validate(raw: dict, schemas: dict, checks: dict = None) -> dict:
+    """{strategy: {param: value}} with defaults filled in; ValueError listing every problem"""
+    errors = []
+    for name in raw:
+        # Strategies register when their module is imported: only names without a module are unknown
+        if name not in schemas and importlib.util.find_spec(f"src.strategies.{name}") is None:
+            errors.append(f"[{name}]: unknown strategy, no module src/strategies/{name}.py")
+
+    settings = {}
+    for name, schema in schemas.items():
+        table = raw.get(name, {})
+        if not isinstance(table, dict):
+            errors.append(f"[{name}]: must be a table")
+            continue
+        values = {}
+        for key, value in table.items():
+            if key not in schema:
+                errors.append(f"{name}.{key}: unknown setting, use one of {', '.join(schema)}")
+                continue
+            try:
+                values[key] = schema[key].check(value)
+            except ValueError as e:
+                errors.append(f"{name}.{key}: {e}")
+        for key, param in schema.items():
+            values.setdefault(key, param.default)
+        check = (checks or {}).get(name)
+        if check is not None:
+            try:
+                check(values)
+            except ValueError as e:
+                errors.append(f"[{name}]: {e}")
+        settings[name] = values
+
+    if errors:
+        raise ValueError("Invalid strategy settings:\n  " + "\n  ".join(errors))
+    return settings
+
+
+class StrategyConfig:
+    """Validated settings of every registered strategy, reloaded when the file changes"""
+
+    def __init__(self, path: str = STRATEGY_CONFIG_FILE):
+        self.path = path
+        self._schemas = {}
+        self._checks = {}
+        self._settings = None
+        self._mtime = None
+        self._stale = True
+        self._lock = threading.Lock()
+
+    def register(self, name: str, schema: dict, check=None):
+        """Declare a strategy's settings: {key: Param}, check(settings) for rules across keys"""
+        with self._lock:
+            self._schemas[name] = schema
+            self._checks[name] = check
+            self._stale = True  # validate the file again, now against this schema too
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, "rb") as f:
+                return tomllib.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _mtime_now(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return 0
+
+    def get(self, name: str) -> dict:
+        """Current settings of one strategy (a copy)"""
+        with self._lock:
+            mtime = self._mtime_now()
+            if mtime != self._mtime or self._stale:
+                try:
+                    settings = validate(self._read(), self._schemas, self._checks)
+                except (ValueError, tomllib.TOMLDecodeError) as e:
+                    if self._settings is None:
+                        raise ValueError(f"{self.path}: {e}") from None
+                    print(f"{self.path} not reloaded, keeping the previous settings. {e}")
+                else:
+                    if self._settings is not None and mtime != self._mtime:
+                        print(f"Reloaded strategy settings from {self.path}")
+                    self._settings = settings
+                self._mtime = mtime
+                self._stale = False
+            if name not in self._settings:
+                # Registered after the last good load
+                return validate({}, {name: self._schemas[name]}, self._checks)[name]
+            return dict(self._settings[name])
+
+
+_config = StrategyConfig()
+
+
+def get_config() -> StrategyConfig:
+    return _config
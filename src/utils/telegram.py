@@ -1,7 +1,11 @@
 # telegram_notify.py
-import os, requests
+import os, json, time, atexit, fcntl, threading, uuid
+from pathlib import Path
 from typing import Optional
 
+from src.utils import metrics
+from config.settings import DATA_DIR
+
 """
 Minimal Telegram notifier. Reads token/chat_id from env or parameters.
 To use it:
@@ -9,12 +13,87 @@ To use it:
 from dotenv import load_dotenv
 load_dotenv()  # before importing or calling send_telegram
 
-from telegram_notify import send_telegram
+from telegram_notify import send_telegram, notify
+
+send_telegram("Hello, world!")   # blocking, returns True/False
+notify("Order filled")           # queued, sent by a background worker
 
-send_telegram("Hello, world!")
+notify() keeps the trade path off Telegram's round trip: messages are written
+to an on-disk outbox, coalesced into one digest per burst, throttled to the
+per-chat rate limit and retried (honoring 429 retry_after) by a worker thread.
+Anything still unsent when the process exits is picked up by the next run.
 """
 
 API_BASE = "https://api.telegram.org"
+OUTBOX_FILE = Path(DATA_DIR) / "telegram_outbox.jsonl"
+
+MESSAGES_PER_SECOND = 1.0   # Telegram allows ~1 msg/s per chat (30 msg/s per bot)
+COALESCE_SECONDS = 2.0      # wait this long for more events before sending a digest
+MAX_RETRIES = 3
+EXIT_FLUSH_TIMEOUT = 15.0
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session():
+    """Pooled HTTP session, so chunks and digests reuse one connection"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests  # only runs that actually send pay for the import
+            _session = requests.Session()
+        return _session
+
+
+class TokenBucket:
+    """Simple thread-safe token bucket; acquire() blocks until a token is free"""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+_bucket = TokenBucket(MESSAGES_PER_SECOND)
+
+
+def _post(url: str, data: dict, timeout: int, debug: bool) -> bool:
+    """POST one message, throttled, retrying on 429 after the advertised retry_after"""
+    for attempt in range(MAX_RETRIES + 1):
+        _bucket.acquire()
+        with metrics.timed("telegram.send"):
+            r = _get_session().post(url, data=data, timeout=timeout)
+        if debug:
+            print("Telegram status:", r.status_code)
+            try:
+                print("Telegram resp:", r.json())
+            except Exception:
+                print("Telegram resp (text):", r.text)
+        if r.status_code == 429 and attempt < MAX_RETRIES:
+            try:
+                retry_after = r.json().get("parameters", {}).get("retry_after", 1)
+            except Exception:
+                retry_after = 1
+            time.sleep(retry_after)
+            continue
+        return r.ok and r.json().get("ok", False)
+    return False
+
 
 def send_telegram(
     message: str,
@@ -49,17 +128,153 @@ def send_telegram(
             data["parse_mode"] = parse_mode
 
         try:
-            r = requests.post(url, data=data, timeout=timeout)
-            if debug:
-                print("Telegram status:", r.status_code)
-                try:
-                    print("Telegram resp:", r.json())
-                except Exception:
-                    print("Telegram resp (text):", r.text)
-            if not r.ok or not r.json().get("ok", False):
+            if not _post(url, data, timeout, debug):
                 ok_all = False
         except Exception as e:
             if debug:
                 print("Telegram exception:", repr(e))
             ok_all = False
     return ok_all
+
+
+class Outbox:
+    """Unsent messages on disk (JSON lines), shared safely between processes via flock"""
+
+    def __init__(self, path: Path = OUTBOX_FILE):
+        self.path = path
+
+    def _locked(self, update):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                entries = [json.loads(line) for line in f if line.strip()]
+                result, entries = update(entries)
+                if entries is not None:
+                    f.seek(0)
+                    f.truncate()
+                    f.writelines(json.dumps(e) + "\n" for e in entries)
+                    f.flush()
+                    os.fsync(f.fileno())
+                return result
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def add(self, entry: dict):
+        self._locked(lambda entries: (None, entries + [entry]))
+
+    def remove(self, ids: set):
+        self._locked(lambda entries: (None, [e for e in entries if e["id"] not in ids]))
+
+    def claim_orphans(self) -> list:
+        """Take over messages left by processes that are no longer running"""
+        def update(entries):
+            claimed = []
+            for e in entries:
+                if e["pid"] != os.getpid() and not _pid_alive(e["pid"]):
+                    e["pid"] = os.getpid()
+                    claimed.append(e)
+            return claimed, entries if claimed else None
+        return self._locked(update)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Notifier:
+    """Background worker that sends queued messages as coalesced digests"""
+
+    def __init__(self, outbox: Outbox = None):
+        self.outbox = outbox or Outbox()
+        self.pending = []
+        self.cond = threading.Condition()
+        self.thread = None
+        self.stopping = False
+
+    def notify(self, message: str):
+        entry = {"id": uuid.uuid4().hex, "pid": os.getpid(), "ts": time.time(), "text": message}
+        # Persist first, so a crash before sending doesn't lose the message
+        self.outbox.add(entry)
+        with self.cond:
+            self.pending.append(entry)
+            self._ensure_worker()
+            self.cond.notify()
+
+    def _ensure_worker(self):
+        if self.thread is None:
+            self.pending.extend(self.outbox.claim_orphans())
+            self.thread = threading.Thread(target=self._run, name="telegram-notifier", daemon=True)
+            self.thread.start()
+            atexit.register(self.flush, EXIT_FLUSH_TIMEOUT)
+
+    def _run(self):
+        backoff = 5.0
+        while True:
+            with self.cond:
+                while not self.pending and not self.stopping:
+                    self.cond.wait()
+                if not self.pending:
+                    return
+                # Give a burst of events a moment to arrive, unless we're shutting down
+                deadline = time.monotonic() + COALESCE_SECONDS
+                while not self.stopping and time.monotonic() < deadline:
+                    self.cond.wait(deadline - time.monotonic())
+                batch = list(self.pending)
+
+            if send_telegram(self._digest(batch), parse_mode=None):
+                sent = {e["id"] for e in batch}
+                self.outbox.remove(sent)
+                with self.cond:
+                    self.pending = [e for e in self.pending if e["id"] not in sent]
+                    self.cond.notify_all()
+                backoff = 5.0
+            else:
+                # Keep them in the outbox; retry later (or in the next run)
+                with self.cond:
+                    if self.stopping:
+                        self.pending = []
+                        self.cond.notify_all()
+                        return
+                    self.cond.wait(backoff)
+                backoff = min(backoff * 2, 300.0)
+
+    @staticmethod
+    def _digest(batch: list) -> str:
+        if len(batch) == 1:
+            return batch[0]["text"]
+        separator = "\n\n" + "-" * 20 + "\n\n"
+        return f"{len(batch)} notifications\n\n" + separator.join(e["text"] for e in batch)
+
+    def flush(self, timeout: float = EXIT_FLUSH_TIMEOUT) -> bool:
+        """Send everything pending now; returns True if nothing is left"""
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            self.stopping = True
+            self.cond.notify_all()
+            while self.pending and time.monotonic() < deadline:
+                self.cond.wait(deadline - time.monotonic())
+            return not self.pending
+
+
+_notifier = None
+_notifier_lock = threading.Lock()
+
+
+def notify(message: str) -> bool:
+    """Queue a message for background delivery (see Notifier). Returns False if Telegram isn't configured."""
+    global _notifier
+    if not os.getenv("TELEGRAM_CHAT_ID", "").strip() or not os.getenv("TELEGRAM_BOT_TOKEN", "").strip():
+        return False
+    with _notifier_lock:
+        if _notifier is None:
+            _notifier = Notifier()
+    _notifier.notify(message)
+    return True
@@ -0,0 +1,78 @@
+"""
+Shared fixtures. Streams are tested without a network: FakeSocket stands in
+for SpotWebsocketStreamClient and feeds canned messages straight to the
+handlers a real socket would call.
+"""
+import json
+import os
+import tempfile
+
+# Before config.settings is imported: keep ledgers, cursors and outboxes out of data/
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="autoinvest-tests-"))
+
+import pytest
+
+
+class FakeSocket:
+    """One websocket connection: records subscriptions, delivers messages and closes on demand"""
+
+    def __init__(self, on_message=None, on_close=None, on_error=None, **kwargs):
+        self.on_message = on_message
+        self.on_close = on_close
+        self.on_error = on_error
+        self.socket_manager = object()  # what the connector passes to every callback
+        self.subscriptions = []
+        self.stopped = False
+
+    def ticker(self, symbol):
+        self.subscriptions.append(("ticker", symbol))
+
+    def kline(self, symbol, interval):
+        self.subscriptions.append(("kline", symbol, interval))
+
+    def user_data(self, listen_key):
+        self.subscriptions.append(("user_data", listen_key))
+
+    def diff_book_depth(self, symbol, speed):
+        self.subscriptions.append(("depth", symbol, speed))
+
+    def stop(self):
+        self.stopped = True
+
+    def send(self, payload: dict):
+        self.on_message(self.socket_manager, json.dumps(payload))
+
+    def drop(self):
+        """The server went away"""
+        self.on_close(self.socket_manager)
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    """Poll until condition() is true (reconnects happen on a background thread)"""
+    import time
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.fixture
+def sockets(monkeypatch):
+    """Every FakeSocket opened by the stream modules during the test, in order"""
+    from src.utils import order_book, price_stream
+    from src.monitoring import user_stream
+
+    opened = []
+
+    def connect(**kwargs):
+        socket = FakeSocket(**kwargs)
+        opened.append(socket)
+        return socket
+
+    monkeypatch.setattr(order_book, "SpotWebsocketStreamClient", connect)
+    monkeypatch.setattr(price_stream, "SpotWebsocketStreamClient", connect)
+    monkeypatch.setattr(user_stream, "SpotWebsocketStreamClient", connect)
+    return opened
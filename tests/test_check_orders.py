@@ -0,0 +1,40 @@
+import pytest
+
+from src.monitoring import check_orders
+
+
+class FakeTradesClient:
+    def __init__(self, count: int):
+        self.trades = [{"id": i, "symbol": "BTCEUR"} for i in range(1, count + 1)]
+
+    def my_trades(self, symbol, fromId=0, limit=500, **kwargs):
+        return [t for t in self.trades if t["id"] >= fromId][:limit]
+
+
+def test_crash_mid_page_resumes_after_the_last_handled_trade(monkeypatch, tmp_path):
+    monkeypatch.setattr(check_orders, "CURSOR_FILE", tmp_path / "cursor.json")
+    check_orders.save_cursor("BTCEUR", 0)
+    client = FakeTradesClient(5)
+    handled = []
+
+    def crash_on_third(trade):
+        if trade["id"] == 3:
+            raise RuntimeError("killed")
+        handled.append(trade["id"])
+
+    with pytest.raises(RuntimeError):
+        check_orders.poll_new_trades("BTCEUR", handle=crash_on_third, client=client)
+    assert check_orders.load_cursor("BTCEUR") == 2
+
+    check_orders.poll_new_trades("BTCEUR", handle=lambda trade: handled.append(trade["id"]), client=client)
+    assert handled == [1, 2, 3, 4, 5]
+    assert check_orders.load_cursor("BTCEUR") == 5
+
+
+def test_fill_is_labelled_with_the_assets_of_its_pair(monkeypatch):
+    messages = []
+    monkeypatch.setattr(check_orders, "notify", lambda message: messages.append(message) or True)
+    check_orders.notify_trade({"symbol": "ETHEUR", "qty": "0.5", "price": "2000", "commission": "0.0005",
+                               "commissionAsset": "ETH", "time": 1_700_000_000_000, "orderId": 7, "id": 9})
+    assert "Quantity: 0.5 ETH\n" in messages[0]
+    assert "Total Cost: 1000.00 EUR\n" in messages[0]
@@ -0,0 +1,21 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils.dip_sizing import MonthlyBudget
+
+
+def test_concurrent_reservations_never_overspend(tmp_path):
+    budget = MonthlyBudget(monthly=100.0, max_carry=0, path=tmp_path / "budget.json")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        granted = list(pool.map(lambda _: budget.reserve("main:BTCEUR", "2025-10", 30.0), range(8)))
+
+    assert sorted(granted, reverse=True)[:4] == [30.0, 30.0, 30.0, 10.0]
+    assert sum(granted) == 100.0
+
+
+def test_settle_returns_what_was_not_spent(tmp_path):
+    budget = MonthlyBudget(monthly=100.0, max_carry=0, path=tmp_path / "budget.json")
+    reserved = budget.reserve("main:BTCEUR", "2025-10", 60.0)
+    budget.settle("main:BTCEUR", "2025-10", reserved, 45.5)
+
+    assert budget.available("main:BTCEUR", "2025-10") == 54.5
+    assert budget.available("sub:BTCEUR", "2025-10") == 100.0  # accounts don't share a budget
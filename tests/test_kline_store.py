@@ -0,0 +1,40 @@
+import time
+
+import numpy as np
+
+from src.utils import kline_store
+from src.utils.kline_store import INTERVAL_MS, PAGE_LIMIT, open_klines, sync_klines
+
+STEP = INTERVAL_MS["1h"]
+
+
+class FakeKlines:
+    """klines endpoint over a synthetic hourly series, tracking how many rows were handed out"""
+
+    def __init__(self):
+        self.served = 0
+
+    def klines(self, symbol, interval, startTime, endTime, limit):
+        now = int(time.time() * 1000)
+        rows = [[t, t / STEP, t / STEP + 1, t / STEP - 1, t / STEP, 1.0, t + STEP - 1, 2.0, 3]
+                for t in range(startTime, min(endTime + 1, now), STEP)][:limit]
+        self.served += len(rows)
+        return rows
+
+
+def test_sync_appends_every_page_in_order(monkeypatch, tmp_path):
+    monkeypatch.setattr(kline_store, "DATA_DIR", str(tmp_path))
+    appended = []
+    append = kline_store._append
+    monkeypatch.setattr(kline_store, "_append", lambda path, klines: (appended.append(len(klines)), append(path, klines)))
+
+    now = int(time.time() * 1000)
+    start = (now - 5 * PAGE_LIMIT * STEP) // STEP * STEP
+    client = FakeKlines()
+    added = sync_klines(client, "BTCEUR", "1h", start_time=start)
+
+    columns = open_klines("BTCEUR", "1h")
+    assert added == len(columns["open_time"]) == client.served - 1  # the open candle isn't stored
+    assert (np.diff(columns["open_time"]) == STEP).all()
+    assert max(appended) <= PAGE_LIMIT  # stored page by page, never the whole download at once
+    assert sync_klines(client, "BTCEUR", "1h") == 0
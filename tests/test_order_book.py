@@ -0,0 +1,106 @@
+from decimal import Decimal
+
+from src.utils.order_book import LocalOrderBook
+from tests.conftest import wait_for
+
+
+class FakeDepth:
+    """REST depth snapshots, served in order (the last one repeats)"""
+
+    def __init__(self, *snapshots):
+        self.snapshots = list(snapshots)
+        self.requests = 0
+
+    def depth(self, symbol, limit):
+        self.requests += 1
+        return self.snapshots[min(self.requests, len(self.snapshots)) - 1]
+
+
+def snapshot(last_update_id: int, bids: list, asks: list) -> dict:
+    return {"lastUpdateId": last_update_id, "bids": bids, "asks": asks}
+
+
+def depth_update(first: int, last: int, bids=(), asks=()) -> dict:
+    return {"stream": "btceur@depth@100ms", "data": {"e": "depthUpdate", "E": 1700000000000, "s": "BTCEUR",
+                                                      "U": first, "u": last, "b": list(bids), "a": list(asks)}}
+
+
+BOOK = snapshot(100, [["59990.00", "1.0"], ["59980.00", "2.0"]],
+                [["60010.00", "0.5"], ["60020.00", "1.0"], ["60050.00", "3.0"]])
+
+
+def test_first_event_may_straddle_the_snapshot(sockets):
+    book = LocalOrderBook("BTCEUR", FakeDepth(BOOK))
+    book._connect()
+    book.resync()
+
+    # Starts before the snapshot and ends after it: the documented bridge, not a gap
+    sockets[0].send(depth_update(95, 105, bids=[["59995.00", "0.3"]]))
+    assert book.synced
+    assert book.best_bid() == (Decimal("59995.00"), Decimal("0.3"))
+
+    # From then on, events must be contiguous
+    sockets[0].send(depth_update(106, 107, asks=[["60010.00", "0"]]))
+    assert book.best_ask() == (Decimal("60020.00"), Decimal("1.0"))
+    assert book.last_update_id == 107
+
+
+def test_buffered_events_replay_over_the_snapshot(sockets):
+    book = LocalOrderBook("BTCEUR", FakeDepth(BOOK))
+    book._connect()
+    sockets[0].send(depth_update(90, 99, bids=[["59000.00", "9.0"]]))  # older than the snapshot
+    sockets[0].send(depth_update(98, 102, bids=[["59990.00", "0"]]))
+    sockets[0].send(depth_update(103, 104, asks=[["60005.00", "0.2"]]))
+    book.resync()
+
+    assert book.synced and book.last_update_id == 104
+    assert book.best_bid() == (Decimal("59980.00"), Decimal("2.0"))
+    assert book.best_ask() == (Decimal("60005.00"), Decimal("0.2"))
+
+
+def test_gap_triggers_a_resync(sockets):
+    resynced = snapshot(120, [["59900.00", "1.0"]], [["59950.00", "1.0"]])
+    client = FakeDepth(BOOK, resynced)
+    book = LocalOrderBook("BTCEUR", client)
+    book.start()
+    try:
+        sockets[0].send(depth_update(101, 102))
+        sockets[0].send(depth_update(110, 112))  # 103..109 lost
+
+        assert wait_for(lambda: client.requests == 2 and book.synced)
+        assert book.last_update_id == 120
+        assert book.spread() == (Decimal("50.00"), Decimal("50.00") / Decimal("59925.00") * 10000)
+        assert len(sockets) == 1  # a gap only needs a snapshot, not a new socket
+    finally:
+        book.stop()
+
+
+def test_late_close_of_a_replaced_socket_is_ignored(sockets):
+    book = LocalOrderBook("BTCEUR", FakeDepth(BOOK))
+    book._connect()
+    book._connect()
+
+    assert sockets[0].stopped
+    sockets[0].drop()
+    assert not book._disconnected.is_set()
+    sockets[1].drop()
+    assert book._disconnected.is_set()
+
+
+def test_cost_to_fill_walks_the_levels(sockets):
+    book = LocalOrderBook("BTCEUR", FakeDepth(BOOK))
+    book._connect()
+    book.resync()
+
+    # 0.5 @ 60010 (30005) + 1.0 @ 60020 (60020), then 9975 of the 60050 level
+    fill = book.cost_to_fill(100000)
+    assert fill["worst_price"] == Decimal("60050.00")
+    assert fill["qty"] == Decimal("1.5") + Decimal("9975") / Decimal("60050.00")
+    assert book.cost_to_fill(10 ** 6) is None  # deeper than the book
+
+    # An update inside the summed depth is reflected in the next estimate
+    sockets[0].send(depth_update(101, 101, asks=[["60015.00", "1.0"]]))
+    assert book.cost_to_fill(100000)["worst_price"] == Decimal("60020.00")
+    assert book.cost_to_fill(60000)["worst_price"] == Decimal("60015.00")
+    sell = book.cost_to_fill(59990, side="SELL")
+    assert sell["qty"] == Decimal("1.0") and sell["slippage_bps"] > 0
@@ -0,0 +1,120 @@
+import time
+from decimal import Decimal
+
+from src.strategies.dip_watcher import DipTrigger
+from src.utils.price_stream import KLINE_INTERVAL_MS, KLINES_PAGE, MAX_CANDLES, PriceFeed
+from tests.conftest import wait_for
+
+
+class FakeMarket:
+    """REST side of the feed: a 24h ticker and closed 1m klines up to the current minute"""
+
+    def __init__(self, change: str = "-1.00"):
+        self.ticker = {"lastPrice": "60000.00", "priceChangePercent": change}
+        self.kline_requests = []
+
+    def ticker_24hr(self, symbol):
+        return dict(self.ticker)
+
+    def klines(self, symbol, interval, startTime=None, limit=500):
+        self.kline_requests.append(startTime)
+        now = int(time.time() * 1000)
+        first = -(-startTime // KLINE_INTERVAL_MS) * KLINE_INTERVAL_MS
+        return [[t, "60000", "60010", "59990", "60000", "1.0", t + KLINE_INTERVAL_MS - 1]
+                for t in range(first, now, KLINE_INTERVAL_MS)][:limit]
+
+
+def is_last_closed_minute(open_time: int) -> bool:
+    """open_time is the latest closed candle (or the one before, if a minute turned since)"""
+    last = int(time.time() * 1000) // KLINE_INTERVAL_MS * KLINE_INTERVAL_MS - KLINE_INTERVAL_MS
+    return open_time in (last, last - KLINE_INTERVAL_MS)
+
+
+def ticker_message(last: str, change: str) -> dict:
+    return {"stream": "btceur@ticker", "data": {"e": "24hrTicker", "E": int(time.time() * 1000),
+                                                 "c": last, "P": change}}
+
+
+def kline_message(open_time: int, close: str, closed: bool = True) -> dict:
+    return {"stream": "btceur@kline_1m", "data": {"e": "kline", "E": int(time.time() * 1000),
+                                                   "k": {"t": open_time, "c": close, "x": closed}}}
+
+
+def test_backfill_pages_through_the_window():
+    market = FakeMarket()
+    feed = PriceFeed("BTCEUR", market)
+    feed.backfill()
+
+    assert len(market.kline_requests) == -(-MAX_CANDLES // KLINES_PAGE)
+    assert is_last_closed_minute(feed.candles[-1][0])
+    assert feed.last_price == Decimal("60000.00")
+
+
+def test_stream_messages_update_the_view(sockets):
+    feed = PriceFeed("BTCEUR", FakeMarket())
+    feed.backfill()
+    feed._connect()
+
+    sockets[-1].send(ticker_message("58000.00", "-3.50"))
+    assert feed.snapshot() == {"symbol": "BTCEUR", "lastPrice": "58000.00", "priceChangePercent": "-3.50"}
+
+    open_time = feed.candles[-1][0] + KLINE_INTERVAL_MS
+    sockets[-1].send(kline_message(open_time, "57900", closed=False))
+    assert feed.candles[-1][0] != open_time  # still open
+    sockets[-1].send(kline_message(open_time, "57950"))
+    assert feed.candles[-1] == (open_time, Decimal("57950"))
+
+
+def test_reconnect_backfills_the_gap(sockets):
+    market = FakeMarket()
+    updates = []
+    feed = PriceFeed("BTCEUR", market, on_update=updates.append)
+    feed.start()
+    try:
+        # Candles closed while the socket was down
+        for _ in range(5):
+            feed.candles.pop()
+        requests = len(market.kline_requests)
+        market.ticker["priceChangePercent"] = "-4.00"
+
+        gap_start = feed.candles[-1][0] + KLINE_INTERVAL_MS
+        sockets[0].drop()
+        assert wait_for(lambda: len(updates) == 2)  # start and the backfill after the reconnect
+
+        assert len(sockets) == 2 and sockets[0].stopped
+        assert market.kline_requests[requests] == gap_start
+        assert is_last_closed_minute(feed.candles[-1][0])
+        assert feed.price_change_percent == Decimal("-4.00")
+    finally:
+        feed.stop()
+
+
+def test_late_close_of_a_replaced_socket_is_ignored(sockets):
+    feed = PriceFeed("BTCEUR", FakeMarket())
+    feed._connect()
+    feed._connect()
+
+    sockets[0].drop()
+    assert not feed._disconnected.is_set()
+    sockets[1].drop()
+    assert feed._disconnected.is_set()
+
+
+def test_dip_watcher_fires_on_the_backfilled_ticker(sockets):
+    market = FakeMarket(change="-1.00")
+    trigger = DipTrigger([Decimal(level) for level in range(2, 16)])
+    fired = []
+    feed = PriceFeed("BTCEUR", market, on_update=lambda f: fired.append(trigger.check(f.price_change_percent)))
+    feed.start()
+    try:
+        # The dip happened while disconnected: only the REST backfill sees it
+        market.ticker["priceChangePercent"] = "-5.20"
+        sockets[0].drop()
+        assert wait_for(lambda: len(fired) == 2)
+        assert fired == [None, Decimal(5)]
+
+        # Same level again from the stream: fires once only
+        sockets[1].send(ticker_message("57000.00", "-5.40"))
+        assert fired[-1] is None
+    finally:
+        feed.stop()
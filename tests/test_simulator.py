@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+from src.utils import kline_store, simulator
+from src.utils.exchange_filters import split_symbol
+from src.utils.simulator import SimulatedSpot
+from config.settings import PAPER_BALANCES, TRADING_PAIR
+
+START = 1_700_000_000_000
+MINUTE = 60_000
+
+
+class WallClock:
+    """Stands in for the time module, so a test can let hours pass between runs"""
+
+    def __init__(self):
+        self.now = 1_800_000_000.0
+
+    def time(self):
+        return self.now
+
+
+def store_klines(monkeypatch, tmp_path):
+    """Two days of 1m candles at 100, then a dip to 90"""
+    monkeypatch.setattr(kline_store, "DATA_DIR", str(tmp_path))
+    rows = []
+    for i in range(3000):
+        price = 100.0 if i < 1500 else 90.0
+        open_time = START + i * MINUTE
+        rows.append([open_time, price, price, price, price, 1.0, open_time + MINUTE - 1, price, 1])
+    kline_store._append(kline_store.store_path(TRADING_PAIR, "1m"), rows)
+
+
+def test_state_carries_over_to_the_next_run(monkeypatch, tmp_path):
+    store_klines(monkeypatch, tmp_path)
+    wall = WallClock()
+    monkeypatch.setattr(simulator, "time", wall)
+    state_file = str(tmp_path / "paper_main.json")
+
+    first = SimulatedSpot(state_file=state_file)
+    started = first.simulated_time
+    assert started is not None  # the order slot is read before any market data
+    first.new_order(symbol=TRADING_PAIR, side="BUY", type="MARKET", quoteOrderQty="50")
+    resting = first.new_order(symbol=TRADING_PAIR, side="BUY", type="LIMIT", price="95", quantity="1",
+                              timeInForce="GTC")
+    quote = split_symbol(TRADING_PAIR)[1]
+    assert first.free[quote] == PAPER_BALANCES[quote] - 50 - 95
+
+    wall.now += 3 * 3600
+    second = SimulatedSpot(state_file=state_file)
+    assert second.simulated_time == started + 3 * 3600
+    # The limit order rested through the dip while no process was running
+    assert second.get_order(symbol=TRADING_PAIR, orderId=resting["orderId"])["status"] == "FILLED"
+    assert [(t["orderId"], Decimal(t["price"])) for t in second.my_trades(symbol=TRADING_PAIR)] == [(1, 100), (2, 90)]
+    assert second.free[quote] == first.free[quote] + 95 - 90  # the fill under the limit released the rest
+    assert second.new_order(symbol=TRADING_PAIR, side="BUY", type="MARKET", quoteOrderQty="45")["orderId"] == 3
+
+
+def test_without_a_state_file_the_clock_only_moves_on_advance(monkeypatch, tmp_path):
+    store_klines(monkeypatch, tmp_path)
+    wall = WallClock()
+    monkeypatch.setattr(simulator, "time", wall)
+
+    client = SimulatedSpot()
+    started = client.simulated_time
+    wall.now += 3600
+    assert client.simulated_time == started
+    client.advance(60)
+    assert client.simulated_time == started + 60
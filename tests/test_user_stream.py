@@ -0,0 +1,160 @@
+import threading
+
+import pytest
+
+from src.monitoring import check_orders, user_stream
+from src.monitoring.user_stream import SYMBOL, UserDataStream
+from src.utils.exchange_filters import split_symbol
+from tests.conftest import wait_for
+
+
+class FakeUserClient:
+    """listenKey endpoints plus the my_trades/get_order rows reconcile reads"""
+
+    def __init__(self):
+        self.keys = 0
+        self.closed_keys = []
+        self.orders = {}  # orderId -> order
+        self.trades = []
+        self.order_requests = []
+
+    def new_listen_key(self):
+        self.keys += 1
+        return {"listenKey": f"key-{self.keys}"}
+
+    def renew_listen_key(self, listen_key):
+        pass
+
+    def close_listen_key(self, listen_key):
+        self.closed_keys.append(listen_key)
+
+    def my_trades(self, symbol, fromId=0, limit=500, **kwargs):
+        return [t for t in self.trades if t["symbol"] == symbol and t["id"] >= fromId][:limit]
+
+    def get_order(self, symbol, orderId):
+        self.order_requests.append(orderId)
+        return self.orders[orderId]
+
+    def fill(self, trade_id: int, order_id: int, order_type: str, client_order_id: str):
+        self.orders[order_id] = {"orderId": order_id, "type": order_type, "clientOrderId": client_order_id}
+        self.trades.append({"id": trade_id, "symbol": SYMBOL, "orderId": order_id, "price": "60000.00",
+                            "qty": "0.00100000", "commission": "0.00000100", "commissionAsset": "BTC",
+                            "time": 1700000000000 + trade_id})
+
+
+def execution_report(trade_id: int, order_id: int, order_type: str, client_order_id: str) -> dict:
+    return {"e": "executionReport", "x": "TRADE", "s": SYMBOL, "t": trade_id, "i": order_id,
+            "o": order_type, "c": client_order_id, "l": "0.00100000", "L": "60000.00",
+            "n": "0.00000100", "N": "BTC", "T": 1700000000000 + trade_id}
+
+
+@pytest.fixture
+def recorded(monkeypatch, tmp_path):
+    """Ledger rows and notifications the stream produced, with a fresh cursor at trade 0"""
+    logged, notified = [], []
+    monkeypatch.setattr(check_orders, "CURSOR_FILE", tmp_path / "cursor.json")
+    monkeypatch.setattr(user_stream, "log_trade", lambda **row: logged.append(row))
+    monkeypatch.setattr(user_stream, "notify_trade", lambda trade: notified.append(trade["id"]))
+    # Strategy orders (market buys, TWAP/maker children) are logged by their strategy
+    monkeypatch.setattr(user_stream, "is_journaled", lambda account, client_order_id: client_order_id.startswith("simple_dca-"))
+    check_orders.save_cursor(SYMBOL, 0)
+    return logged, notified
+
+
+@pytest.fixture
+def running(sockets):
+    """Start UserDataStream.run() on a thread, stop it at the end of the test"""
+    streams = []
+
+    def start(client):
+        stream = UserDataStream(client)
+        thread = threading.Thread(target=stream.run, daemon=True)
+        thread.start()
+        streams.append((stream, thread))
+        assert wait_for(lambda: len(sockets) == 1)
+        return stream
+
+    yield start
+    for stream, thread in streams:
+        stream.stop()
+        thread.join(timeout=5)
+
+
+def test_listen_key_expired_reconnects_with_a_new_key(sockets, recorded, running):
+    client = FakeUserClient()
+    running(client)
+    assert sockets[0].subscriptions == [("user_data", "key-1")]
+
+    sockets[0].send({"e": "listenKeyExpired", "E": 1700000000000, "listenKey": "key-1"})
+
+    assert wait_for(lambda: len(sockets) == 2)
+    assert sockets[0].stopped
+    assert client.closed_keys == ["key-1"]
+    assert sockets[1].subscriptions == [("user_data", "key-2")]
+
+
+def test_reconnect_reconciles_missed_fills(sockets, recorded, running):
+    logged, notified = recorded
+    client = FakeUserClient()
+    running(client)
+
+    # Filled while the socket was down
+    client.fill(1, 10, "MARKET", "web_market")
+    client.fill(2, 11, "LIMIT", "simple_dca-BTCEUR-2510171700-maker")
+    client.fill(3, 12, "LIMIT", "ladder-BTCEUR-L5")
+    client.fill(4, 12, "LIMIT", "ladder-BTCEUR-L5")
+    client.fill(5, 13, "LIMIT", "web_limit")
+    sockets[0].drop()
+
+    assert wait_for(lambda: len(notified) == 3)
+    assert notified == [3, 4, 5]
+    assert [(row["action"], row["trade_id"]) for row in logged] == [
+        ("dip_ladder", 3), ("dip_ladder", 4), ("limit_fill", 5)]
+    assert {row["base_currency"] for row in logged} == {split_symbol(SYMBOL)[1]}
+    assert sorted(client.order_requests) == [10, 11, 12, 13]  # one lookup per order
+    assert wait_for(lambda: check_orders.load_cursor(SYMBOL) == 5)  # saved right after the last notification
+
+
+def test_fill_seen_on_the_stream_is_not_reconciled_again(sockets, recorded):
+    logged, notified = recorded
+    client = FakeUserClient()
+    stream = UserDataStream(client)
+    stream._connect()
+
+    client.fill(1, 10, "LIMIT", "web_limit")
+    client.fill(2, 11, "MARKET", "web_market")
+    sockets[0].send(execution_report(1, 10, "LIMIT", "web_limit"))
+    sockets[0].send(execution_report(2, 11, "MARKET", "web_market"))
+    sockets[0].send(execution_report(1, 10, "LIMIT", "web_limit"))  # redelivered
+    stream.reconcile()
+
+    assert notified == [1]
+    assert len(logged) == 1
+    assert check_orders.load_cursor(SYMBOL) == 2
+    assert client.order_requests == []
+
+
+def test_stream_fill_during_reconcile_does_not_hide_missed_fills(sockets, recorded):
+    logged, notified = recorded
+    client = FakeUserClient()
+    stream = UserDataStream(client)
+    stream._connect()
+
+    # Missed while disconnected, then a newer fill is pushed while reconcile pages them
+    client.fill(1, 10, "LIMIT", "web_limit")
+    client.fill(2, 11, "LIMIT", "web_limit")
+    client.fill(3, 12, "LIMIT", "web_limit")
+    my_trades = client.my_trades
+
+    def page_then_push(symbol, **kwargs):
+        page = my_trades(symbol, **kwargs)
+        if page:
+            sockets[0].send(execution_report(4, 13, "LIMIT", "web_limit"))
+        return page
+
+    client.my_trades = page_then_push
+    stream.reconcile()
+
+    assert sorted(notified) == [1, 2, 3, 4]
+    assert sorted(row["trade_id"] for row in logged) == [1, 2, 3, 4]
+    assert check_orders.load_cursor(SYMBOL) == 4
@@ -0,0 +1,99 @@
+import sys
+import os
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+# ===== Args =====
+parser = argparse.ArgumentParser(description="Benchmark the trade path against the paper exchange (no network)")
+parser.add_argument("--runs", type=int, default=200, help="simulated hours, each runs every job once")
+parser.add_argument("--seed", type=int, default=42, help="seed of the synthetic price series")
+parser.add_argument("--days", type=int, default=30, help="days of synthetic 1m klines")
+parser.add_argument("--out", help="write the results as JSON (use as a later --baseline)")
+parser.add_argument("--baseline", help="results JSON to compare with; exit 1 if a p95 regressed")
+parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 slowdown vs the baseline (0.25 = 25%%)")
+args = parser.parse_args()
+
+# ===== Config =====
+SYMBOL = "BTCUSDT"
+START_MS = 1_704_067_200_000   # 2024-01-01 UTC, fixed so runs are reproducible
+NOISE_FLOOR = 0.0005           # ignore p95 changes under 0.5 ms
+
+# Throwaway data dir and the simulator: no network, no real ledger, no Telegram.
+# No paper state file either, so the clock only moves on advance() and runs stay reproducible.
+# Must be set before anything imports config.settings.
+workdir = tempfile.mkdtemp(prefix="autoinvest-bench-")
+os.environ.update(DATA_DIR=workdir, EXCHANGE_MODE="paper", PAPER_STATE_FILE="", TELEGRAM_BOT_TOKEN="", TELEGRAM_CHAT_ID="")
+os.environ.pop("METRICS_FILE", None)
+
+import numpy as np
+from src.utils import metrics
+
+with metrics.timed("import"):
+    from src.utils.client import get_client
+    from src.utils.kline_store import _append, store_path
+    from src.strategies.simple_dca import execute_simple_dca
+    from src.strategies.buy_the_dip import execute_buy_the_dip
+    from src.monitoring.check_orders import check_and_notify_executions
+
+# ===== Script =====
+print("========== BENCHMARK ==========")
+rng = np.random.default_rng(args.seed)
+candles = args.days * 1440
+close = 40000 * np.exp(np.cumsum(rng.normal(0, 0.0015, candles)))
+open_ = np.concatenate([[close[0]], close[:-1]])
+spread = np.abs(rng.normal(0, 0.0008, candles))
+_append(store_path(SYMBOL, "1m"), [
+    [START_MS + i * 60_000, round(open_[i], 2), round(max(open_[i], close[i]) * (1 + spread[i]), 2),
+     round(min(open_[i], close[i]) * (1 - spread[i]), 2), round(close[i], 2), 1.0,
+     START_MS + i * 60_000 + 59_999, round(close[i], 2), 100]
+    for i in range(candles)
+])
+
+client = get_client()
+client.deposit("USDT", 10 ** 9)
+client.ticker_price(symbol=SYMBOL)  # loads the market and starts the clock
+runs = min(args.runs, candles // 60 - 25)  # the simulator starts a day in
+print(f"Data dir: {workdir}")
+print(f"Runs: {runs} (seed {args.seed}, {candles} candles)")
+
+started = time.perf_counter()
+with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+    for _ in range(runs):
+        client.advance(3600)
+        execute_simple_dca(client=client)
+        execute_buy_the_dip(client=client, amount=10.0)
+        check_and_notify_executions()
+elapsed = time.perf_counter() - started
+
+results = metrics.summary()
+results["runs"] = runs
+results["seconds"] = elapsed
+results["runs_per_second"] = runs / elapsed
+
+metrics.print_summary(results)
+print(f"\nThroughput: {results['runs_per_second']:.1f} runs/s ({elapsed:.2f}s total)")
+
+if args.out:
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.out}")
+
+regressions = []
+if args.baseline:
+    with open(args.baseline) as f:
+        baseline = json.load(f)["timings"]
+    for name, stats in results["timings"].items():
+        before = baseline.get(name, {}).get("p95")
+        if before is not None and stats["p95"] - before > NOISE_FLOOR and stats["p95"] > before * (1 + args.tolerance):
+            regressions.append(f"{name}: p95 {before * 1000:.3f} -> {stats['p95'] * 1000:.3f} ms")
+    print("\nRegressions vs baseline:" if regressions else "\nNo regressions vs baseline")
+    for line in regressions:
+        print(f"  {line}")
+
+shutil.rmtree(workdir, ignore_errors=True)
+print("===============================")
+sys.exit(1 if regressions else 0)
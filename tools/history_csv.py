@@ -0,0 +1,16 @@
+import argparse
+from src.utils.ledger import export_csv, import_csv
+
+# ===== Args =====
+parser = argparse.ArgumentParser(description="Export the trade ledger to CSV, or import a legacy history.csv")
+parser.add_argument("command", choices=["export", "import"])
+parser.add_argument("path", nargs="?", default="history.csv")
+args = parser.parse_args()
+
+# ===== Script =====
+if args.command == "export":
+    count = export_csv(args.path)
+    print(f"Exported {count} trades to {args.path}")
+else:
+    count = import_csv(args.path)
+    print(f"Imported {count} new trades from {args.path}")
@@ -0,0 +1,25 @@
+import argparse
+from datetime import datetime, timezone
+from src.utils.client import get_client
+from src.utils.kline_store import sync_klines, open_klines, store_path
+from config.settings import TRADING_PAIR
+
+# ===== Args =====
+parser = argparse.ArgumentParser(description="Sync klines into the local data store")
+parser.add_argument("--symbol", default=TRADING_PAIR)
+parser.add_argument("--interval", default="1h")
+parser.add_argument("--since", default="2020-01-01", help="first day to download when the store is empty (UTC)")
+args = parser.parse_args()
+
+start = int(datetime.strptime(args.since, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+# ===== Script =====
+print("========== SYNC KLINES ==========")
+added = sync_klines(get_client(), args.symbol, args.interval, start_time=start)
+columns = open_klines(args.symbol, args.interval)
+print(f"Added {added} candles to {store_path(args.symbol, args.interval)}")
+if len(columns["open_time"]):
+    first = datetime.fromtimestamp(columns["open_time"][0] / 1000, timezone.utc)
+    last = datetime.fromtimestamp(columns["open_time"][-1] / 1000, timezone.utc)
+    print(f"Stored {len(columns['open_time'])} candles: {first} -> {last}")
+print("=================================")